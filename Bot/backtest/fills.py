@@ -0,0 +1,218 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from storage.column_cache import load_table
+
+from .runner import BacktestResult, Config, SpreadData
+
+# 記録済み L2 板（スナップショット）と約定テープからレッグごとの約定価格を求めるフィルシミュレータ。
+#
+#   - 発注はシグナル時刻 + venue ごとのレイテンシ（固定分 + 指数分布の揺らぎ）で取引所に届く
+#   - 到着時点の最新スナップショットで板を歩き、数量分の VWAP を約定価格とする（指値なら指値まで）
+#   - 指値の残りは、到着時点でその価格に見えていた数量を「前に並ぶ量」とし、約定テープで
+#     その価格を跨ぐ反対側の約定が 前に並ぶ量 + 残量 に達した時点で約定（queue_timeout で打ち切り）
+#
+# 板の記録形式（CSV、storage.column_cache 経由で読む）:
+#   timestamp, bid_px_0..bid_px_{L-1}, bid_qty_0.., ask_px_0.., ask_qty_0..   （bid は降順, ask は昇順）
+# 約定テープ: timestamp, price, qty, side（アグレッサー側: 買い=+1, 売り=-1）
+
+BUY = 1
+SELL = -1
+
+
+@dataclass
+class DepthBook:
+    ts: np.ndarray        # int64 ns（昇順）
+    bid_px: np.ndarray    # (n, L)
+    bid_qty: np.ndarray
+    ask_px: np.ndarray
+    ask_qty: np.ndarray
+
+    @property
+    def levels(self) -> int:
+        return self.bid_px.shape[1]
+
+    @staticmethod
+    def from_csv(path: Path, levels: int) -> 'DepthBook':
+        t = load_table(path)
+
+        def side(name: str) -> np.ndarray:
+            return np.stack([np.asarray(t[f'{name}_{i}']) for i in range(levels)], axis=1)
+
+        return DepthBook(np.asarray(t['timestamp']), side('bid_px'), side('bid_qty'),
+                         side('ask_px'), side('ask_qty'))
+
+    @staticmethod
+    def from_top(data: SpreadData, bid: np.ndarray, ask: np.ndarray, qty: float = np.inf) -> 'DepthBook':
+        """最良気配しか無いデータ（compare_10s.csv）用の1段の板。"""
+        q = np.full((len(bid), 1), qty)
+        return DepthBook(data.ts.view(np.int64), bid[:, None], q, ask[:, None], q.copy())
+
+    def index_at(self, ts_ns: np.ndarray) -> np.ndarray:
+        """各時刻の時点で最新のスナップショット位置（それ以前に無ければ -1 = 板なし。後の板では約定させない）。"""
+        return np.searchsorted(self.ts, ts_ns, side='right') - 1
+
+
+@dataclass
+class TradeTape:
+    ts: np.ndarray      # int64 ns（昇順）
+    price: np.ndarray
+    qty: np.ndarray
+    side: np.ndarray    # アグレッサー側 +1 / -1
+
+    @staticmethod
+    def from_csv(path: Path) -> 'TradeTape':
+        t = load_table(path)
+        return TradeTape(np.asarray(t['timestamp']), np.asarray(t['price']), np.asarray(t['qty']),
+                         np.asarray(t['side']))
+
+
+@dataclass
+class VenueLatency:
+    latency_ms: float = 50.0
+    jitter_ms: float = 10.0
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """発注→取引所到着の遅延 [ns]。"""
+        ms = self.latency_ms + rng.exponential(self.jitter_ms, n) if self.jitter_ms > 0 else np.full(n, self.latency_ms)
+        return (ms * 1e6).astype(np.int64)
+
+
+@dataclass
+class LegFills:
+    arrive_ns: np.ndarray
+    done_ns: np.ndarray     # 最後の約定時刻（未約定分が残れば arrive + queue_timeout）
+    price: np.ndarray       # 約定 VWAP（約定ゼロは NaN）
+    filled: np.ndarray
+
+
+def walk_book(px: np.ndarray, qty: np.ndarray, want: np.ndarray, limit: np.ndarray | None,
+              side: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(m, L) の板を数量 want まで歩く。limit があればその価格より悪い段は使わない。(VWAP, 約定量) を返す。"""
+    ok = np.isfinite(px) & (qty > 0)
+    if limit is not None:
+        ok &= (px <= limit[:, None]) if side == BUY else (px >= limit[:, None])
+    # 各段を want で頭打ちにしておく（数量 inf の1段板でも cumsum が壊れない）
+    q = np.minimum(np.where(ok, qty, 0.0), want[:, None])
+    before = np.cumsum(q, axis=1) - q
+    take = np.clip(want[:, None] - before, 0.0, q)
+    filled = take.sum(axis=1)
+    notional = (take * np.where(ok, px, 0.0)).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        vwap = np.where(filled > 0, notional / filled, np.nan)
+    return vwap, filled
+
+
+class FillSimulator:
+    """venue ごとの板/テープ/レイテンシからレッグの約定を求める。1 呼び出しで複数注文をまとめて処理する。"""
+
+    def __init__(self, books: Dict[str, DepthBook], latency: Dict[str, VenueLatency],
+                 tapes: Dict[str, TradeTape] | None = None, queue_timeout_ms: float = 2000.0,
+                 seed: int | None = None) -> None:
+        self.books = books
+        self.latency = latency
+        self.tapes = tapes or {}
+        self.queue_timeout_ns = int(queue_timeout_ms * 1e6)
+        self.rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def from_config(config: Dict[str, Any], books: Dict[str, DepthBook],
+                    tapes: Dict[str, TradeTape] | None = None, seed: int | None = None) -> 'FillSimulator':
+        fc = (config.get('backtest') or {}).get('fills') or {}
+        latency = {v: VenueLatency(float(c.get('latency_ms', 50.0)), float(c.get('jitter_ms', 10.0)))
+                   for v, c in (fc.get('venues') or {}).items()}
+        return FillSimulator(books, latency, tapes, float(fc.get('queue_timeout_ms', 2000.0)), seed)
+
+    def fill(self, venue: str, ts_ns: np.ndarray, side: int, qty: np.ndarray | float,
+             limit: np.ndarray | None = None) -> LegFills:
+        book = self.books[venue]
+        ts_ns = np.asarray(ts_ns, dtype=np.int64)
+        want = np.broadcast_to(np.asarray(qty, dtype=np.float64), ts_ns.shape).copy()
+        arrive = ts_ns + self.latency.get(venue, VenueLatency()).sample(self.rng, len(ts_ns))
+        idx = book.index_at(arrive)
+        have = idx >= 0   # 到着より前にスナップショットが無い注文は約定ゼロ（価格 NaN）
+        idx = np.maximum(idx, 0)
+        px, q = (book.ask_px, book.ask_qty) if side == BUY else (book.bid_px, book.bid_qty)
+        price, filled = walk_book(px[idx], q[idx], np.where(have, want, 0.0), limit, side)
+        done = arrive.copy()
+        tape = self.tapes.get(venue)
+        if limit is not None and tape is not None:
+            rest = np.flatnonzero((filled < want) & have)
+            if len(rest):
+                # 残りは指値で板に並び、テープで順番が回ってくるのを待つ
+                same = (book.bid_px if side == BUY else book.ask_px)[idx[rest]] == limit[rest, None]
+                ahead = np.where(same, (book.bid_qty if side == BUY else book.ask_qty)[idx[rest]], 0.0).sum(axis=1)
+                for k, a in zip(rest.tolist(), ahead.tolist()):
+                    got, t_done = self._queue_fill(tape, int(arrive[k]), side, float(limit[k]), a, want[k] - filled[k])
+                    if got > 0:
+                        price[k] = (price[k] * filled[k] + limit[k] * got) / (filled[k] + got) if filled[k] > 0 else limit[k]
+                        filled[k] += got
+                    done[k] = t_done
+        return LegFills(arrive, done, price, filled)
+
+    def _queue_fill(self, tape: TradeTape, arrive: int, side: int, limit: float, ahead: float,
+                    remaining: float) -> Tuple[float, int]:
+        lo = np.searchsorted(tape.ts, arrive, side='right')
+        hi = np.searchsorted(tape.ts, arrive + self.queue_timeout_ns, side='right')
+        if hi <= lo:
+            return 0.0, arrive + self.queue_timeout_ns
+        p = tape.price[lo:hi]
+        # 買い指値は売りアグレッサーが指値以下で約定した量だけ進む（売り指値は逆）
+        hit = (tape.side[lo:hi] == -side) & ((p <= limit) if side == BUY else (p >= limit))
+        vol = np.cumsum(np.where(hit, tape.qty[lo:hi], 0.0))
+        j = np.searchsorted(vol, ahead + remaining)
+        if j < len(vol):
+            return remaining, int(tape.ts[lo + j])
+        return float(max(0.0, min(remaining, vol[-1] - ahead))), arrive + self.queue_timeout_ns
+
+
+@dataclass
+class PairFills:
+    fgrd: LegFills
+    bybit: LegFills
+
+    @property
+    def skew_ms(self) -> np.ndarray:
+        """2 レッグの約定完了時刻の差 [ms]。"""
+        return np.abs(self.fgrd.done_ns - self.bybit.done_ns) / 1e6
+
+
+def simulate_trades(data: SpreadData, result: BacktestResult, sim: FillSimulator, cfg: Config) -> pd.DataFrame:
+    """runner の long_spread トレード（FGRD 買い + Bybit 売り → 反対売買）を板で約定させた PnL [USD]。
+
+    手数料は約定代金 × taker_fee をレッグごとに差し引く（スリッページは板を歩くことで入る）。
+    PnL は実際に約定した数量で計算し、レッグごとに建てと決済の約定量の小さい方だけを損益に数える
+    （板が薄くて一部しか約定しなかったトレードは full=False。建て残り/決済残りは評価しない）。
+    """
+    n = len(result.exit_idx)
+    entry_idx = result.entry_idx[:n]
+    closed = entry_idx >= 0   # 前回から持ち越したポジション（エントリー行 -1）は板を引けないので除く
+    entry_idx, exit_idx = entry_idx[closed], result.exit_idx[closed]
+    ts = data.ts.view(np.int64)
+    t_in, t_out = ts[entry_idx], ts[exit_idx]
+    qty = cfg.unit_btc
+    f_in, b_in = sim.fill('fgrd', t_in, BUY, qty), sim.fill('bybit', t_in, SELL, qty)
+    f_out, b_out = sim.fill('fgrd', t_out, SELL, qty), sim.fill('bybit', t_out, BUY, qty)
+    q_f = np.minimum(f_in.filled, f_out.filled)
+    q_b = np.minimum(b_in.filled, b_out.filled)
+    with np.errstate(invalid='ignore'):
+        gross = (np.where(q_f > 0, (f_out.price - f_in.price) * q_f, 0.0)
+                 + np.where(q_b > 0, (b_in.price - b_out.price) * q_b, 0.0))
+    legs = (f_in, b_in, f_out, b_out)
+    fees = cfg.taker_fee * sum(np.where(x.filled > 0, x.price * x.filled, 0.0) for x in legs)
+    df = pd.DataFrame({
+        'entry_i': entry_idx, 'exit_i': exit_idx,
+        'fgrd_entry_px': f_in.price, 'bybit_entry_px': b_in.price,
+        'fgrd_exit_px': f_out.price, 'bybit_exit_px': b_out.price,
+        'entry_skew_ms': PairFills(f_in, b_in).skew_ms, 'exit_skew_ms': PairFills(f_out, b_out).skew_ms,
+        'filled_min': np.minimum.reduce([x.filled for x in legs]),
+        'full': np.logical_and.reduce([x.filled >= qty * (1 - 1e-9) for x in legs]),
+        'pnl_usd': gross - fees,
+    })
+    df['pnl_cum_usd'] = df['pnl_usd'].cumsum()
+    return df
@@ -0,0 +1,120 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from core.engine import Engine
+from core.signals import SpreadSignals
+from storage.journal import JournalRow, MemoryJournal
+from utils.clock import SimClock
+
+from .runner import Config, SpreadData, load_arrays, run_backtest
+
+# ライブと同じ Engine / SpreadSignals を SimClock とメモリ上のフィードで回すリプレイ。
+# runner.run_backtest（配列カーネル）の基準実装でもあり、両者のトレードは一致する。
+
+RULES_PATH = Path(__file__).resolve().parents[1] / 'strategy_rules.json'
+
+
+def default_rules(config: Dict[str, Any]) -> Config:
+    costs = config.get('costs', {})
+    return Config.from_rules_json(RULES_PATH, taker_fee=float(costs.get('taker_fee', 0.0)),
+                                  slippage_usd=float(costs.get('slippage_usd', 0.0)),
+                                  unit_btc=float(config.get('risk', {}).get('max_pos_btc', 0.0)))
+
+
+def apply_rules(signals: SpreadSignals, rules: Config) -> None:
+    """runner.Config の閾値を SpreadSignals に反映する（スイープ等で同じパラメータを両経路に渡すため）。"""
+    signals.enter_band = rules.enter_band
+    signals.entry_hits_need = rules.persistence_n
+    signals.exit_band = rules.exit_band
+    signals.exit_hits_need = rules.tp_hits_n
+    signals.stop_band = rules.stop_band
+    signals.stop_hits_need = rules.sl_hits_n
+    signals.min_hold = rules.min_hold_sec
+    signals.max_hold = rules.max_hold_sec
+
+
+def array_feed(data: SpreadData, clock: SimClock) -> Iterator[Dict[str, Any]]:
+    """SpreadData を1行ずつデータ点にし、そのたびに clock をデータの時刻へ進める。"""
+    for t, s in zip(data.seconds().tolist(), data.spread.tolist()):
+        clock.t = t
+        yield {'ts': t, 'spread_main': s}
+
+
+@dataclass
+class ReplayResult:
+    journal: List[JournalRow]
+    trades: pd.DataFrame
+    ticks: int
+    elapsed_sec: float
+
+    @property
+    def summary(self) -> Dict[str, Any]:
+        pnl = float(self.trades['pnl_cum'].iloc[-1]) if len(self.trades) else 0.0
+        return {'pnl': pnl, 'num_trades': int(len(self.trades)),
+                'ticks_per_sec': self.ticks / self.elapsed_sec if self.elapsed_sec > 0 else 0.0}
+
+
+def _pair_trades(rows: List[JournalRow], rules: Config) -> pd.DataFrame:
+    entries = [r for r in rows if r[1] == 'enter']
+    exits = [r for r in rows if r[1] == 'exit']
+    entries = entries[:len(exits)]   # 未決済のポジションは含めない
+    df = pd.DataFrame({
+        'entry_ts': [r[0] for r in entries], 'exit_ts': [r[0] for r in exits],
+        'entry_spread': [r[3] for r in entries], 'exit_spread': [r[3] for r in exits],
+    })
+    df['raw'] = df['exit_spread'] - df['entry_spread']
+    df['pnl'] = df['raw'] - (2.0 * rules.taker_fee * 1.0 + rules.slippage_usd)
+    df['pnl_cum'] = df['pnl'].cumsum()
+    return df
+
+
+def replay(config: Dict[str, Any], data: SpreadData, rules: Config | None = None) -> ReplayResult:
+    rules = rules or default_rules(config)
+    clock = SimClock()
+    signals = SpreadSignals(config, feed=array_feed(data, clock), clock=clock)
+    apply_rules(signals, rules)
+    journal = MemoryJournal()
+    engine = Engine(config, signals=signals, clock=clock, journal=journal)
+    tick = engine.tick
+    t0 = time.perf_counter()
+    ticks = 0
+    while tick():
+        ticks += 1
+    elapsed = time.perf_counter() - t0
+    return ReplayResult(journal.rows, _pair_trades(journal.rows, rules), ticks, elapsed)
+
+
+def main() -> None:
+    base = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser(description='replay compare_10s.csv through Engine/SpreadSignals')
+    ap.add_argument('--csv', type=Path, required=True)
+    ap.add_argument('--config', type=Path, default=base / 'config.yaml')
+    ap.add_argument('--out', type=Path, default=None)
+    ap.add_argument('--check', action='store_true', help='runner.run_backtest と突き合わせる')
+    args = ap.parse_args()
+    config = yaml.safe_load(args.config.read_text())
+    data = load_arrays(args.csv)
+    res = replay(config, data)
+    print(f"{res.ticks:,} ticks in {res.elapsed_sec:.2f}s ({res.summary['ticks_per_sec']:,.0f} ticks/s)"
+          f"  trades={res.summary['num_trades']} pnl={res.summary['pnl']:.2f}")
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        res.trades.to_csv(args.out, index=False)
+    if args.check:
+        bt = run_backtest(data, default_rules(config))
+        tsec = data.seconds()
+        same = (np.array_equal(tsec[bt.entry_idx[:len(bt.exit_idx)]], res.trades['entry_ts'].to_numpy())
+                and np.array_equal(tsec[bt.exit_idx], res.trades['exit_ts'].to_numpy()))
+        print(f"runner: trades={bt.summary['num_trades']} pnl={bt.summary['pnl']:.2f}  match={same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+import os
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
+
+# レポートの図。全行をそのまま描くと点とアーティストの数が行数に比例して、描画の時間もメモリも増える。
+#   - 系列は横ピクセル程度の区間に分けて間引く（既定は区間ごとの最小/最大、形を保つ LTTB も選べる）
+#   - ポジション帯は同じ建玉が続く行を区間にまとめ、1 ピクセルより近い区間はさらにつなぐ
+#   - 図は描く内容だけを持つ Figure にして、プロセスプールで並べて描く（matplotlib のオブジェクトは渡せない）
+# 描く点数は図の幅で決まるので、描画時間と PNG 作成時のメモリはデータ長によらない（間引き自体は O(n) 1 回）。
+#
+#   fig = Figure(out / 'equity.png', [Panel().line(ts, equity, 'equity')], title='Equity')
+#   render_all([fig, ...])
+
+BUCKETS = 2000   # 間引き後の区間数（12in x 150dpi = 1800px より少し多め）
+
+
+def _num(a: np.ndarray) -> np.ndarray:
+    """間引き・区間の計算用の float（datetime64 は ns）。"""
+    a = np.asarray(a)
+    if a.dtype.kind == 'M':
+        return a.astype('datetime64[ns]').view(np.int64).astype(np.float64)
+    return a.astype(np.float64, copy=False)
+
+
+def _mpl(a: np.ndarray) -> np.ndarray:
+    """matplotlib の x 座標（datetime64 は日付数値）。"""
+    a = np.asarray(a)
+    return mdates.date2num(a) if a.dtype.kind == 'M' else a.astype(np.float64, copy=False)
+
+
+def minmax_indices(y: np.ndarray, buckets: int = BUCKETS) -> np.ndarray:
+    """行を buckets 個の区間に分け、区間ごとに最小と最大の行を残す（先頭と末尾も残す。昇順）。
+
+    NaN だけの区間はその区間の先頭行（NaN）を残すので、線の切れ目はそのまま描かれる。
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    w = -(-n // buckets)
+    pad = np.full(w * -(-n // w), np.nan)
+    pad[:n] = y
+    blocks = pad.reshape(-1, w)
+    nan = np.isnan(blocks)
+    base = np.arange(len(blocks)) * w
+    lo = base + np.argmin(np.where(nan, np.inf, blocks), axis=1)
+    hi = base + np.argmax(np.where(nan, -np.inf, blocks), axis=1)
+    idx = np.unique(np.concatenate(([0, n - 1], lo, hi)))
+    return idx[idx < n]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int = BUCKETS) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: 前に選んだ点・区間の点・次の区間の平均が作る三角形が最大の点を区間ごとに選ぶ。"""
+    xs, ys = _num(x), np.asarray(y, dtype=np.float64)
+    n = len(ys)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)   # 先頭と末尾の間を n_out - 2 区間に分ける
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    with np.errstate(invalid='ignore'):
+        for b in range(n_out - 2):
+            lo, hi = edges[b], edges[b + 1]
+            nlo, nhi = hi, edges[b + 2] if b + 2 < len(edges) else n
+            nxt = ys[nlo:nhi]
+            nx = xs[nlo:nhi].mean()
+            ny = np.nanmean(nxt) if np.isfinite(nxt).any() else ys[a]
+            area = np.abs((xs[a] - nx) * (ys[lo:hi] - ys[a]) - (xs[a] - xs[lo:hi]) * (ny - ys[a]))
+            a = lo + int(np.argmax(np.where(np.isnan(area), -1.0, area)))
+            out[b + 1] = a
+    return out
+
+
+def downsample(x: np.ndarray, y: np.ndarray, buckets: int = BUCKETS,
+               method: str = 'minmax') -> Tuple[np.ndarray, np.ndarray]:
+    """描画用に間引いた (x, y)。method は 'minmax'（スパイクを落とさない）か 'lttb'（点数が半分で形が近い）。"""
+    x, y = np.asarray(x), np.asarray(y)
+    if method == 'minmax':
+        idx = minmax_indices(y, buckets)
+    elif method == 'lttb':
+        idx = lttb_indices(x, y, buckets)
+    else:
+        raise RuntimeError(f'unknown downsample method: {method}')
+    return x[idx], y[idx]
+
+
+def spans(pos: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """pos が同じ値で続く行の区間 (開始行, 終了行（含む）, 値)。値が 0 の区間は除く。"""
+    pos = np.asarray(pos)
+    if len(pos) == 0:
+        e = np.empty(0, dtype=np.int64)
+        return e, e, pos[:0]
+    change = np.flatnonzero(pos[1:] != pos[:-1]) + 1
+    lo = np.concatenate(([0], change))
+    hi = np.concatenate((change - 1, [len(pos) - 1]))
+    v = pos[lo]
+    keep = v != 0
+    return lo[keep], hi[keep], v[keep]
+
+
+def merge_spans(x: np.ndarray, lo: np.ndarray, hi: np.ndarray,
+                pixels: int) -> Tuple[np.ndarray, np.ndarray]:
+    """隙間が 1 ピクセル（x の全幅 / pixels）以下の区間をつなぐ。lo/hi は昇順で重ならない行番号。"""
+    if len(lo) < 2:
+        return lo, hi
+    px = (_num(x[-1:])[0] - _num(x[:1])[0]) / max(pixels, 1)
+    start = np.concatenate(([True], _num(x[lo[1:]]) - _num(x[hi[:-1]]) > px))
+    g = np.flatnonzero(start)
+    return lo[g], np.maximum.reduceat(hi, g)
+
+
+@dataclass
+class Line:
+    x: np.ndarray
+    y: np.ndarray
+    label: str | None = None
+    style: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Spans:
+    """x0〜x1 の縦帯（y は軸の 0〜1）。"""
+    x0: np.ndarray
+    x1: np.ndarray
+    color: str
+    alpha: float = 0.08
+
+
+@dataclass
+class Panel:
+    lines: List[Line] = field(default_factory=list)
+    points: List[Line] = field(default_factory=list)
+    hlines: List[Tuple[float, Dict[str, Any]]] = field(default_factory=list)
+    spans: List[Spans] = field(default_factory=list)
+    legend: str | None = None       # 凡例の loc（None なら凡例なし）
+    twin: Panel | None = None       # 右の y 軸（x は共有）
+
+    def line(self, x, y, label: str | None = None, buckets: int = BUCKETS, method: str = 'minmax',
+             **style) -> Panel:
+        xs, ys = downsample(x, y, buckets, method)
+        self.lines.append(Line(xs, ys, label, style))
+        return self
+
+    def scatter(self, x, y, label: str | None = None, **style) -> Panel:
+        self.points.append(Line(np.asarray(x), np.asarray(y), label, style))
+        return self
+
+    def hline(self, y: float, **style) -> Panel:
+        self.hlines.append((y, style))
+        return self
+
+    def positions(self, x, pos, colors: Tuple[str, str] = ('green', 'red'), alpha: float = 0.08,
+                  pixels: int = BUCKETS) -> Panel:
+        """建玉中の行に縦帯（pos > 0 は colors[0]、pos < 0 は colors[1]）。"""
+        x = np.asarray(x)
+        lo, hi, v = spans(np.sign(np.asarray(pos)))
+        for sign, color in zip((1, -1), colors):
+            k = v == sign
+            a, b = merge_spans(x, lo[k], hi[k], pixels)
+            if len(a):
+                self.spans.append(Spans(x[a], x[b], color, alpha))
+        return self
+
+
+@dataclass
+class Figure:
+    path: Path
+    panels: List[Panel]
+    title: str | None = None
+    size: Tuple[float, float] = (12, 6)
+    dpi: int = 150
+    height_ratios: List[float] | None = None
+    xticks: Dict[str, Any] = field(default_factory=dict)   # 一番下の軸の tick_params(axis='x', ...)
+
+
+def _draw_spans(ax, sp: Spans, pixels: int) -> None:
+    x0, x1 = _mpl(sp.x0), _mpl(sp.x1)
+    left, right = ax.get_xlim()
+    x1 = np.maximum(x1, x0 + (right - left) / pixels)   # 1 行だけの区間も 1 ピクセル幅で見えるように
+    verts = np.empty((len(x0), 4, 2))
+    verts[:, :, 0] = np.column_stack([x0, x1, x1, x0])
+    verts[:, :, 1] = [0.0, 0.0, 1.0, 1.0]
+    ax.add_collection(PolyCollection(verts, transform=ax.get_xaxis_transform(), facecolors=sp.color,
+                                     edgecolors='none', alpha=sp.alpha), autolim=False)
+
+
+def _draw(ax, p: Panel, pixels: int) -> None:
+    for ln in p.lines:
+        ax.plot(ln.x, ln.y, label=ln.label, **ln.style)
+    for pt in p.points:
+        ax.scatter(pt.x, pt.y, label=pt.label, **pt.style)
+    for y, style in p.hlines:
+        ax.axhline(y, **style)
+    for sp in p.spans:
+        _draw_spans(ax, sp, pixels)
+    if p.legend is not None:
+        ax.legend(loc=p.legend)
+
+
+def render(fig: Figure) -> Path:
+    """fig を PNG に書き出す。"""
+    path = Path(fig.path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pixels = int(fig.size[0] * fig.dpi)
+    f, axes = plt.subplots(len(fig.panels), 1, figsize=fig.size, sharex=True, squeeze=False,
+                           gridspec_kw={'height_ratios': fig.height_ratios} if fig.height_ratios else None)
+    try:
+        for ax, p in zip(axes[:, 0], fig.panels):
+            _draw(ax, p, pixels)
+            if p.twin is not None:
+                _draw(ax.twinx(), p.twin, pixels)
+        if fig.title:
+            axes[0, 0].set_title(fig.title)
+        if fig.xticks:
+            axes[-1, 0].tick_params(axis='x', **fig.xticks)
+        f.tight_layout()
+        f.savefig(path, dpi=fig.dpi)
+    finally:
+        plt.close(f)
+    return path
+
+
+def render_all(figs: Iterable[Figure], workers: int | None = None) -> List[Path]:
+    """図をプロセスプールで並べて描く（1 枚か workers=1 ならこのプロセスで描く）。"""
+    figs = list(figs)
+    workers = min(len(figs), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        return [render(f) for f in figs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render, figs))
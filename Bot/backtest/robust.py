@@ -0,0 +1,147 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .runner import Config, SpreadData, load_arrays
+from .sweep import _W, SharedSeries, _attach, trade_pnls
+
+# ブロックブートストラップによる頑健性評価。1 本の経路から出した PnL / ドローダウン / シャープの点推定に
+# 信頼区間を付ける。
+#
+#   series: スプレッド系列を長さ block 行のブロック単位で復元抽出（循環）して擬似経路を作り、
+#           経路ごとに状態機械を回し直す。プロセスプールで並列化（系列は sweep と同じく共有メモリ）
+#   trades: 決済ごとの PnL 列をブロック単位で復元抽出する。(resample, trade) の行列で一括計算するので速い
+
+METRICS = ['pnl', 'max_drawdown', 'sharpe_like_daily', 'num_trades', 'win_rate']
+STEPS_PER_DAY = 8640   # 10 秒足（run_analysis の sharpe_like_daily と同じ換算）
+
+
+def block_indices(rng: np.random.Generator, n: int, block: int, size: int = 1) -> np.ndarray:
+    """循環ブロックブートストラップの行番号 (size, n)。"""
+    block = max(1, min(block, n))
+    k = -(-n // block)
+    starts = rng.integers(0, n, (size, k))
+    idx = (starts[:, :, None] + np.arange(block)) % n
+    return idx.reshape(size, k * block)[:, :n]
+
+
+def path_metrics(pnl: np.ndarray, n_steps: int) -> Dict[str, np.ndarray]:
+    """決済 PnL の行列 (経路数, トレード数) から経路ごとの指標を求める。
+
+    equity は決済行でだけ変わるステップ関数なので、行ごとの equity を作らずに
+    ドローダウンはトレード列の累積から、シャープは n_steps 行の差分の1次/2次モーメントから出す。
+    """
+    r, m = pnl.shape
+    if m == 0:
+        zero = np.zeros(r)
+        return {'pnl': zero, 'max_drawdown': zero, 'sharpe_like_daily': zero, 'num_trades': zero, 'win_rate': zero}
+    eq = np.cumsum(pnl, axis=1)
+    peak = np.maximum(np.maximum.accumulate(eq, axis=1), 0.0)
+    total = eq[:, -1]
+    mu = total / n_steps
+    var = (pnl * pnl).sum(axis=1) / n_steps - mu * mu
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = np.where(var > 0, mu / np.sqrt(var) * np.sqrt(STEPS_PER_DAY), 0.0)
+    return {'pnl': total, 'max_drawdown': (peak - eq).max(axis=1), 'sharpe_like_daily': sharpe,
+            'num_trades': np.full(r, float(m)), 'win_rate': (pnl > 0).mean(axis=1)}
+
+
+def point_estimate(data: SpreadData, cfg: Config) -> Dict[str, float]:
+    """元の経路そのものの指標。"""
+    *_, pnl = trade_pnls(data.seconds(), data.spread, cfg)
+    return {k: float(v[0]) for k, v in path_metrics(pnl[None, :], max(1, len(data) - 1)).items()}
+
+
+def bootstrap_trades(trade_pnl: np.ndarray, n_steps: int, resamples: int = 10_000, block: int = 5,
+                     seed: int | None = None, chunk: int = 2048) -> pd.DataFrame:
+    """決済 PnL 列のブロックブートストラップ（経路は chunk 本ずつ行列でまとめて評価）。"""
+    rng = np.random.default_rng(seed)
+    out: List[pd.DataFrame] = []
+    for lo in range(0, resamples, chunk):
+        size = min(chunk, resamples - lo)
+        pnl = trade_pnl[block_indices(rng, len(trade_pnl), block, size)] if len(trade_pnl) else np.zeros((size, 0))
+        out.append(pd.DataFrame(path_metrics(pnl, n_steps)))
+    return pd.concat(out, ignore_index=True)[METRICS]
+
+
+def _series_batch(cfg: Config, block: int, seeds: List[np.random.SeedSequence]) -> List[Dict[str, float]]:
+    tsec, spread = _W['tsec'], _W['spread']
+    n = len(spread)
+    out = []
+    for ss in seeds:
+        s = spread[block_indices(np.random.default_rng(ss), n, block)[0]]
+        *_, pnl = trade_pnls(tsec, s, cfg)
+        out.append({k: float(v[0]) for k, v in path_metrics(pnl[None, :], max(1, n - 1)).items()})
+    return out
+
+
+def bootstrap_series(data: SpreadData, cfg: Config, resamples: int = 2000, block: int = 360,
+                     workers: int | None = None, seed: int | None = None, batch_size: int = 16) -> pd.DataFrame:
+    """スプレッド系列のブロックブートストラップ。経路ごとの乱数は seed から派生させるのでワーカー数によらず同じ結果になる。
+
+    時刻列は元のまま使う（欠測による時刻の飛びも保存される）。block は 10 秒足で 360 行 = 1 時間。
+    """
+    workers = workers or os.cpu_count() or 1
+    seeds = np.random.SeedSequence(seed).spawn(resamples)
+    batches = [seeds[i:i + batch_size] for i in range(0, resamples, batch_size)]
+    rows: List[Dict[str, float]] = []
+    with SharedSeries(data) as shared, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(shared.specs,)) as pool:
+        for res in pool.map(_series_batch, [cfg] * len(batches), [block] * len(batches), batches):
+            rows.extend(res)
+    return pd.DataFrame(rows, columns=METRICS)
+
+
+def confidence_intervals(samples: pd.DataFrame, point: Dict[str, float] | None = None,
+                         level: float = 0.95) -> pd.DataFrame:
+    """パーセンタイル法の信頼区間。point を渡すと元の経路の値も並べる。"""
+    q = (1.0 - level) / 2.0
+    rows = []
+    for m in METRICS:
+        v = samples[m].to_numpy()
+        rows.append({'metric': m, 'point': (point or {}).get(m, np.nan), 'mean': float(v.mean()),
+                     'std': float(v.std(ddof=1)) if len(v) > 1 else 0.0,
+                     'lo': float(np.quantile(v, q)), 'hi': float(np.quantile(v, 1.0 - q)),
+                     'p_le_0': float((v <= 0).mean())})
+    return pd.DataFrame(rows)
+
+
+def main(argv: Iterable[str] | None = None) -> None:
+    rules = Path(__file__).resolve().parents[1] / 'strategy_rules.json'
+    ap = argparse.ArgumentParser(description='block bootstrap confidence intervals for backtest.runner')
+    ap.add_argument('--csv', type=Path, required=True)
+    ap.add_argument('--mode', choices=['series', 'trades'], default='series')
+    ap.add_argument('--resamples', type=int, default=2000)
+    ap.add_argument('--block', type=int, default=None, help='series: 行数（既定 360）, trades: トレード数（既定 5）')
+    ap.add_argument('--workers', type=int, default=None)
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--level', type=float, default=0.95)
+    ap.add_argument('--out', type=Path, default=Path('backtest_out/bootstrap.csv'))
+    args = ap.parse_args(argv)
+    cfg = Config.from_rules_json(rules, taker_fee=0.0006, slippage_usd=0.5, unit_btc=0.01)
+    data = load_arrays(args.csv)
+    point = point_estimate(data, cfg)
+    t0 = time.perf_counter()
+    if args.mode == 'series':
+        samples = bootstrap_series(data, cfg, args.resamples, args.block or 360, args.workers, args.seed)
+    else:
+        *_, pnl = trade_pnls(data.seconds(), data.spread, cfg)
+        samples = bootstrap_trades(pnl, max(1, len(data) - 1), args.resamples, args.block or 5, args.seed)
+    elapsed = time.perf_counter() - t0
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    samples.to_csv(args.out, index=False)
+    ci = confidence_intervals(samples, point, args.level)
+    ci.to_csv(args.out.with_name(args.out.stem + '_ci.csv'), index=False)
+    print(f"{args.resamples} {args.mode} resamples x {len(data):,} rows in {elapsed:.2f}s -> {args.out}")
+    print(ci.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,19 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from pathlib import Path
 import csv
-from typing import List, Dict, Any
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+import hashlib
+import os
+from typing import List, Dict, Any, Tuple
+import numpy as np
+import pandas as pd
 import json
 
+from storage.column_cache import TIME_COLUMN, CachedTable, load_table
+from storage.results import ResultStore, code_version, data_fingerprint, default_store, result_key
+
+from .report import Figure, Panel, render
+
 
 @dataclass
 class Config:
@@ -20,6 +26,8 @@ class Config:
     taker_fee: float
     slippage_usd: float
     unit_btc: float
+    tp_hits_n: int = 3
+    sl_hits_n: int = 3
 
     @staticmethod
     def from_rules_json(path: Path, taker_fee: float, slippage_usd: float, unit_btc: float) -> 'Config':
@@ -36,116 +44,349 @@ class Config:
             taker_fee=float(taker_fee),
             slippage_usd=float(slippage_usd),
             unit_btc=float(unit_btc),
+            tp_hits_n=int(exitc['take_profit'].get('consecutive', 3)),
+            sl_hits_n=int(exitc['stop_loss'].get('consecutive', 3)),
         )
 
 
-def load_rows(csv_path: Path) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            try:
-                fb = float(r.get('swap_fgrd_bid') or 'nan')
-                ba = float(r.get('swap_bybit_ask') or 'nan')
-            except ValueError:
-                continue
-            if fb != fb or ba != ba:
-                continue
-            rows.append({'ts': r.get('timestamp'), 'spread': fb - ba})
-    return rows
-
-
-def run_backtest(rows: List[Dict[str, Any]], cfg: Config) -> Dict[str, Any]:
-    trades: List[Dict[str, Any]] = []
-    state = 'FLAT'
-    entry_hits = 0
-    exit_hits = 0
-    entry_idx = None
-    entry_spread = None
-    pnl = 0.0
-
-    for i, row in enumerate(rows):
-        s = row['spread']
-        if state == 'FLAT':
-            entry_hits = entry_hits + 1 if abs(s) <= cfg.enter_band else 0
-            if entry_hits >= 2:  # 2 consecutive hits for entry
-                state = 'OPEN'
-                entry_idx = i
-                entry_spread = s
-                trades.append({'ts': row['ts'], 'side': 'long_spread', 'type': 'entry', 'spread': s, 'i': i})
-                exit_hits = 0
+@dataclass
+class SpreadData:
+    ts: np.ndarray       # datetime64[ns] (UTC)
+    spread: np.ndarray   # float64: swap_fgrd_bid - swap_bybit_ask
+
+    def __len__(self) -> int:
+        return len(self.spread)
+
+    def seconds(self) -> np.ndarray:
+        """epoch 秒（float64）。SpreadSignals / Engine に渡る ts と同じ値。"""
+        return self.ts.view(np.int64) / 1e9
+
+
+def load_arrays(csv_path: Path, use_cache: bool = True, start_row: int = 0,
+                cache_root: Path | None = None) -> SpreadData:
+    """compare_10s.csv から timestamp と spread の連続配列を作る（bid/ask が欠損・非数値の行は除外）。
+
+    use_cache=True なら storage.column_cache 経由で読み、2回目以降は CSV を再パースしない（cache_root で置き場所を変えられる）。
+    start_row を渡すと CSV のその行（データ行の 0 始まり）以降だけを返す（キャッシュ経由なら memmap を切り出すだけで済む）。
+    """
+    if use_cache:
+        return table_arrays(load_table(csv_path, cache_root), start_row)
+    df = pd.read_csv(csv_path, usecols=['timestamp', 'swap_fgrd_bid', 'swap_bybit_ask']).iloc[start_row:]
+    fb = pd.to_numeric(df['swap_fgrd_bid'], errors='coerce').to_numpy(dtype=np.float64)
+    ba = pd.to_numeric(df['swap_bybit_ask'], errors='coerce').to_numpy(dtype=np.float64)
+    ts = pd.to_datetime(df['timestamp'], utc=True, format='ISO8601', errors='coerce').dt.tz_localize(None)
+    return _spread_data(ts.to_numpy(dtype='datetime64[ns]'), fb, ba)
+
+
+def table_arrays(t: CachedTable, start_row: int = 0) -> SpreadData:
+    """列キャッシュの start_row 行目以降から SpreadData を作る。"""
+    return _spread_data(t.ts()[start_row:], t['swap_fgrd_bid'][start_row:], t['swap_bybit_ask'][start_row:])
+
+
+def _spread_data(ts: np.ndarray, fb: np.ndarray, ba: np.ndarray) -> SpreadData:
+    spread = fb - ba
+    ok = ~np.isnan(spread)
+    return SpreadData(ts=ts[ok], spread=np.ascontiguousarray(spread[ok]))
+
+
+def _run_ends(mask: np.ndarray, carry: int = 0) -> np.ndarray:
+    """各行で終わる True の連続長。carry は前回の続き（先頭の連続に加算される）。"""
+    n = len(mask)
+    idx = np.arange(n)
+    # 直近の False の位置を前方に伝播させ、そこからの距離を連続長とする
+    last_false = np.where(mask, -1 - carry, idx)
+    np.maximum.accumulate(last_false, out=last_false)
+    return idx - last_false
+
+
+def _trailing(mask: np.ndarray, carry: int = 0) -> int:
+    """末尾の True の連続長（全行 True なら carry を含む）。"""
+    f = np.flatnonzero(~mask)
+    return int(len(mask) - 1 - f[-1]) if len(f) else len(mask) + carry
+
+
+def _first_held(tsec: np.ndarray, t_open: float, hold: float, lo: int) -> int:
+    """tsec[i] - t_open >= hold となる最初の行（lo 以上）。SpreadSignals と同じ float 差で判定する。"""
+    i = max(lo, int(np.searchsorted(tsec, t_open + hold)))
+    n = len(tsec)
+    while i > lo and tsec[i - 1] - t_open >= hold:
+        i -= 1
+    while i < n and tsec[i] - t_open < hold:
+        i += 1
+    return i
+
+
+@dataclass
+class RunnerState:
+    """状態機械のチェックポイント。run_backtest(data, cfg, state) で続きから処理できる。"""
+    mode: str = 'FLAT'              # FLAT | OPEN
+    entry_hits: int = 0
+    tp_hits: int = 0
+    sl_hits: int = 0
+    opened_ts: float = 0.0          # エントリー時刻 [epoch 秒]
+    entry_spread: float = 0.0
+    hold_ok: bool = False           # min_hold 経過済み（以後は利確/損切りカウンタが持ち越される）
+    last_ts_ns: int | None = None   # 最後に処理した行の時刻
+    rows: int = 0
+    source_rows: int = 0            # 入力（列キャッシュ）の処理済み行数。run_incremental はこの行から続ける
+    prefix_hash: str = ''           # 処理済み範囲の指紋（prefix_hash()）。合わなければ入力が書き換わったとみなす
+    pnl: float = 0.0
+    num_trades: int = 0
+    key: str = ''                   # 入力ファイルと Config の識別子（違えば続きとして使わない）
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        tmp.write_text(json.dumps(asdict(self)))
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path: Path) -> 'RunnerState | None':
+        return RunnerState(**json.loads(path.read_text())) if path.exists() else None
+
+
+def entry_candidates(spread: np.ndarray, enter_band: float, need: int, carry: int = 0) -> np.ndarray:
+    """|spread| <= enter_band が need 回連続した行。"""
+    return np.flatnonzero(_run_ends(np.abs(spread) <= enter_band, carry) >= need)
+
+
+def exit_candidates(spread: np.ndarray, cfg: Config, tp_carry: int = 0,
+                    sl_carry: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """(利確候補行, 損切り候補行)。利確/損切りのヒット数は SpreadSignals と同じく別々に数える。"""
+    tp = np.flatnonzero(_run_ends(spread >= cfg.exit_band, tp_carry) >= cfg.tp_hits_n)
+    sl = np.flatnonzero(_run_ends(spread <= cfg.stop_band, sl_carry) >= cfg.sl_hits_n)
+    return tp, sl
+
+
+def _next(cand: np.ndarray, lo: int, n: int) -> int:
+    j = np.searchsorted(cand, lo)
+    return int(cand[j]) if j < len(cand) else n
+
+
+def _jump(tsec: np.ndarray, entry_cand: np.ndarray, tp_cand: np.ndarray, sl_cand: np.ndarray, cfg: Config,
+          st: RunnerState) -> Tuple[List[int], List[int], Tuple[Any, ...]]:
+    n = len(tsec)
+    entries: List[int] = []
+    exits: List[int] = []
+    # k: FLAT になった最初の行（ヒット数はここから数え直し）。前回の続きなら持ち越したヒット数分だけ手前に置く
+    k = -st.entry_hits
+    if st.mode == 'OPEN':
+        t_open = st.opened_ts
+        if st.hold_ok:
+            m_tp, m_sl, m = -st.tp_hits, -st.sl_hits, 0
         else:
-            held = (i - (entry_idx or i)) * 10.0
-            # enforce minimum hold time before any exit condition
-            if held < cfg.min_hold_sec:
-                continue
-            # price-based exit lines require 3 consecutive hits
-            price_exit = (s >= cfg.exit_band) or (s <= cfg.stop_band)
-            exit_hits = exit_hits + 1 if price_exit else 0
-            time_exit = held >= cfg.max_hold_sec
-            if (price_exit and exit_hits >= 3) or time_exit:
-                raw = (s - (entry_spread or s))
-                cost = 2.0 * cfg.taker_fee * 1.0 + cfg.slippage_usd
-                pnl += raw - cost
-                trades.append({'ts': row['ts'], 'side': 'long_spread', 'type': 'exit', 'spread': s, 'raw': raw, 'pnl': pnl, 'i': i, 'pnl_cum': pnl})
-                state = 'FLAT'
-                entry_idx = None
-                entry_spread = None
-                entry_hits = 0
-                exit_hits = 0
-
-    # Build equity curve (step function updated on each exit)
-    exit_map: Dict[int, float] = {t['i']: t['pnl_cum'] for t in trades if t['type'] == 'exit'}
-    equity: List[Dict[str, Any]] = []
-    current = 0.0
-    for i, row in enumerate(rows):
-        if i in exit_map:
-            current = exit_map[i]
-        equity.append({'ts': row['ts'], 'equity': current})
-
-    return {
-        'trades': trades,
-        'equity': equity,
-        'summary': {
-            'pnl': pnl,
-            'num_trades': sum(1 for t in trades if t['type']=='exit')
-        }
-    }
-
-
-def write_outputs(out_dir: Path, result: Dict[str, Any]) -> None:
+            m = _first_held(tsec, t_open, cfg.min_hold_sec, 0)
+            m_tp = m_sl = m
+        entries.append(-1)
+    while True:
+        if len(entries) == len(exits):
+            e = _next(entry_cand, k + cfg.persistence_n - 1, n)
+            if e >= n:
+                return entries, exits, ('FLAT', k)
+            entries.append(e)
+            t_open = float(tsec[e])
+            m = m_tp = m_sl = _first_held(tsec, t_open, cfg.min_hold_sec, e + 1)
+        x = min(_next(tp_cand, m_tp + cfg.tp_hits_n - 1, n), _next(sl_cand, m_sl + cfg.sl_hits_n - 1, n),
+                _first_held(tsec, t_open, cfg.max_hold_sec, m))
+        if x >= n:
+            return entries, exits, ('OPEN', t_open, m, m_tp, m_sl)
+        exits.append(x)
+        k = x + 1
+
+
+def jump_trades(tsec: np.ndarray, entry_cand: np.ndarray, tp_cand: np.ndarray, sl_cand: np.ndarray,
+                cfg: Config, state: RunnerState | None = None) -> Tuple[np.ndarray, np.ndarray]:
+    """候補行の配列から状態遷移ごとに searchsorted で次の遷移行へジャンプする（計算量はトレード数 × log n）。
+
+    規則は SpreadSignals.should_enter / should_exit と同じ:
+      - エントリーは FLAT に戻った次の行から persistence_n 回連続ヒット
+      - 保有 min_hold_sec 未満の行では利確/損切りカウンタをリセット（= min_hold 経過後の行から数え直し）
+      - min_hold 経過後、保有が max_hold_sec 以上になった行で時間決済
+    state（前回のチェックポイント）から始めた場合、持ち越したポジションのエントリー行は -1 になる。
+    """
+    entries, exits, _ = _jump(tsec, entry_cand, tp_cand, sl_cand, cfg, state or RunnerState())
+    return np.asarray(entries, dtype=np.int64), np.asarray(exits, dtype=np.int64)
+
+
+def scan_trades(data: SpreadData, cfg: Config,
+                state: RunnerState | None = None) -> Tuple[np.ndarray, np.ndarray, RunnerState]:
+    """状態機械を走らせ (entry_idx, exit_idx, 終了時の状態) を返す。
+
+    行ごとのループではなく、連続ヒット数を満たす候補行を事前に求めておき、遷移だけを辿る。
+    結果は backtest.replay（Engine + SpreadSignals を SimClock で回したもの）と一致する。
+    state を渡すと前回の続きから処理し、全件を通しで流した場合と同じトレードになる。
+    """
+    st = state or RunnerState()
+    s = data.spread
+    tsec = data.seconds()
+    flat, is_open = st.mode == 'FLAT', st.mode == 'OPEN' and st.hold_ok
+    in_band = np.abs(s) <= cfg.enter_band
+    tp_mask, sl_mask = s >= cfg.exit_band, s <= cfg.stop_band
+    e_carry = st.entry_hits if flat else 0
+    tp_carry, sl_carry = (st.tp_hits, st.sl_hits) if is_open else (0, 0)
+    entries, exits, tail = _jump(
+        tsec, np.flatnonzero(_run_ends(in_band, e_carry) >= cfg.persistence_n),
+        np.flatnonzero(_run_ends(tp_mask, tp_carry) >= cfg.tp_hits_n),
+        np.flatnonzero(_run_ends(sl_mask, sl_carry) >= cfg.sl_hits_n), cfg, st)
+    n = len(s)
+    end = RunnerState(key=st.key, rows=st.rows + n, pnl=st.pnl, num_trades=st.num_trades + len(exits),
+                      last_ts_ns=int(data.ts[-1].astype(np.int64)) if n else st.last_ts_ns)
+    if tail[0] == 'FLAT':
+        k = tail[1]
+        end.entry_hits = min(_trailing(in_band, e_carry if k < 0 else 0), n - k) if n else st.entry_hits
+    else:
+        _, t_open, m, m_tp, m_sl = tail
+        e = entries[-1]
+        end.mode, end.opened_ts = 'OPEN', t_open
+        end.entry_spread = float(s[e]) if e >= 0 else st.entry_spread
+        end.hold_ok = m < n or (e < 0 and st.hold_ok)
+        if end.hold_ok:
+            carried = e < 0 and st.hold_ok
+            end.tp_hits = min(_trailing(tp_mask, tp_carry if carried else 0), n - m_tp)
+            end.sl_hits = min(_trailing(sl_mask, sl_carry if carried else 0), n - m_sl)
+    return np.asarray(entries, dtype=np.int64), np.asarray(exits, dtype=np.int64), end
+
+
+@dataclass
+class BacktestResult:
+    entry_idx: np.ndarray    # 前回から持ち越したポジションは -1
+    exit_idx: np.ndarray
+    entry_spread: np.ndarray
+    exit_spread: np.ndarray
+    raw: np.ndarray          # 決済ごとのスプレッド差
+    pnl_cum: np.ndarray      # 決済ごとの累積 PnL
+    equity: np.ndarray       # 行ごとの累積 PnL（決済行で更新されるステップ関数）
+    state: RunnerState       # 終了時の状態（次回の run_backtest に渡せる）
+
+    @property
+    def summary(self) -> Dict[str, Any]:
+        return {'pnl': self.state.pnl, 'num_trades': self.state.num_trades}
+
+
+def run_backtest(data: SpreadData, cfg: Config, state: RunnerState | None = None) -> BacktestResult:
+    s = data.spread
+    st = state or RunnerState()
+    entry_idx, exit_idx, end = scan_trades(data, cfg, st)
+    entry_spread = np.where(entry_idx >= 0, s[np.maximum(entry_idx, 0)], st.entry_spread) if len(s) else s[:0]
+    exit_spread = s[exit_idx]
+    raw = exit_spread - entry_spread[:len(exit_idx)]
+    cost = 2.0 * cfg.taker_fee * 1.0 + cfg.slippage_usd
+    # 前回までの PnL から逐次に足す（通しで流した場合と同じ丸めになる）
+    pnl_cum = np.cumsum(np.concatenate(([st.pnl], raw - cost)))[1:]
+    end.pnl = float(pnl_cum[-1]) if len(pnl_cum) else st.pnl
+    # equity: 決済行ごとに値が切り替わるステップ関数
+    bounds = np.concatenate(([0], exit_idx, [len(s)]))
+    equity = np.repeat(np.concatenate(([st.pnl], pnl_cum)), np.diff(bounds))
+    return BacktestResult(entry_idx, exit_idx, entry_spread, exit_spread, raw, pnl_cum, equity, end)
+
+
+_RESULT_ARRAYS = ('entry_idx', 'exit_idx', 'entry_spread', 'exit_spread', 'raw', 'pnl_cum')
+
+
+def backtest_key(data: SpreadData, cfg: Config, state: RunnerState | None = None) -> str:
+    """ResultStore のキー（入力配列の中身 + Config + 開始状態 + このモジュールのソース）。"""
+    params = {'config': asdict(cfg), 'state': asdict(state) if state is not None else None}
+    return result_key(data_fingerprint(data.ts, data.spread), params, code_version(__file__))
+
+
+def cached_backtest(data: SpreadData, cfg: Config, state: RunnerState | None = None,
+                    store: ResultStore | None = None) -> Tuple[BacktestResult, str]:
+    """run_backtest の結果を ResultStore から引く（無ければ計算して保存）。(結果, キー) を返す。
+
+    equity は保存せず、決済行と累積 PnL から組み立て直す（保存するのはトレード数に比例する配列だけ）。
+    """
+    store = store or default_store()
+    key = backtest_key(data, cfg, state)
+    hit = store.get(key)
+    if hit is not None:
+        a, meta = hit.arrays, hit.meta
+        bounds = np.concatenate(([0], a['exit_idx'], [meta['rows']]))
+        equity = np.repeat(np.concatenate(([meta['pnl0']], a['pnl_cum'])), np.diff(bounds))
+        return BacktestResult(*(a[n] for n in _RESULT_ARRAYS), equity, RunnerState(**meta['state'])), key
+    result = run_backtest(data, cfg, state)
+    store.put(key, {n: getattr(result, n) for n in _RESULT_ARRAYS},
+              {'rows': len(data), 'pnl0': state.pnl if state is not None else 0.0,
+               'state': asdict(result.state), 'summary': result.summary})
+    return result, key
+
+
+_PREFIX_TAIL = 256   # prefix_hash に含める末尾の行数
+
+
+def prefix_hash(t: CachedTable, rows: int) -> str:
+    """列キャッシュの先頭 rows 行の指紋（行数 + 末尾 _PREFIX_TAIL 行の timestamp / bid / ask）。"""
+    lo = max(0, rows - _PREFIX_TAIL)
+    h = hashlib.sha1(str(rows).encode())
+    for name in (TIME_COLUMN, 'swap_fgrd_bid', 'swap_bybit_ask'):
+        h.update(np.ascontiguousarray(t[name][lo:rows]).tobytes())
+    return h.hexdigest()
+
+
+def state_key(csv_path: Path, cfg: Config) -> str:
+    payload = json.dumps({'source': str(Path(csv_path).resolve()), 'config': asdict(cfg)}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def run_incremental(csv_path: Path, cfg: Config, checkpoint: Path) -> Tuple[SpreadData, BacktestResult]:
+    """前回のチェックポイントの続きから、追記された行だけを処理する。
+
+    続きは処理済みの行数から読む（最後の行と同じ時刻の行が追記されても落とさない）。チェックポイントが無い・
+    入力や Config が変わった・処理済み範囲の指紋（行数と末尾の行の中身）が合わない場合は先頭から流す。
+    結果（トレード, 累積 PnL, 終了時の状態）は全件を通しで run_backtest した場合と一致する。
+    返す data / result は今回処理した分だけ。
+    """
+    key = state_key(csv_path, cfg)
+    t = load_table(csv_path)
+    state = RunnerState.load(checkpoint)
+    if (state is None or state.key != key or state.source_rows > len(t)
+            or state.prefix_hash != prefix_hash(t, state.source_rows)):
+        state = RunnerState(key=key)
+    data = table_arrays(t, state.source_rows)
+    result = run_backtest(data, cfg, state)
+    result.state.source_rows, result.state.prefix_hash = len(t), prefix_hash(t, len(t))
+    result.state.save(checkpoint)
+    return data, result
+
+
+def _ts_str(ts: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(ts, unit='us', timezone='UTC')
+
+
+def trades_frame(data: SpreadData, result: BacktestResult) -> pd.DataFrame:
+    """エントリー/決済を1行ずつ並べたトレード表（trades.csv と同じ列）。"""
+    held = result.entry_idx >= 0   # 持ち越しポジションのエントリーは前回の出力に含まれている
+    ent = pd.DataFrame({'i': result.entry_idx[held], 'type': 'entry', 'spread': result.entry_spread[held]})
+    ext = pd.DataFrame({'i': result.exit_idx, 'type': 'exit', 'spread': result.exit_spread,
+                        'raw': result.raw, 'pnl': result.pnl_cum, 'pnl_cum': result.pnl_cum})
+    df = pd.concat([ent, ext], ignore_index=True).sort_values(['i', 'type'], kind='stable', ignore_index=True)
+    df['side'] = 'long_spread'
+    df['ts'] = _ts_str(data.ts[df['i'].to_numpy()])
+    return df[sorted(df.columns)]
+
+
+def write_outputs(out_dir: Path, data: SpreadData, result: BacktestResult, key: str | None = None) -> None:
+    """trades/summary/equity を書き出す。key（cached_backtest のキー）が前回と同じなら何もしない。"""
+    marker = out_dir / '.result_key'
+    if key is not None and marker.exists() and marker.read_text() == key:
+        return
     out_dir.mkdir(parents=True, exist_ok=True)
-    with open(out_dir / 'trades.csv', 'w', newline='') as f:
-        w = csv.DictWriter(f, fieldnames=sorted({k for t in result['trades'] for k in t.keys()}))
-        w.writeheader()
-        for t in result['trades']:
-            w.writerow(t)
+    marker.unlink(missing_ok=True)
+    trades_frame(data, result).to_csv(out_dir / 'trades.csv', index=False)
     with open(out_dir / 'summary.csv', 'w', newline='') as f:
         w = csv.DictWriter(f, fieldnames=['pnl','num_trades'])
         w.writeheader()
-        w.writerow(result['summary'])
-    with open(out_dir / 'equity.csv', 'w', newline='') as f:
-        w = csv.DictWriter(f, fieldnames=['ts','equity'])
-        w.writeheader()
-        for e in result['equity']:
-            w.writerow(e)
+        w.writerow(result.summary)
+    pd.DataFrame({'ts': _ts_str(data.ts), 'equity': result.equity}).to_csv(out_dir / 'equity.csv', index=False)
+    if key is not None:
+        marker.write_text(key)
 
-def plot_spread_with_trades_and_equity(rows: List[Dict[str, Any]], result: Dict[str, Any], out_dir: Path) -> None:
-    out_dir.mkdir(parents=True, exist_ok=True)
-    x = list(range(len(rows)))
-    y = [r['spread'] for r in rows]
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 7), sharex=True, gridspec_kw={'height_ratios':[3,1]})
-    ax1.plot(x, y, label='spread (FGRD bid - Bybit ask)')
-    ax1.axhline(0, color='gray', ls=':')
-    entries = [t for t in result['trades'] if t['type']=='entry']
-    exits   = [t for t in result['trades'] if t['type']=='exit']
-    ax1.scatter([t['i'] for t in entries], [t['spread'] for t in entries], color='green', s=30, label='entry')
-    ax1.scatter([t['i'] for t in exits],   [t['spread'] for t in exits],   color='red',   s=30, label='exit')
-    ax1.legend()
-    # equity
-    ex = list(range(len(result['equity'])))
-    ey = [e['equity'] for e in result['equity']]
-    ax2.plot(ex, ey, color='black', label='equity (cum PnL)')
-    ax2.legend()
-    fig.tight_layout()
-    fig.savefig(out_dir / 'spread_trades_equity.png', dpi=150)
+
+def plot_spread_with_trades_and_equity(data: SpreadData, result: BacktestResult, out_dir: Path) -> None:
+    # 系列は図の幅まで間引いて描く（トレードの点はすべて描く）
+    x = np.arange(len(data))
+    held = result.entry_idx >= 0
+    top = (Panel(legend='best').line(x, data.spread, 'spread (FGRD bid - Bybit ask)').hline(0, color='gray', ls=':')
+           .scatter(result.entry_idx[held], result.entry_spread[held], 'entry', color='green', s=30)
+           .scatter(result.exit_idx, result.exit_spread, 'exit', color='red', s=30))
+    equity = Panel(legend='best').line(x, result.equity, 'equity (cum PnL)', color='black')
+    render(Figure(out_dir / 'spread_trades_equity.png', [top, equity], size=(14, 7), height_ratios=[3, 1]))
@@ -0,0 +1,261 @@
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, replace
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+import argparse
+import csv
+import itertools
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from storage.results import ResultStore, code_version, data_fingerprint, default_store, result_key
+
+from . import runner
+from .runner import Config, SpreadData, entry_candidates, exit_candidates, jump_trades, load_arrays
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet 出力は任意
+    pa = None
+    pq = None
+
+ArraySpec = Tuple[str, Tuple[int, ...], str]   # (shm name, shape, dtype)
+
+LEADERBOARD_FIELDS = ['pnl', 'num_trades', 'win_rate', 'avg_pnl', 'max_drawdown']
+SORT_KEYS = ['pnl', 'win_rate', 'avg_pnl']
+
+
+class SharedSeries:
+    """SpreadData を共有メモリに1回だけ載せ、ワーカーからはコピーなしで参照させる。"""
+
+    def __init__(self, data: SpreadData) -> None:
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self.specs: Dict[str, ArraySpec] = {}
+        for name, arr in (('tsec', data.seconds()), ('spread', data.spread)):
+            shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+            self._blocks.append(shm)
+            self.specs[name] = (shm.name, arr.shape, arr.dtype.str)
+
+    def close(self) -> None:
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks.clear()
+
+    def __enter__(self) -> 'SharedSeries':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+# --- ワーカー側 ---
+_W: Dict[str, Any] = {}
+
+
+def _attach(specs: Dict[str, ArraySpec]) -> None:
+    blocks = {}
+    arrays = {}
+    for name, (shm_name, shape, dtype) in specs.items():
+        # プールのワーカーは親と同じ resource_tracker を共有するので、unlink は親の close() だけが行う
+        shm = shared_memory.SharedMemory(name=shm_name)
+        blocks[name] = shm
+        arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        arr.flags.writeable = False
+        arrays[name] = arr
+    _W.update(blocks=blocks, spread=arrays['spread'], tsec=arrays['tsec'], cache={})
+
+
+def _candidates(cache: Dict[Any, Any], key: Any, fn: Any, *args: Any) -> Any:
+    # 同じ閾値の候補行はワーカー内で使い回す（閾値ごとに O(n) の走査は1回だけ）
+    c = cache.get(key)
+    if c is None:
+        if len(cache) >= 128:
+            cache.pop(next(iter(cache)))
+        c = cache[key] = fn(*args)
+    return c
+
+
+def trade_pnls(tsec: np.ndarray, spread: np.ndarray, cfg: Config,
+               cache: Dict | None = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(エントリー行, 決済行, 決済ごとの PnL)。未決済のポジションは含めない。cache を渡すと同じ閾値の候補行を使い回す。"""
+    cache = {} if cache is None else cache
+    ec = _candidates(cache, ('entry', cfg.enter_band, cfg.persistence_n), entry_candidates,
+                     spread, cfg.enter_band, cfg.persistence_n)
+    tp, sl = _candidates(cache, ('exit', cfg.exit_band, cfg.tp_hits_n, cfg.stop_band, cfg.sl_hits_n),
+                         exit_candidates, spread, cfg)
+    entry_idx, exit_idx = jump_trades(tsec, ec, tp, sl, cfg)
+    entry_idx = entry_idx[:len(exit_idx)]
+    pnl = spread[exit_idx] - spread[entry_idx] - (2.0 * cfg.taker_fee * 1.0 + cfg.slippage_usd)
+    return entry_idx, exit_idx, pnl
+
+
+def evaluate(tsec: np.ndarray, spread: np.ndarray, cfg: Config, cache: Dict | None = None) -> Dict[str, float]:
+    """1つのパラメータ組のサマリ（equity 配列は作らずトレード列だけから計算する）。"""
+    *_, trade_pnl = trade_pnls(tsec, spread, cfg, cache)
+    num = len(trade_pnl)
+    if num == 0:
+        return {'pnl': 0.0, 'num_trades': 0, 'win_rate': 0.0, 'avg_pnl': 0.0, 'max_drawdown': 0.0}
+    eq = np.concatenate(([0.0], np.cumsum(trade_pnl)))
+    return {
+        'pnl': float(eq[-1]),
+        'num_trades': num,
+        'win_rate': float((trade_pnl > 0).sum() / num),
+        'avg_pnl': float(trade_pnl.mean()),
+        'max_drawdown': float((np.maximum.accumulate(eq) - eq).max()),
+    }
+
+
+def _run_batch(base: Config, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    out = []
+    for params in batch:
+        row = dict(params)
+        row.update(evaluate(_W['tsec'], _W['spread'], replace(base, **params), _W['cache']))
+        out.append(row)
+    return out
+
+
+# --- 親プロセス側 ---
+def param_grid(**axes: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Config のフィールド名 -> 候補値 の直積。"""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[n] for n in names))]
+
+
+def _batches(grid: List[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    # param_grid の直積順のまま分割する（先頭軸が同じ組が同じバッチに入り、候補行キャッシュが効く）
+    for i in range(0, len(grid), size):
+        yield grid[i:i + size]
+
+
+class LeaderboardWriter:
+    """完了した結果を到着順に追記する（.csv / .parquet）。"""
+
+    def __init__(self, path: Path, fields: List[str]) -> None:
+        self.path = Path(path)
+        self.fields = fields
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._parquet = self.path.suffix == '.parquet'
+        if self._parquet:
+            if pq is None:
+                raise RuntimeError("pyarrow is required for parquet output")
+            self._writer = None
+        else:
+            self._f = open(self.path, 'w', newline='')
+            self._csv = csv.DictWriter(self._f, fieldnames=fields)
+            self._csv.writeheader()
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        if self._parquet:
+            table = pa.Table.from_pylist(rows).select(self.fields)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(str(self.path), table.schema)
+            self._writer.write_table(table)
+        else:
+            self._csv.writerows(rows)
+            self._f.flush()
+
+    def close(self) -> None:
+        if self._parquet:
+            if self._writer is not None:
+                self._writer.close()
+        else:
+            self._f.close()
+
+
+def run_sweep(data: SpreadData, base: Config, grid: List[Dict[str, Any]], out_path: Path,
+              workers: int | None = None, batch_size: int = 8, top: int = 20,
+              store: ResultStore | None = None) -> pd.DataFrame:
+    """grid を プロセスプールで評価し、完了順に out_path へ書き出す。戻り値は PnL 順の leaderboard。
+
+    スプレッド系列は SharedMemory に1回だけ置き、各ワーカーは initializer で読み取り専用ビューを張る。
+    store を渡すと計算済みの組（同じデータ・Config・コード）はストアから読み、残りだけを評価する。
+    """
+    workers = workers or os.cpu_count() or 1
+    params = list(grid[0]) if grid else []
+    writer = LeaderboardWriter(out_path, params + LEADERBOARD_FIELDS)
+    rows: List[Dict[str, Any]] = []
+    keys: Dict[Tuple[Any, ...], str] = {}
+    if store is not None:
+        fp = data_fingerprint(data.ts, data.spread)
+        version = code_version(__file__, runner.__file__)
+        todo = []
+        for p in grid:
+            key = keys[tuple(p.values())] = result_key(fp, {'sweep': asdict(replace(base, **p))}, version)
+            hit = store.get(key)
+            if hit is None:
+                todo.append(p)
+            else:
+                rows.append({**p, **hit.meta})
+        if rows:
+            writer.write(rows)
+        grid = todo
+    try:
+        if grid:
+            with SharedSeries(data) as shared, \
+                    ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(shared.specs,)) as pool:
+                batches = _batches(grid, batch_size)
+                pending = set()
+                # 投入はワーカー数の数倍に抑え、巨大グリッドでも Future を溜め込まない
+                for batch in itertools.islice(batches, workers * 4):
+                    pending.add(pool.submit(_run_batch, base, batch))
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        res = fut.result()
+                        if store is not None:
+                            for row in res:
+                                store.put(keys[tuple(row[n] for n in params)], meta={f: row[f] for f in LEADERBOARD_FIELDS})
+                        writer.write(res)
+                        rows.extend(res)
+                        nxt = next(batches, None)
+                        if nxt is not None:
+                            pending.add(pool.submit(_run_batch, base, nxt))
+    finally:
+        writer.close()
+    board = pd.DataFrame(rows, columns=params + LEADERBOARD_FIELDS)
+    board.sort_values(SORT_KEYS, ascending=False, inplace=True, ignore_index=True)
+    board.head(top).to_csv(Path(out_path).with_name(Path(out_path).stem + '_top.csv'), index=False)
+    return board
+
+
+def _floats(text: str) -> List[float]:
+    return [float(x) for x in text.split(',') if x]
+
+
+def main(argv: Iterable[str] | None = None) -> None:
+    rules = Path(__file__).resolve().parents[1] / 'strategy_rules.json'
+    ap = argparse.ArgumentParser(description='parameter sweep for backtest.runner')
+    ap.add_argument('--csv', type=Path, required=True)
+    ap.add_argument('--out', type=Path, default=Path('backtest_out/sweep.csv'))
+    ap.add_argument('--workers', type=int, default=None)
+    ap.add_argument('--enter', type=_floats, default=[50.0, 75.0, 100.0])
+    ap.add_argument('--exit', type=_floats, default=[200.0, 300.0, 400.0])
+    ap.add_argument('--stop', type=_floats, default=[-150.0, -200.0, -300.0])
+    ap.add_argument('--min-hold', type=_floats, default=[0.0, 60.0])
+    ap.add_argument('--max-hold', type=_floats, default=[3600.0, 10800.0])
+    ap.add_argument('--fee', type=_floats, default=[0.0006])
+    ap.add_argument('--slippage', type=_floats, default=[0.5])
+    ap.add_argument('--no-store', action='store_true', help='計算済みの組もストアを使わずに再計算する')
+    args = ap.parse_args(argv)
+    base = Config.from_rules_json(rules, taker_fee=0.0006, slippage_usd=0.5, unit_btc=0.01)
+    grid = param_grid(enter_band=args.enter, exit_band=args.exit, stop_band=args.stop,
+                      min_hold_sec=args.min_hold, max_hold_sec=args.max_hold,
+                      taker_fee=args.fee, slippage_usd=args.slippage)
+    data = load_arrays(args.csv)
+    t0 = time.perf_counter()
+    board = run_sweep(data, base, grid, args.out, workers=args.workers,
+                      store=None if args.no_store else default_store())
+    print(f"{len(grid)} combos x {len(data):,} rows in {time.perf_counter() - t0:.2f}s -> {args.out}")
+    print(board.head(10).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .runner import Config, RunnerState, SpreadData, load_arrays, run_backtest
+from .sweep import _W, SharedSeries, _attach, _floats, param_grid, trade_pnls
+
+# ウォークフォワード最適化。履歴を [学習 train_sec | 検証 test_sec] の窓に切り、test_sec ずつずらしながら
+# 学習窓で選んだパラメータを直後の検証窓でだけ使う（検証窓をつないだものがアウトオブサンプルの成績）。
+#
+# 学習窓の集計は窓ごとに回し直さない:
+#   1. パラメータ組ごとに全履歴で状態機械を1回だけ回してトレード列を作る（プロセスプールで並列）
+#   2. トレード列の累積和（PnL, PnL^2, 勝ち数）を持っておき、各学習窓の成績は
+#      「窓内でエントリーして窓内で決済したトレード」の区間和を searchsorted で引く
+# なので総コストは 履歴長 × 組数 + 窓数 × 組数 × log(トレード数) で、窓の重なり（anchored なら学習窓の伸び）に
+# 比例して増えない。
+# 窓の先頭で全履歴の経路がポジションを持っていた場合の差は、窓をまたぐトレードを除くことで吸収している。
+
+OBJECTIVES = ('pnl', 'sharpe')
+
+
+@dataclass
+class Window:
+    train_lo: int
+    train_hi: int
+    test_lo: int
+    test_hi: int
+
+
+@dataclass
+class TradeTable:
+    """1 つのパラメータ組の全履歴トレード列と、その累積和。"""
+    entry_idx: np.ndarray
+    exit_idx: np.ndarray
+    cum_pnl: np.ndarray    # 長さ トレード数 + 1
+    cum_sq: np.ndarray
+    cum_win: np.ndarray
+
+    @staticmethod
+    def build(entry_idx: np.ndarray, exit_idx: np.ndarray, pnl: np.ndarray) -> 'TradeTable':
+        def cum(x: np.ndarray) -> np.ndarray:
+            return np.concatenate(([0.0], np.cumsum(x)))
+
+        return TradeTable(entry_idx, exit_idx, cum(pnl), cum(pnl * pnl), cum(pnl > 0))
+
+
+def make_windows(tsec: np.ndarray, train_sec: float, test_sec: float, anchored: bool = False) -> List[Window]:
+    """学習 train_sec + 検証 test_sec の窓を test_sec ずつずらして並べる（検証窓は重ならない）。
+
+    anchored=True なら学習窓の先頭を履歴の先頭に固定する（学習窓が伸びていく）。
+    """
+    out: List[Window] = []
+    if len(tsec) == 0:
+        return out
+    start = float(tsec[0])
+    while start + train_sec <= tsec[-1]:
+        lo, mid, hi = np.searchsorted(tsec, [start, start + train_sec, start + train_sec + test_sec])
+        if hi > mid and mid > lo:
+            out.append(Window(0 if anchored else int(lo), int(mid), int(mid), int(hi)))
+        start += test_sec
+    return out
+
+
+def window_stats(tables: List[TradeTable], lo: np.ndarray, hi: np.ndarray) -> Dict[str, np.ndarray]:
+    """各区間 [lo, hi) 内で完結したトレードの集計。戻り値は (区間数, 組数) の配列。"""
+    shape = (len(lo), len(tables))
+    pnl, sq, num, wins = (np.zeros(shape) for _ in range(4))
+    for c, t in enumerate(tables):
+        a = np.searchsorted(t.entry_idx, lo)
+        b = np.maximum(np.searchsorted(t.exit_idx, hi), a)
+        pnl[:, c] = t.cum_pnl[b] - t.cum_pnl[a]
+        sq[:, c] = t.cum_sq[b] - t.cum_sq[a]
+        wins[:, c] = t.cum_win[b] - t.cum_win[a]
+        num[:, c] = b - a
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(num > 0, pnl / num, 0.0)
+        std = np.sqrt(np.maximum(np.where(num > 0, sq / num, 0.0) - mean * mean, 0.0))
+        sharpe = np.where(std > 0, mean / std * np.sqrt(num), 0.0)
+        win_rate = np.where(num > 0, wins / num, 0.0)
+    return {'pnl': pnl, 'num_trades': num, 'win_rate': win_rate, 'sharpe': sharpe}
+
+
+def _trades_batch(base: Config, batch: List[Dict[str, Any]]) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    return [trade_pnls(_W['tsec'], _W['spread'], replace(base, **p), _W['cache']) for p in batch]
+
+
+def full_history_trades(data: SpreadData, base: Config, grid: List[Dict[str, Any]], workers: int | None = None,
+                        batch_size: int = 8) -> List[TradeTable]:
+    """grid の各組を全履歴で1回ずつ回したトレード列（順序は grid と同じ）。"""
+    workers = workers or os.cpu_count() or 1
+    batches = [grid[i:i + batch_size] for i in range(0, len(grid), batch_size)]
+    tables: List[TradeTable] = []
+    with SharedSeries(data) as shared, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(shared.specs,)) as pool:
+        for res in pool.map(_trades_batch, [base] * len(batches), batches):
+            tables.extend(TradeTable.build(*t) for t in res)
+    return tables
+
+
+def _ts_str(data: SpreadData, i: int) -> str:
+    return str(np.datetime_as_string(data.ts[min(i, len(data) - 1)], unit='s', timezone='UTC'))
+
+
+def walk_forward(data: SpreadData, base: Config, grid: List[Dict[str, Any]], train_sec: float, test_sec: float,
+                 objective: str = 'pnl', min_trades: int = 5, workers: int | None = None,
+                 anchored: bool = False) -> pd.DataFrame:
+    """窓ごとの選択パラメータと学習/検証の成績。oos_pnl_cum が検証窓をつないだ累積 PnL。
+
+    検証窓は runner.run_backtest を RunnerState で続けて回す。前の窓と同じパラメータなら状態ごと引き継ぎ、
+    変わった場合はフラットから始める（未決済のポジションは持ち越さず、その損益は計上しない）。
+    min_trades を満たす組が無い学習窓では前の窓のパラメータを使い続ける。
+    """
+    if objective not in OBJECTIVES:
+        raise RuntimeError(f"unknown objective: {objective}")
+    windows = make_windows(data.seconds(), train_sec, test_sec, anchored)
+    params = list(grid[0]) if grid else []
+    if not windows or not grid:
+        return pd.DataFrame(columns=['train_start', 'test_start', 'test_end'] + params)
+    tables = full_history_trades(data, base, grid, workers)
+    train = window_stats(tables, np.array([w.train_lo for w in windows]), np.array([w.train_hi for w in windows]))
+    score = np.where(train['num_trades'] >= min_trades, train[objective], -np.inf)
+    rows = []
+    state = RunnerState()
+    prev = None
+    for k, w in enumerate(windows):
+        c = int(np.argmax(score[k]))
+        if not np.isfinite(score[k, c]) and prev is not None:
+            c = prev   # min_trades を満たす組が無い窓は前の窓のパラメータを使い続ける
+        if prev != c:
+            state = RunnerState(pnl=state.pnl, num_trades=state.num_trades)
+        before = state
+        part = SpreadData(data.ts[w.test_lo:w.test_hi], data.spread[w.test_lo:w.test_hi])
+        res = run_backtest(part, replace(base, **grid[c]), state)
+        rows.append({'train_start': _ts_str(data, w.train_lo), 'test_start': _ts_str(data, w.test_lo),
+                     'test_end': _ts_str(data, w.test_hi - 1), **grid[c],
+                     'train_pnl': float(train['pnl'][k, c]), 'train_trades': int(train['num_trades'][k, c]),
+                     'train_score': float(score[k, c]) if np.isfinite(score[k, c]) else np.nan,
+                     'test_pnl': res.state.pnl - before.pnl, 'test_trades': res.state.num_trades - before.num_trades,
+                     'oos_pnl_cum': res.state.pnl})
+        state, prev = res.state, c
+    return pd.DataFrame(rows)
+
+
+def main(argv: Iterable[str] | None = None) -> None:
+    rules = Path(__file__).resolve().parents[1] / 'strategy_rules.json'
+    ap = argparse.ArgumentParser(description='walk-forward optimization for backtest.runner')
+    ap.add_argument('--csv', type=Path, required=True)
+    ap.add_argument('--out', type=Path, default=Path('backtest_out/walkforward.csv'))
+    ap.add_argument('--train-days', type=float, default=7.0)
+    ap.add_argument('--test-days', type=float, default=1.0)
+    ap.add_argument('--anchored', action='store_true', help='学習窓の先頭を履歴の先頭に固定する')
+    ap.add_argument('--objective', choices=OBJECTIVES, default='pnl')
+    ap.add_argument('--min-trades', type=int, default=5)
+    ap.add_argument('--workers', type=int, default=None)
+    ap.add_argument('--enter', type=_floats, default=[50.0, 75.0, 100.0])
+    ap.add_argument('--exit', type=_floats, default=[200.0, 300.0, 400.0])
+    ap.add_argument('--stop', type=_floats, default=[-150.0, -200.0, -300.0])
+    ap.add_argument('--min-hold', type=_floats, default=[0.0, 60.0])
+    ap.add_argument('--max-hold', type=_floats, default=[3600.0, 10800.0])
+    args = ap.parse_args(argv)
+    base = Config.from_rules_json(rules, taker_fee=0.0006, slippage_usd=0.5, unit_btc=0.01)
+    grid = param_grid(enter_band=args.enter, exit_band=args.exit, stop_band=args.stop,
+                      min_hold_sec=args.min_hold, max_hold_sec=args.max_hold)
+    data = load_arrays(args.csv)
+    t0 = time.perf_counter()
+    wf = walk_forward(data, base, grid, args.train_days * 86400.0, args.test_days * 86400.0,
+                      args.objective, args.min_trades, args.workers, args.anchored)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    wf.to_csv(args.out, index=False)
+    print(f"{len(wf)} windows x {len(grid)} combos x {len(data):,} rows in {time.perf_counter() - t0:.2f}s -> {args.out}")
+    if len(wf):
+        print(wf.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
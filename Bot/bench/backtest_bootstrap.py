@@ -0,0 +1,53 @@
+"""backtest.robust のブートストラップ所要時間（1か月分の 10 秒足 = 259,200 行）。
+
+    cd Bot && python -m bench.backtest_bootstrap --resamples 2000 --workers 4
+
+series（系列を復元抽出して状態機械を回し直す）と trades（決済 PnL 列の復元抽出）を計測し、
+series はワーカー数を変えても同じ標本になること、元経路の指標が sweep.evaluate と一致することも確かめる。
+"""
+from __future__ import annotations
+import argparse
+import os
+import time
+
+import numpy as np
+
+from backtest.robust import bootstrap_series, bootstrap_trades, confidence_intervals, point_estimate
+from backtest.runner import Config
+from backtest.sweep import evaluate, trade_pnls
+from bench.backtest_runner import synthetic
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=259_200)
+    ap.add_argument('--resamples', type=int, default=2000)
+    ap.add_argument('--trade-resamples', type=int, default=100_000)
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+    data = synthetic(args.rows)
+    cfg = Config(enter_band=5.0, exit_band=60.0, stop_band=-60.0, persistence_n=2, max_hold_sec=3600.0,
+                 min_hold_sec=60.0, taker_fee=0.0, slippage_usd=0.5, unit_btc=0.01)
+    point = point_estimate(data, cfg)
+    ref = evaluate(data.seconds(), data.spread, cfg)
+    assert np.isclose(point['pnl'], ref['pnl']) and np.isclose(point['max_drawdown'], ref['max_drawdown'])
+
+    small = bootstrap_series(data, cfg, 64, workers=1, seed=1)
+    assert small.equals(bootstrap_series(data, cfg, 64, workers=min(2, args.workers), seed=1)), 'worker-dependent samples'
+
+    t0 = time.perf_counter()
+    samples = bootstrap_series(data, cfg, args.resamples, workers=args.workers, seed=0)
+    wall = time.perf_counter() - t0
+    print(f"series: {args.resamples} resamples x {len(data):,} rows, {args.workers} workers  {wall:6.2f}s "
+          f"({args.resamples / wall:,.0f} paths/s)")
+    print(confidence_intervals(samples, point).to_string(index=False))
+
+    *_, pnl = trade_pnls(data.seconds(), data.spread, cfg)
+    t0 = time.perf_counter()
+    bootstrap_trades(pnl, len(data) - 1, args.trade_resamples, seed=0)
+    wall = time.perf_counter() - t0
+    print(f"trades: {args.trade_resamples:,} resamples x {len(pnl)} trades  {wall:6.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""backtest.runner の再開（RunnerState からの続き）が通しの実行と一致するかの確認と、追記分だけ処理する時間の計測。
+
+    cd Bot && python -m bench.backtest_resume --rows 5000000 --configs 40
+
+ランダムな Config ごとにデータをランダムな位置（1 行や 0 行の断片も含む）で切り、チェックポイントを
+JSON で保存/復元しながら順に流して、トレード・累積 PnL・equity・終了状態が通しの実行と一致することを確かめる。
+"""
+from __future__ import annotations
+import argparse
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+
+from backtest.runner import Config, RunnerState, SpreadData, run_backtest
+from bench.backtest_runner import synthetic
+
+
+def random_config(rng: np.random.Generator) -> Config:
+    return Config(enter_band=float(rng.choice([2.0, 5.0, 10.0])), exit_band=float(rng.choice([20.0, 40.0, 60.0])),
+                  stop_band=float(rng.choice([-20.0, -40.0, -60.0])), persistence_n=int(rng.integers(1, 5)),
+                  max_hold_sec=float(rng.choice([120.0, 600.0, 3600.0])), min_hold_sec=float(rng.choice([0.0, 30.0, 60.0, 300.0])),
+                  taker_fee=0.0, slippage_usd=0.5, unit_btc=0.01,
+                  tp_hits_n=int(rng.integers(1, 5)), sl_hits_n=int(rng.integers(1, 5)))
+
+
+def chained(data: SpreadData, cfg: Config, cuts: np.ndarray, checkpoint: Path) -> dict:
+    entries, exits, pnl_cum, equity = [], [], [], []
+    checkpoint.unlink(missing_ok=True)
+    for lo, hi in zip(cuts[:-1], cuts[1:]):
+        part = SpreadData(data.ts[lo:hi], data.spread[lo:hi])
+        res = run_backtest(part, cfg, RunnerState.load(checkpoint))
+        res.state.save(checkpoint)
+        entries.append(np.where(res.entry_idx >= 0, res.entry_idx + lo, -1))
+        exits.append(res.exit_idx + lo)
+        pnl_cum.append(res.pnl_cum)
+        equity.append(res.equity)
+    e = np.concatenate(entries)
+    return {'entry': e[e >= 0], 'exit': np.concatenate(exits), 'pnl_cum': np.concatenate(pnl_cum),
+            'equity': np.concatenate(equity), 'state': RunnerState.load(checkpoint)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=5_000_000)
+    ap.add_argument('--verify-rows', type=int, default=50_000)
+    ap.add_argument('--configs', type=int, default=40)
+    ap.add_argument('--append', type=int, default=8640)   # 1日分（10 秒足）
+    args = ap.parse_args()
+    rng = np.random.default_rng(1)
+    small = synthetic(args.verify_rows, seed=3)
+    n = len(small)
+    with tempfile.TemporaryDirectory() as tmp:
+        ckpt = Path(tmp) / 'state.json'
+        for _ in range(args.configs):
+            cfg = random_config(rng)
+            full = run_backtest(small, cfg)
+            cuts = np.unique(np.concatenate(([0, n], rng.integers(0, n, 30), rng.integers(0, n, 5) + 1)))
+            cuts = np.sort(np.concatenate((cuts, cuts[1:6])))   # 0 行の断片も混ぜる
+            got = chained(small, cfg, cuts, ckpt)
+            want_state = asdict(full.state)
+            assert np.array_equal(got['entry'], full.entry_idx[full.entry_idx >= 0]), ('entry mismatch', cfg)
+            assert np.array_equal(got['exit'], full.exit_idx), ('exit mismatch', cfg)
+            assert np.array_equal(got['pnl_cum'], full.pnl_cum), ('pnl mismatch', cfg)
+            assert np.array_equal(got['equity'], full.equity), ('equity mismatch', cfg)
+            assert asdict(got['state']) == want_state, ('state mismatch', cfg, asdict(got['state']), want_state)
+        print(f"verify: {args.configs} configs x {len(cuts) - 1} resumes identical to a full run on {n:,} rows")
+
+        cfg = Config(enter_band=5.0, exit_band=60.0, stop_band=-60.0, persistence_n=2, max_hold_sec=3600.0,
+                     min_hold_sec=60.0, taker_fee=0.0, slippage_usd=0.5, unit_btc=0.01)
+        data = synthetic(args.rows + args.append)
+        head = SpreadData(data.ts[:args.rows], data.spread[:args.rows])
+        tail = SpreadData(data.ts[args.rows:], data.spread[args.rows:])
+        state = run_backtest(head, cfg).state
+        t0 = time.perf_counter()
+        full = run_backtest(data, cfg)
+        t_full = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        res = run_backtest(tail, cfg, state)
+        t_inc = time.perf_counter() - t0
+        assert res.state.pnl == full.state.pnl and res.state.num_trades == full.state.num_trades
+        print(f"full rerun {len(data):,} rows {t_full * 1e3:8.1f} ms | resume +{args.append:,} rows "
+              f"{t_inc * 1e3:6.2f} ms  (x{t_full / t_inc:,.0f})")
+
+
+if __name__ == '__main__':
+    main()
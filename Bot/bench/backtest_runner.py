@@ -0,0 +1,54 @@
+"""backtest.runner.run_backtest のスループット（rows/sec）計測と、Engine リプレイとの一致確認。
+
+    cd Bot && python -m bench.backtest_runner --rows 20000000 --verify-rows 200000
+
+verify は backtest.replay（ライブの Engine + SpreadSignals を SimClock で回す）を基準にする。
+データは平均回帰するランダムウォークのスプレッド（10 秒足相当、時々欠測による時刻の飛びを入れる）。
+"""
+from __future__ import annotations
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from backtest.replay import replay
+from backtest.runner import Config, SpreadData, run_backtest
+from bench.synthetic import spread_arrays
+
+
+def synthetic(rows: int, seed: int = 7) -> SpreadData:
+    # AR(1) スプレッド + 0.1% の行で 1 分の欠測（bench.synthetic）
+    return SpreadData(*spread_arrays(rows, seed))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=20_000_000)
+    ap.add_argument('--verify-rows', type=int, default=200_000)
+    args = ap.parse_args()
+    cfg = Config(enter_band=5.0, exit_band=60.0, stop_band=-60.0, persistence_n=2, max_hold_sec=3600.0,
+                 min_hold_sec=60.0, taker_fee=0.0, slippage_usd=0.5, unit_btc=0.01)
+
+    config = yaml.safe_load((Path(__file__).resolve().parents[1] / 'config.yaml').read_text())
+    small = synthetic(args.verify_rows)
+    ref = replay(config, small, cfg)
+    res = run_backtest(small, cfg)
+    tsec = small.seconds()
+    assert np.array_equal(tsec[res.entry_idx[:len(res.exit_idx)]], ref.trades['entry_ts'].to_numpy()), 'entry mismatch'
+    assert np.array_equal(tsec[res.exit_idx], ref.trades['exit_ts'].to_numpy()), 'exit mismatch'
+    assert np.array_equal(res.pnl_cum, ref.trades['pnl_cum'].to_numpy()), 'pnl mismatch'
+    print(f"verify: {len(res.exit_idx)} trades identical to Engine replay on {args.verify_rows:,} rows; "
+          f"replay {ref.summary['ticks_per_sec']:,.0f} ticks/s")
+
+    data = synthetic(args.rows)
+    t0 = time.perf_counter()
+    res = run_backtest(data, cfg)
+    dt = time.perf_counter() - t0
+    print(f"array : {args.rows:,} rows in {dt:.2f}s -> {args.rows / dt:,.0f} rows/s "
+          f"({res.summary['num_trades']} trades, pnl {res.summary['pnl']:.1f})")
+
+
+if __name__ == '__main__':
+    main()
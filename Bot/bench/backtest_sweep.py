@@ -0,0 +1,41 @@
+"""backtest.sweep のワーカー数に対するスケーリング計測。
+
+    cd Bot && python -m bench.backtest_sweep --rows 5000000 --workers 1,2,4,8
+
+同じグリッドをワーカー数だけ変えて実行し、wall time と 1 ワーカー比の速度を出す。
+"""
+from __future__ import annotations
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from backtest.runner import Config
+from backtest.sweep import param_grid, run_sweep
+from bench.backtest_runner import synthetic
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=5_000_000)
+    ap.add_argument('--workers', default=','.join(str(w) for w in (1, 2, 4, 8) if w <= (os.cpu_count() or 1)))
+    args = ap.parse_args()
+    data = synthetic(args.rows)
+    base = Config(enter_band=5.0, exit_band=60.0, stop_band=-60.0, persistence_n=2, max_hold_sec=3600.0,
+                  min_hold_sec=60.0, taker_fee=0.0, slippage_usd=0.5, unit_btc=0.01)
+    grid = param_grid(enter_band=[2.0, 3.0, 5.0, 8.0], exit_band=[30.0, 40.0, 60.0, 80.0],
+                      stop_band=[-30.0, -40.0, -60.0, -80.0], min_hold_sec=[0.0, 60.0],
+                      max_hold_sec=[600.0, 3600.0])
+    base_wall = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for w in (int(x) for x in args.workers.split(',')):
+            t0 = time.perf_counter()
+            run_sweep(data, base, grid, Path(tmp) / f'sweep_{w}.csv', workers=w)
+            wall = time.perf_counter() - t0
+            base_wall = base_wall or wall
+            print(f"workers={w:2d}  {len(grid)} combos x {args.rows:,} rows  {wall:6.2f}s  x{base_wall / wall:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""storage.column_cache の効果計測: CSV 毎回パース vs 初回変換 vs memmap 再読込 vs 追記分のみ変換。
+
+    cd Bot && python -m bench.column_cache --rows 2000000
+
+compare_10s.csv と同じ 13 列の合成 CSV を一時ディレクトリに作って計測する。
+"""
+from __future__ import annotations
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from storage.column_cache import ColumnCache
+
+_COLUMNS = ['spot_fgrd_bid', 'spot_fgrd_ask', 'spot_fgrd_last', 'spot_bybit_bid', 'spot_bybit_ask', 'spot_bybit_last',
+            'swap_fgrd_bid', 'swap_fgrd_ask', 'swap_fgrd_last', 'swap_bybit_bid', 'swap_bybit_ask', 'swap_bybit_last']
+
+
+def write_csv(path: Path, rows: int, start: int = 0, header: bool = True) -> None:
+    rng = np.random.default_rng(start)
+    ts = pd.date_range('2025-08-01', periods=start + rows, freq='10s', tz='UTC')[start:]
+    mid = 60000.0 + np.cumsum(rng.normal(0.0, 5.0, rows))
+    df = pd.DataFrame({'timestamp': ts.strftime('%Y-%m-%dT%H:%M:%S.%f+00:00')})
+    for i, c in enumerate(_COLUMNS):
+        df[c] = np.round(mid + (i % 3 - 1) * 0.5 + rng.normal(0.0, 1.0, rows), 1)
+    df.to_csv(path, mode='w' if header else 'a', header=header, index=False)
+
+
+def timed(label: str, fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    dt = time.perf_counter() - t0
+    print(f"{label:<28s} {dt:8.3f}s")
+    return dt
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=2_000_000)
+    ap.add_argument('--append', type=int, default=8640)   # 1日分（10 秒足）
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / 'compare_10s.csv'
+        write_csv(src, args.rows)
+        cache = ColumnCache(Path(tmp) / 'cache')
+        parse = timed('pd.read_csv (every run)', lambda: pd.read_csv(src))
+        timed('cache build (first run)', lambda: cache.load(src))
+        hit = timed('cache hit (memmap)', lambda: cache.load(src)['swap_fgrd_bid'].sum())
+        write_csv(src, args.append, start=args.rows, header=False)
+        timed(f'cache extend (+{args.append} rows)', lambda: cache.load(src))
+        print(f"rows={args.rows:,}  cached reload is x{parse / hit:,.0f} faster than re-parsing")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""モック取引所に対するクライアント/Executor のスループット・レイテンシ計測（オフライン）。
+
+    cd Bot && python -m bench.exchange_latency --pairs 200 --latency-ms 5
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import time
+
+from core.executor import BybitLeg, Executor, FGRDLeg, Leg
+from core.order_tracker import OrderTracker
+from exchanges.bybit import AsyncBybitClient, BybitConfig
+from exchanges.bybit_ws import BybitPrivateStream
+from exchanges.fgrd import AsyncFGRDClient, FGRDConfig
+from mock.server import MockExchangeServer, VenueProfile
+from utils.latency import LatencyHistogram
+
+
+async def bench_client_throughput(fgrd: AsyncFGRDClient, n: int, concurrency: int) -> dict:
+    h = LatencyHistogram()
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            await fgrd.get_current_entrust(page=1)
+            h.record(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    wall = time.perf_counter() - t0
+    return {'requests': n, 'req_per_sec': n / wall, **h.summary()}
+
+
+async def bench_executor(ex: Executor, pairs: int, mid: float) -> dict:
+    statuses: dict = {}
+    t0 = time.perf_counter()
+    for i in range(pairs):
+        side = 'buy' if i % 2 == 0 else 'sell'
+        other = 'sell' if side == 'buy' else 'buy'
+        # 気配を跨ぐ指値 = 即時約定（FGRD は指値のみ）
+        px = mid + 50.0 if side == 'buy' else mid - 50.0
+        r = await ex.execute(Leg('BTC', side, 1, px), Leg('BTCUSDT', other, 0.001, None))
+        statuses[r.status] = statuses.get(r.status, 0) + 1
+    wall = time.perf_counter() - t0
+    return {'pairs': pairs, 'pairs_per_sec': pairs / wall, 'statuses': statuses, 'latency': ex.latency_report()}
+
+
+async def main(args: argparse.Namespace) -> dict:
+    prof = VenueProfile(args.latency_ms, args.jitter_ms, args.error_rate)
+    async with MockExchangeServer(fgrd=prof, bybit=VenueProfile(args.latency_ms, args.jitter_ms, args.error_rate),
+                                  seed=args.seed) as srv:
+        fgrd = AsyncFGRDClient(FGRDConfig(srv.http_url, '', '', bearer_token='mock'))
+        bcfg = BybitConfig(srv.http_url, srv.bybit_key, srv.bybit_secret)
+        bybit = AsyncBybitClient(bcfg)
+        stream = BybitPrivateStream(bcfg, url=srv.ws_url)
+        ws_task = asyncio.create_task(stream.run())
+        await asyncio.wait_for(stream.connected.wait(), timeout=5.0)
+        ex = Executor({'execution': {'leg_timeout_sec': 1.0, 'fill_timeout_sec': 2.0}},
+                      FGRDLeg(OrderTracker(fgrd), poll_sec=0.005), BybitLeg(bybit, stream))
+        await ex.warmup()
+        out = {
+            'profile': vars(args),
+            'client': await bench_client_throughput(fgrd, args.requests, args.concurrency),
+            'executor': await bench_executor(ex, args.pairs, srv.engine.default_mid),
+        }
+        stream.stop()
+        ws_task.cancel()
+        await asyncio.gather(fgrd.aclose(), bybit.aclose(), return_exceptions=True)
+    return out
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='mock exchange latency benchmark')
+    ap.add_argument('--requests', type=int, default=1000)
+    ap.add_argument('--concurrency', type=int, default=8)
+    ap.add_argument('--pairs', type=int, default=100)
+    ap.add_argument('--latency-ms', type=float, default=5.0)
+    ap.add_argument('--jitter-ms', type=float, default=2.0)
+    ap.add_argument('--error-rate', type=float, default=0.0)
+    ap.add_argument('--seed', type=int, default=1)
+    ap.add_argument('--out', default=None, help='結果を JSON で追記するファイル')
+    res = asyncio.run(main(ap.parse_args()))
+    print(json.dumps(res, indent=2, default=str))
+    if res['profile'].get('out'):
+        with open(res['profile']['out'], 'a') as f:
+            f.write(json.dumps(res, default=str) + '\n')
@@ -0,0 +1,73 @@
+"""FGRD アカウントスナップショットのデコードコストと保持メモリの比較。
+
+    cd Bot && python -m bench.fgrd_parse --n 20000
+
+before は旧実装（json.loads で dict をそのまま保持）、after は fgrd_models の orjson デコード + slots モデル。
+サンプルは account_snapshot.csv の先頭行（旧形式の repr 列）から作る。
+"""
+from __future__ import annotations
+import argparse
+import ast
+import csv
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, List, Tuple
+
+import orjson
+
+from exchanges.fgrd_models import decode_accounts, decode_fund_account, decode_personal_assets
+
+_SAMPLE = Path(__file__).resolve().parent.parent / 'account_snapshot.csv'
+
+
+def load_sample() -> Tuple[bytes, bytes, bytes]:
+    with open(_SAMPLE, newline='') as f:
+        row = next(csv.DictReader(f))
+    acc = ast.literal_eval(row['accounts_json'])
+    fund = ast.literal_eval(row['fund_json'])
+    fund.setdefault('code', 200)
+    personal = {'code': 200, 'message': 'success', 'data': {'total_usd': '0.01', 'contract_usd': '0.00'}}
+    return orjson.dumps(acc), orjson.dumps(fund), orjson.dumps(personal)
+
+
+def legacy(raw: Tuple[bytes, bytes, bytes]) -> Any:
+    return tuple(json.loads(r.decode()) for r in raw)
+
+
+def typed(raw: Tuple[bytes, bytes, bytes]) -> Any:
+    return decode_accounts(raw[0]), decode_fund_account(raw[1]), decode_personal_assets(raw[2])
+
+
+def measure(fn: Callable[[Any], Any], raw: Tuple[bytes, bytes, bytes], n: int) -> Tuple[float, float]:
+    """(1件あたりデコード時間 us, 1件あたり保持メモリ bytes)"""
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(raw)
+    per_us = (time.perf_counter() - t0) / n * 1e6
+    keep: List[Any] = []
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for _ in range(1000):
+        keep.append(fn(raw))
+    per_bytes = (tracemalloc.get_traced_memory()[0] - base) / 1000
+    tracemalloc.stop()
+    return per_us, per_bytes
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--n', type=int, default=20000)
+    args = ap.parse_args()
+    raw = load_sample()
+    b_us, b_mem = measure(legacy, raw, args.n)
+    a_us, a_mem = measure(typed, raw, args.n)
+    print(f"payload bytes: {sum(len(r) for r in raw)}")
+    print(f"before: {b_us:7.2f} us/snapshot  {b_mem:8.0f} B retained")
+    print(f"after : {a_us:7.2f} us/snapshot  {a_mem:8.0f} B retained")
+    print(f"speedup x{b_us / a_us:.1f}, memory x{b_mem / a_mem:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""backtest.fills のスループット計測（板を歩くレッグ数/秒、指値のテープ待ちを含む）。
+
+    cd Bot && python -m bench.fill_sim --days 3 --levels 10 --legs 200000
+
+1 秒間隔の L2 スナップショットと約定テープを venue ごとに合成して計測する。
+シミュレーションのコストは注文数に比例し、スナップショット数には searchsorted（log n）でしか効かない。
+"""
+from __future__ import annotations
+import argparse
+import time
+
+import numpy as np
+
+from backtest.fills import BUY, SELL, DepthBook, FillSimulator, TradeTape, VenueLatency
+
+
+def synthetic_book(rng: np.random.Generator, n: int, levels: int, t0: int, tick: float = 0.1) -> DepthBook:
+    ts = t0 + np.arange(n, dtype=np.int64) * 1_000_000_000
+    mid = 60000.0 + np.cumsum(rng.normal(0.0, 2.0, n))
+    half = tick * (1 + rng.integers(0, 3, n))
+    steps = np.arange(levels) * tick
+    bid_px = np.round(mid - half, 1)[:, None] - steps
+    ask_px = np.round(mid + half, 1)[:, None] + steps
+    qty = lambda: rng.gamma(2.0, 0.05, (n, levels))  # noqa: E731
+    return DepthBook(ts, bid_px, qty(), ask_px, qty())
+
+
+def synthetic_tape(rng: np.random.Generator, book: DepthBook, per_sec: float) -> TradeTape:
+    m = int(len(book.ts) * per_sec)
+    ts = np.sort(rng.integers(book.ts[0], book.ts[-1], m))
+    idx = book.index_at(ts)
+    side = np.where(rng.random(m) < 0.5, BUY, SELL)
+    price = np.where(side == BUY, book.ask_px[idx, 0], book.bid_px[idx, 0])
+    return TradeTape(ts, price, rng.gamma(1.5, 0.02, m), side)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--days', type=float, default=3.0)
+    ap.add_argument('--levels', type=int, default=10)
+    ap.add_argument('--legs', type=int, default=200_000)
+    ap.add_argument('--qty', type=float, default=0.3)
+    args = ap.parse_args()
+    rng = np.random.default_rng(1)
+    n = int(args.days * 86400)
+    t0 = np.datetime64('2025-08-01', 'ns').astype(np.int64)
+    books = {v: synthetic_book(rng, n, args.levels, t0) for v in ('fgrd', 'bybit')}
+    tapes = {v: synthetic_tape(rng, b, 2.0) for v, b in books.items()}
+    sim = FillSimulator(books, {'fgrd': VenueLatency(120.0, 40.0), 'bybit': VenueLatency(15.0, 5.0)}, tapes, seed=2)
+    ts = np.sort(rng.integers(books['fgrd'].ts[0], books['fgrd'].ts[-1], args.legs))
+
+    t = time.perf_counter()
+    taker = sim.fill('bybit', ts, BUY, args.qty)
+    dt = time.perf_counter() - t
+    print(f"snapshots={n:,}/venue levels={args.levels}  taker walk: {args.legs / dt:,.0f} legs/s "
+          f"(avg fill {np.nanmean(taker.filled):.3f}/{args.qty})")
+
+    m = args.legs // 20
+    limit = books['fgrd'].bid_px[books['fgrd'].index_at(ts[:m]), 0]
+    t = time.perf_counter()
+    maker = sim.fill('fgrd', ts[:m], BUY, args.qty, limit=limit)
+    dt = time.perf_counter() - t
+    done = maker.filled >= args.qty
+    print(f"limit + queue: {m / dt:,.0f} legs/s  fully filled {done.mean():.1%}  "
+          f"median wait {np.median((maker.done_ns - maker.arrive_ns)[done]) / 1e6:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
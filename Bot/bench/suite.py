@@ -0,0 +1,151 @@
+"""バックテスト経路のステージ別スループット計測（load / signal / backtest / report と run_analysis の各段）。
+
+    cd Bot && python -m bench.suite --rows 1e5,1e6,1e7 [--out cache/bench/results.jsonl]
+
+サイズごとに bench.synthetic で compare_10s.csv 形式の CSV を作り（cache/bench/ に置いて再利用）、各ステージの
+秒数・rows/sec・ピークメモリ（tracemalloc、numpy の確保も含む）・プロセスの最大 RSS を JSON lines で追記する。
+同じサイズ/ステージの前回の記録と比べ、rows/sec が --tolerance 以上落ちたものに REGRESSION を付ける。
+run_analysis の段（analysis_load / compute_spreads / add_effective / backtest_swap_pair / backtest_oneway_fgrd_high /
+sweep_oneway_params / analysis_render）は --analysis-max-rows 以下のサイズだけ測る（入力・出力・結果ストアは一時ディレクトリ）。
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+import argparse
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import orjson
+
+from backtest.runner import (Config, entry_candidates, exit_candidates, load_arrays, plot_spread_with_trades_and_equity,
+                             run_backtest, write_outputs)
+from bench.synthetic import write_csv
+from storage.column_cache import load_table
+from storage.results import ResultStore
+
+BENCH_DIR = Path(__file__).resolve().parents[1] / 'cache' / 'bench'
+ANALYSIS_DIR = Path(__file__).resolve().parents[2] / 'trading_strategy'
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def measure(fn: Callable[[], Any]) -> Dict[str, Any]:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    seconds = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': seconds, 'peak_mb': peak / 2**20,
+            'maxrss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 'value': out}
+
+
+@contextmanager
+def analysis_env(src: Path, tmp: Path, cache_root: Path) -> Iterator[Any]:
+    """run_analysis の入力 CSV・出力先・列キャッシュ・結果ストアを一時ディレクトリに向ける。
+
+    前回の出力や結果ストアのヒットで計算が飛ばされると計測にならないので、毎回空の状態から流す。
+    """
+    if str(ANALYSIS_DIR) not in sys.path:
+        sys.path.insert(0, str(ANALYSIS_DIR))
+    import run_analysis as ra
+    saved = {n: getattr(ra, n) for n in ('CSV', 'IMG', 'load_table', 'default_store')}
+    store = ResultStore(tmp / 'results')
+    ra.CSV, ra.IMG = src, tmp / 'img'
+    ra.IMG.mkdir(parents=True, exist_ok=True)
+    ra.load_table = lambda source: load_table(source, cache_root)
+    ra.default_store = lambda: store
+    try:
+        yield ra
+    finally:
+        for n, v in saved.items():
+            setattr(ra, n, v)
+
+
+def run_size(rows: int, cfg: Config, seed: int, analysis: bool = True) -> List[Dict[str, Any]]:
+    src = BENCH_DIR / f'synthetic_{rows}_{seed}.csv'
+    if not src.exists():
+        write_csv(src, rows, seed=seed)
+    records: List[Dict[str, Any]] = []
+
+    def stage(name: str, fn: Callable[[], Any]) -> Any:
+        m = measure(fn)
+        value = m.pop('value')
+        records.append({'rows': rows, 'stage': name, **m, 'rows_per_sec': rows / m['seconds'] if m['seconds'] else 0.0})
+        return value
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_root = Path(tmp) / 'columns'
+        data = stage('load_cold', lambda: load_arrays(src, cache_root=cache_root))   # CSV パース + 列キャッシュ作成
+        data = stage('load_warm', lambda: load_arrays(src, cache_root=cache_root))   # memmap
+        stage('signal', lambda: (entry_candidates(data.spread, cfg.enter_band, cfg.persistence_n),
+                                 exit_candidates(data.spread, cfg)))
+        result = stage('backtest', lambda: run_backtest(data, cfg))
+        stage('report', lambda: (write_outputs(Path(tmp) / 'out', data, result),
+                                 plot_spread_with_trades_and_equity(data, result, Path(tmp) / 'out')))
+        if analysis:
+            with analysis_env(src, Path(tmp), cache_root) as ra:
+                df = stage('analysis_load', ra.load)
+                df = stage('compute_spreads', lambda: ra.compute_spreads(df))
+                df = stage('add_effective', lambda: ra.add_effective(df))
+                stage('backtest_swap_pair', lambda: ra.backtest_swap_pair(df))
+                stage('backtest_oneway_fgrd_high', lambda: ra.backtest_oneway_fgrd_high(df))
+                stage('sweep_oneway_params', lambda: ra.sweep_oneway_params(df))
+                stage('analysis_render', lambda: ra.render_all(ra.overview_figures(df)))
+    return records
+
+
+def previous(path: Path) -> Dict[tuple, Dict[str, Any]]:
+    """(rows, stage) ごとの最後の記録。"""
+    last: Dict[tuple, Dict[str, Any]] = {}
+    if path.exists():
+        for line in path.read_bytes().splitlines():
+            if line.strip():
+                r = orjson.loads(line)
+                last[(r['rows'], r['stage'])] = r
+    return last
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', default='1e5,1e6,1e7', help='カンマ区切り（1e5〜1e8）')
+    ap.add_argument('--out', type=Path, default=BENCH_DIR / 'results.jsonl')
+    ap.add_argument('--seed', type=int, default=7)
+    ap.add_argument('--tolerance', type=float, default=0.2, help='前回比でこれ以上遅くなったら REGRESSION')
+    ap.add_argument('--analysis-max-rows', type=float, default=1e6, help='run_analysis の段を測る最大行数（0 で測らない）')
+    args = ap.parse_args()
+    cfg = Config(enter_band=5.0, exit_band=60.0, stop_band=-60.0, persistence_n=2, max_hold_sec=3600.0,
+                 min_hold_sec=60.0, taker_fee=0.0, slippage_usd=0.5, unit_btc=0.01)
+    prev = previous(args.out)
+    env = {'ts': time.strftime('%Y-%m-%dT%H:%M:%S'), 'git': _git_rev(), 'python': platform.python_version(),
+           'numpy': np.__version__, 'machine': platform.machine()}
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    print(f"{'rows':>12s} {'stage':<26s} {'sec':>8s} {'rows/s':>14s} {'peak MB':>9s} {'RSS MB':>8s}  vs last")
+    with open(args.out, 'ab') as f:
+        for rows in (int(float(x)) for x in args.rows.split(',')):
+            for r in run_size(rows, cfg, args.seed, analysis=rows <= args.analysis_max_rows):
+                rec = {**env, **r}
+                f.write(orjson.dumps(rec) + b'\n')
+                p = prev.get((rows, r['stage']))
+                ratio = r['rows_per_sec'] / p['rows_per_sec'] if p and p['rows_per_sec'] else None
+                flag = '' if ratio is None else f"x{ratio:.2f}" + ('  REGRESSION' if ratio < 1.0 - args.tolerance else '')
+                print(f"{rows:>12,} {r['stage']:<26s} {r['seconds']:8.3f} {r['rows_per_sec']:14,.0f} "
+                      f"{r['peak_mb']:9.1f} {r['maxrss_mb']:8.0f}  {flag}")
+    print(f"-> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""ベンチマーク用の合成データ: 平均回帰する FGRD/Bybit スプレッドと、compare_10s.csv と同じ列の CSV。
+
+    cd Bot && python -m bench.synthetic --rows 10000000 --out /tmp/compare_1e7.csv
+
+スプレッドは AR(1)（10 秒足の OU 過程の離散化）、価格水準はランダムウォーク。
+時刻は 10 秒間隔に、ときどき 1 分の欠測と、まれに 1 時間程度の停止を入れる。価格セルの一部は欠損（空欄）にする。
+大きいサイズ（1e8 行）でもメモリに載せないよう chunk 行ずつ生成して追記する。
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Tuple
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['spot_fgrd_bid', 'spot_fgrd_ask', 'spot_fgrd_last', 'spot_bybit_bid', 'spot_bybit_ask', 'spot_bybit_last',
+           'swap_fgrd_bid', 'swap_fgrd_ask', 'swap_fgrd_last', 'swap_bybit_bid', 'swap_bybit_ask', 'swap_bybit_last']
+T0 = np.datetime64('2025-01-01T00:00:00.123', 'ns')
+
+
+def ar1(rng: np.random.Generator, rows: int, phi: float = 0.995, sigma: float = 25.0,
+        x0: float = 0.0) -> np.ndarray:
+    """x_t = phi x_{t-1} + e_t をブロック単位の閉形式で計算する。
+
+    ブロック内: x_j = x0 * phi^(j+1) + sum_{i<=j} e_i phi^(j-i)。phi^j が潰れないようブロックは短めにする。
+    """
+    eps = rng.normal(0.0, sigma, rows)
+    x = np.empty(rows)
+    acc = x0
+    block = 1024
+    decay = phi ** np.arange(block)
+    for lo in range(0, rows, block):
+        e = eps[lo:lo + block]
+        k = len(e)
+        w = decay[:k]
+        x[lo:lo + k] = np.cumsum(e / w) * w + acc * phi * w
+        acc = x[lo + k - 1]
+    return x
+
+
+@dataclass
+class GapModel:
+    step_sec: int = 10
+    short_rate: float = 0.001    # 1 分の欠測が入る行の割合
+    short_sec: int = 70
+    outage_rate: float = 1e-5    # 停止（取得プロセス落ちなど）
+    outage_sec: int = 3600
+
+    def steps(self, rng: np.random.Generator, rows: int) -> np.ndarray:
+        u = rng.random(rows)
+        return np.where(u < self.outage_rate, self.outage_sec,
+                        np.where(u < self.outage_rate + self.short_rate, self.short_sec, self.step_sec)).astype(np.int64)
+
+
+@dataclass
+class SpreadState:
+    """チャンクをまたいで持ち越す生成状態。"""
+    t_ns: int
+    spread: float = 0.0
+    mid: float = 60000.0
+
+
+def chunks(rows: int, chunk: int = 1_000_000, seed: int = 7, gaps: GapModel | None = None,
+           nan_rate: float = 1e-4) -> Iterator[pd.DataFrame]:
+    """compare_10s.csv と同じ列の DataFrame を chunk 行ずつ返す（swap_fgrd_bid - swap_bybit_ask が AR(1) スプレッド）。"""
+    rng = np.random.default_rng(seed)
+    gaps = gaps or GapModel()
+    st = SpreadState(int(T0.astype(np.int64)))
+    for lo in range(0, rows, chunk):
+        n = min(chunk, rows - lo)
+        spread = ar1(rng, n, x0=st.spread)
+        mid = st.mid + np.cumsum(rng.normal(0.0, 5.0, n))
+        ts = st.t_ns + np.cumsum(gaps.steps(rng, n)) * 1_000_000_000
+        st = SpreadState(int(ts[-1]), float(spread[-1]), float(mid[-1]))
+        half = 0.05 + 0.1 * rng.integers(0, 3, n)
+        cols = {}
+        for venue, off in (('spot', 0.0), ('swap', 2.0)):
+            b_bid, b_ask = mid + off - half, mid + off + half
+            f_bid = b_ask + spread if venue == 'swap' else mid + off + rng.normal(0.0, 3.0, n)
+            f_ask = f_bid + 2 * half
+            cols.update({f'{venue}_fgrd_bid': f_bid, f'{venue}_fgrd_ask': f_ask, f'{venue}_fgrd_last': (f_bid + f_ask) / 2,
+                         f'{venue}_bybit_bid': b_bid, f'{venue}_bybit_ask': b_ask, f'{venue}_bybit_last': mid + off})
+        df = pd.DataFrame({'timestamp': np.char.add(np.datetime_as_string(ts.view('datetime64[ns]'), unit='us'),
+                                                   '+00:00')})
+        for c in COLUMNS:
+            v = np.round(cols[c], 2)
+            if nan_rate > 0:
+                v[rng.random(n) < nan_rate] = np.nan
+            df[c] = v
+        yield df
+
+
+def write_csv(path: Path, rows: int, chunk: int = 1_000_000, seed: int = 7, nan_rate: float = 1e-4) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    for i, df in enumerate(chunks(rows, chunk, seed, nan_rate=nan_rate)):
+        df.to_csv(tmp, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    tmp.replace(path)
+    return path
+
+
+def spread_arrays(rows: int, seed: int = 7) -> Tuple[np.ndarray, np.ndarray]:
+    """CSV を経由しない (ts datetime64[ns], spread)。"""
+    rng = np.random.default_rng(seed)
+    spread = ar1(rng, rows)
+    ts = T0 + np.cumsum(GapModel(short_rate=0.001, outage_rate=0.0).steps(rng, rows)) * np.timedelta64(1, 's')
+    return ts, spread
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=float, default=1e6)
+    ap.add_argument('--out', type=Path, required=True)
+    ap.add_argument('--seed', type=int, default=7)
+    ap.add_argument('--nan-rate', type=float, default=1e-4)
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    write_csv(args.out, int(args.rows), seed=args.seed, nan_rate=args.nan_rate)
+    print(f"{int(args.rows):,} rows -> {args.out} ({args.out.stat().st_size / 1e6:,.0f} MB) in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
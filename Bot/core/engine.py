@@ -2,11 +2,16 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, Any
 from pathlib import Path
+import asyncio
 import csv
 import time
 
 from .signals import SpreadSignals
-from exchanges.fgrd import FGRDClient, FGRDConfig
+from exchanges.fgrd import AsyncFGRDClient, FGRDConfig
+from exchanges.fgrd_models import AccountSnapshot
+from storage.journal import CsvJournal, MemoryJournal
+from utils.clock import Clock, wall_clock
+from utils.ratelimit import RateLimiter
 
 
 @dataclass
@@ -16,46 +21,67 @@ class EngineState:
 
 
 class Engine:
-    def __init__(self, config: Dict[str, Any]) -> None:
+    def __init__(self, config: Dict[str, Any], signals: SpreadSignals | None = None, clock: Clock = wall_clock,
+                 journal: CsvJournal | MemoryJournal | None = None) -> None:
+        # signals / clock / journal を差し替えるとライブと同じコードパスでリプレイできる（backtest.replay）
         self.config = config
         self.state = EngineState()
-        self.signals = SpreadSignals(config)
-        self.journal_path = Path('/Users/yoshinorinomura/Desktop/private/FGRD/Bot/trade_journal.csv')
-        if not self.journal_path.exists():
-            with open(self.journal_path, 'w', newline='') as f:
-                csv.writer(f).writerow(['ts','event','mode','spread','size_btc'])
+        self.clock = clock
+        self.signals = signals or SpreadSignals(config, clock=clock)
+        self.journal = journal or CsvJournal(Path('/Users/yoshinorinomura/Desktop/private/FGRD/Bot/trade_journal.csv'))
 
     def start(self) -> None:
         # wire FGRD balances/positions fetcher (no-op if config missing)
         f = self.config.get('exchanges', {}).get('fgrd', {})
         self._fgrd = None
+        self._account_task: asyncio.Task | None = None
+        self._last_account_pull = 0.0
+        # venue 毎の API 枠は FGRD/Bybit クライアントで共有する
+        self.limiter = RateLimiter.from_config(self.config)
         try:
-            self._fgrd = FGRDClient(FGRDConfig(
+            self._fgrd = AsyncFGRDClient(FGRDConfig(
                 base_url=f.get('base_url', ''),
                 api_key=f.get('api_key', ''),
                 api_secret=f.get('api_secret', ''),
                 bearer_token=f.get('bearer_token', ''),
                 cookie=f.get('cookie', ''),
-            ))
+            ), limiter=self.limiter)
         except Exception:
             self._fgrd = None
 
-    def tick(self) -> None:
-        # periodic account snapshot (every 60s)
+    async def run(self, interval_sec: float = 1.0) -> None:
+        """イベントループ上で tick を回す。REST はバックグラウンドタスクで実行し、tick を待たせない。"""
+        self.start()
+        try:
+            while True:
+                self._schedule_account_pull()
+                self.tick()
+                await asyncio.sleep(interval_sec)
+        finally:
+            await self.astop()
+
+    def _schedule_account_pull(self) -> None:
+        # periodic account snapshot (every 60s); 前回分が未完了なら重ねない
         now = time.time()
-        last = getattr(self, '_last_account_pull', 0.0)
-        if self._fgrd and (now - last) >= 60.0:
-            try:
-                acc = self._fgrd.get_balances()
-                fa = self._fgrd.get_fund_account()
-                pa = self._fgrd.get_positions()
-                self._write_account_snapshot(now, acc, fa, pa)
-            except Exception:
-                pass
-            self._last_account_pull = now
+        if not self._fgrd or (now - self._last_account_pull) < 60.0:
+            return
+        if self._account_task is not None and not self._account_task.done():
+            return
+        self._last_account_pull = now
+        self._account_task = asyncio.get_running_loop().create_task(self._pull_account(now))
+
+    async def _pull_account(self, now: float) -> None:
+        try:
+            snap = await self._fgrd.get_account_snapshot()
+            self._write_account_snapshot(now, snap)
+        except Exception:
+            pass
+
+    def tick(self) -> bool:
+        """データ点を1つ処理する。フィードが尽きていれば False。"""
         dp = self.signals.next_datapoint()
         if dp is None:
-            return
+            return False
         spread = dp['spread_main']
         if self.state.mode == 'IDLE':
             if self.signals.should_enter(spread):
@@ -68,10 +94,18 @@ class Engine:
                 self._log('exit', spread, 0.0)
                 self.state.mode = 'IDLE'
                 self.state.opened_ts = None
+        return True
 
     def stop(self) -> None:
         pass
 
+    async def astop(self) -> None:
+        if self._account_task is not None and not self._account_task.done():
+            self._account_task.cancel()
+        if self._fgrd is not None:
+            await self._fgrd.aclose()
+        self.stop()
+
     def _decide_size(self) -> float:
         # quantities are not present in compare_10s.csv; fallback to config
         max_pos = float(self.config['risk']['max_pos_btc'])
@@ -79,14 +113,13 @@ class Engine:
         return max_pos
 
     def _log(self, event: str, spread: float, size_btc: float) -> None:
-        with open(self.journal_path, 'a', newline='') as f:
-            csv.writer(f).writerow([time.time(), event, self.state.mode, f"{spread:.6f}", f"{size_btc:.6f}"])
+        self.journal.append(self.clock(), event, self.state.mode, spread, size_btc)
 
-    def _write_account_snapshot(self, ts: float, accounts: dict, fund: dict, personal: dict) -> None:
+    def _write_account_snapshot(self, ts: float, snap: AccountSnapshot) -> None:
         out = Path('/Users/yoshinorinomura/Desktop/private/FGRD/Bot/account_snapshot.csv')
         new = not out.exists()
         with open(out, 'a', newline='') as f:
             w = csv.writer(f)
             if new:
                 w.writerow(['ts','accounts_json','fund_json','personal_assets_json'])
-            w.writerow([int(ts), accounts, fund, personal])
+            w.writerow([int(ts), *snap.to_json_columns()])
@@ -0,0 +1,297 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict
+import asyncio
+import time
+import uuid
+
+from exchanges.bybit import AsyncBybitClient
+from exchanges.bybit_ws import TERMINAL_STATUSES, BybitPrivateStream
+from utils.latency import LatencyHistogram
+from .order_tracker import STATUS_FILLED, STATUS_OPEN, STATUS_PENDING, OrderTracker, TrackedOrder
+
+
+@dataclass
+class Leg:
+    symbol: str
+    side: str            # 'buy' | 'sell'
+    qty: float
+    price: float | None = None   # None = 成行（FGRD は指値のみのため必須）
+    reduce_only: bool = False
+
+
+@dataclass
+class LegResult:
+    venue: str
+    client_id: str
+    submit_ts: float
+    ack_ts: float | None = None
+    fill_ts: float | None = None
+    order_id: str | None = None
+    filled: bool = False
+    filled_qty: float = 0.0      # 取引所側で確かめた約定数量（未約定レッグは取消後に確定）
+    error: str | None = None
+
+    @property
+    def ack_sec(self) -> float | None:
+        return None if self.ack_ts is None else self.ack_ts - self.submit_ts
+
+    @property
+    def fill_sec(self) -> float | None:
+        return None if self.fill_ts is None else self.fill_ts - self.submit_ts
+
+
+@dataclass
+class PairResult:
+    status: str          # FILLED | HEDGED | UNWOUND | ABORTED | UNKNOWN（最終状態を確かめられず、ヘッジしていない）
+    #                      | HEDGE_FAILED（追撃/解消が全量約定しなかった。片張りが残っている）
+    fgrd: LegResult
+    bybit: LegResult
+    hedge: LegResult | None = None
+
+
+class FGRDLeg:
+    """FGRD 側の発注アダプタ。private WS が無いため、entrust 一覧から消えた注文の約定を建玉の変化で確かめる。"""
+
+    venue = 'fgrd'
+    can_market = False
+
+    def __init__(self, tracker: OrderTracker, poll_sec: float = 0.2) -> None:
+        self.tracker = tracker
+        self.poll_sec = poll_sec
+        self._placed: Dict[str, TrackedOrder] = {}
+
+    async def warmup(self) -> None:
+        await self.tracker.resync()
+
+    async def submit(self, leg: Leg, client_id: str) -> str | None:
+        o = await self.tracker.place(leg.symbol, 1 if leg.side == 'buy' else 2, leg.price, leg.qty)
+        self._placed[client_id] = o
+        return o.client_id
+
+    async def wait_fill(self, order_id: str | None, client_id: str, timeout: float) -> bool:
+        o = self._placed.get(client_id)
+        if o is None:
+            return False
+        if not await self.tracker.wait_closed(o, timeout, self.poll_sec):
+            return False
+        if await self.tracker.confirm(o) != STATUS_FILLED:
+            return False
+        self._placed.pop(client_id, None)
+        return True
+
+    async def cancel(self, order_id: str | None, client_id: str, leg: Leg) -> None:
+        o = self._placed.get(client_id)
+        if o is not None and o.status in (STATUS_PENDING, STATUS_OPEN):
+            await self.tracker.cancel(o)
+
+    async def final_qty(self, order_id: str | None, client_id: str, leg: Leg, timeout: float) -> float:
+        """取消後の最終約定数量。発注が通っていなければ 0。"""
+        o = self._placed.pop(client_id, None)
+        if o is None:
+            return 0.0
+        if not await self.tracker.wait_closed(o, timeout, self.poll_sec):
+            raise RuntimeError(f"fgrd order {o.client_id} still open after cancel")
+        return float(leg.qty) if await self.tracker.confirm(o) == STATUS_FILLED else 0.0
+
+
+class BybitLeg:
+    """Bybit 側の発注アダプタ。約定は private WS のプッシュで判定する。"""
+
+    venue = 'bybit'
+    can_market = True
+
+    def __init__(self, client: AsyncBybitClient, stream: BybitPrivateStream) -> None:
+        self.client = client
+        self.stream = stream
+
+    async def warmup(self) -> None:
+        await self.client.get_open_orders()
+
+    async def submit(self, leg: Leg, client_id: str) -> str | None:
+        resp = await self.client.create_order(
+            symbol=leg.symbol, side='Buy' if leg.side == 'buy' else 'Sell',
+            order_type='Market' if leg.price is None else 'Limit', qty=leg.qty, price=leg.price,
+            reduce_only=leg.reduce_only, order_link_id=client_id)
+        return resp.get('result', {}).get('orderId')
+
+    async def wait_fill(self, order_id: str | None, client_id: str, timeout: float) -> bool:
+        rec = await self.stream.wait_for_order(order_id=order_id, order_link_id=client_id, timeout=timeout)
+        return rec.get('orderStatus') == 'Filled'
+
+    async def cancel(self, order_id: str | None, client_id: str, leg: Leg) -> None:
+        await self.client.cancel_order(leg.symbol, order_id=order_id, order_link_id=client_id)
+
+    async def final_qty(self, order_id: str | None, client_id: str, leg: Leg, timeout: float) -> float:
+        """取消後の最終約定数量（cumExecQty）。WS の終端プッシュを待ち、来なければ注文履歴を引く。
+
+        送信が失敗して orderId が無いときは WS を待たずに履歴だけ見て、見つからなければ 0。
+        """
+        rec = None
+        if order_id is not None:
+            try:
+                rec = await self.stream.wait_for_order(order_id=order_id, order_link_id=client_id, timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        if rec is None:
+            resp = await self.client.get_order_history(leg.symbol, order_id=order_id, order_link_id=client_id)
+            recs = resp.get('result', {}).get('list', [])
+            if not recs:
+                if order_id is None:
+                    return 0.0
+                raise RuntimeError(f"bybit order {order_id} not found in order history")
+            rec = recs[0]
+            if rec.get('orderStatus') not in TERMINAL_STATUSES:
+                raise RuntimeError(f"bybit order {order_id or client_id} still {rec.get('orderStatus')} after cancel")
+        return float(rec.get('cumExecQty') or 0.0)
+
+
+class Executor:
+    """FGRD/Bybit の2レッグ同時発注と片張り（leg risk）処理。
+
+    - 両レッグを同時に送信し、レッグ毎に送信→ACK→約定の時刻を記録する
+    - 片方が約定しもう片方が未約定/失敗なら即座に片張り処理へ:
+      未約定側が成行可能なら取消→成行で追撃ヘッジ、不可なら取消→約定側を反対売買で解消
+    - 未約定レッグは送信中の要求の応答を待ってから client_id で取消し、取引所側の最終約定数量を確かめてから
+      追撃/解消の数量を決める（遅れて約定したレッグを二重にヘッジしない）。確かめられなければ UNKNOWN で何もしない
+    - 追撃/解消が全量約定しなければ HEDGE_FAILED（呼び出し側で警告・停止する）
+    - ACK/約定時刻とレッグ間スキューをヒストグラムで集計する（latency_report）
+    """
+
+    def __init__(self, config: Dict[str, Any], fgrd: FGRDLeg, bybit: BybitLeg) -> None:
+        ex = config.get('execution', {})
+        self.leg_timeout = float(ex.get('leg_timeout_sec', 2.0))
+        self.fill_timeout = float(ex.get('fill_timeout_sec', 5.0))
+        self.fgrd = fgrd
+        self.bybit = bybit
+        self.histograms: Dict[str, LatencyHistogram] = {
+            name: LatencyHistogram() for name in
+            ('ack_fgrd', 'ack_bybit', 'fill_fgrd', 'fill_bybit', 'ack_skew', 'fill_skew', 'hedge')
+        }
+
+    async def warmup(self) -> None:
+        """TLS/HTTP2 接続を事前に確立しておく（初回発注のハンドシェイク待ちを避ける）。"""
+        await asyncio.gather(self.fgrd.warmup(), self.bybit.warmup())
+
+    async def execute(self, fgrd_leg: Leg, bybit_leg: Leg) -> PairResult:
+        tasks: Dict[str, asyncio.Task] = {}
+        submits: Dict[str, asyncio.Task] = {}
+        results: Dict[str, LegResult] = {}
+        for adapter, leg in ((self.fgrd, fgrd_leg), (self.bybit, bybit_leg)):
+            res = LegResult(venue=adapter.venue, client_id=uuid.uuid4().hex[:24], submit_ts=time.perf_counter())
+            results[adapter.venue] = res
+            submits[adapter.venue] = asyncio.create_task(adapter.submit(leg, res.client_id))
+            tasks[adapter.venue] = asyncio.create_task(self._run_leg(adapter, leg, res, submits[adapter.venue]))
+
+        done, pending = await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_COMPLETED)
+        first = results['fgrd'] if tasks['fgrd'] in done else results['bybit']
+        if pending:
+            # 先行レッグが約定済みなら leg_timeout だけ待つ、未約定/失敗なら残りの結果を待つ
+            wait = self.leg_timeout if first.filled else None
+            await asyncio.wait(pending, timeout=wait)
+            for t in pending:
+                t.cancel()   # 約定待ちだけを止める（送信中の要求は shield していて止まらない）
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        f, b = results['fgrd'], results['bybit']
+        self._record(f, b)
+        if f.filled and b.filled:
+            return PairResult('FILLED', f, b)
+        settled = await asyncio.gather(self._settle(self.fgrd, f, fgrd_leg, submits['fgrd']),
+                                       self._settle(self.bybit, b, bybit_leg, submits['bybit']))
+        if not all(settled):
+            return PairResult('UNKNOWN', f, b)
+        if f.filled and b.filled:
+            return PairResult('FILLED', f, b)
+        if not f.filled_qty and not b.filled_qty:
+            return PairResult('ABORTED', f, b)
+        return await self._resolve_leg_risk(f, b, fgrd_leg, bybit_leg)
+
+    async def _run_leg(self, adapter: Any, leg: Leg, res: LegResult, submit: asyncio.Task) -> None:
+        try:
+            res.order_id = await asyncio.shield(submit)
+            res.ack_ts = time.perf_counter()
+            res.filled = await adapter.wait_fill(res.order_id, res.client_id, self.fill_timeout)
+            if res.filled:
+                res.fill_ts = time.perf_counter()
+                res.filled_qty = float(leg.qty)
+        except asyncio.TimeoutError:
+            res.filled = False
+        except Exception as e:
+            res.error = f"{type(e).__name__}: {e}"
+
+    async def _resolve_leg_risk(self, f: LegResult, b: LegResult, fgrd_leg: Leg, bybit_leg: Leg) -> PairResult:
+        if f.filled:
+            filled_ad, filled_leg, open_ad, open_res, open_leg = self.fgrd, fgrd_leg, self.bybit, b, bybit_leg
+        else:
+            filled_ad, filled_leg, open_ad, open_res, open_leg = self.bybit, bybit_leg, self.fgrd, f, fgrd_leg
+        filled_res = f if f.filled else b
+        if open_ad.can_market:
+            # 未約定側の残りを成行で追撃
+            qty = round(float(open_leg.qty) - open_res.filled_qty, 12)
+            hedge = await self._send_now(open_ad, Leg(open_leg.symbol, open_leg.side, qty, None))
+            status = 'HEDGED'
+        else:
+            # 約定側（部分約定なら約定分）を反対売買で解消
+            side = 'sell' if filled_leg.side == 'buy' else 'buy'
+            qty = filled_res.filled_qty
+            hedge = await self._send_now(filled_ad, Leg(filled_leg.symbol, side, qty, None, reduce_only=True))
+            status = 'UNWOUND'
+        if hedge.fill_sec is not None:
+            self.histograms['hedge'].record(hedge.fill_sec)
+        if not hedge.filled or hedge.error is not None or hedge.filled_qty < qty * (1 - 1e-9):
+            # 追撃/解消が通らなかった・一部しか約定しなかった: 片張りが残っているので解決済みとは返さない
+            status = 'HEDGE_FAILED'
+        return PairResult(status, f, b, hedge)
+
+    async def _send_now(self, adapter: Any, leg: Leg) -> LegResult:
+        res = LegResult(venue=adapter.venue, client_id=uuid.uuid4().hex[:24], submit_ts=time.perf_counter())
+        submit = asyncio.create_task(adapter.submit(leg, res.client_id))
+        await self._run_leg(adapter, leg, res, submit)
+        if not res.filled:
+            await self._settle(adapter, res, leg, submit)
+        return res
+
+    async def _settle(self, adapter: Any, res: LegResult, leg: Leg, submit: asyncio.Task) -> bool:
+        """未約定レッグの最終状態を確かめる（確かめられなければ error に理由を残して False）。
+
+        ACK 前に打ち切ったレッグも、送信中の要求の応答を待ってから client_id で取消す。
+        """
+        if res.filled:
+            return True
+        try:
+            res.order_id = await submit
+        except Exception as e:
+            res.error = res.error or f"{type(e).__name__}: {e}"
+        try:
+            await adapter.cancel(res.order_id, res.client_id, leg)
+        except Exception:
+            pass   # 約定/取消済みなら取消は失敗する。最終状態は次で確かめる
+        try:
+            res.filled_qty = await adapter.final_qty(res.order_id, res.client_id, leg, self.fill_timeout)
+        except Exception as e:
+            res.error = f"{type(e).__name__}: {e}"
+            return False
+        res.filled = res.filled_qty >= float(leg.qty) * (1 - 1e-9)
+        if res.filled and res.fill_ts is None:
+            res.fill_ts = time.perf_counter()
+        return True
+
+    def _record(self, f: LegResult, b: LegResult) -> None:
+        h = self.histograms
+        if f.ack_sec is not None:
+            h['ack_fgrd'].record(f.ack_sec)
+        if b.ack_sec is not None:
+            h['ack_bybit'].record(b.ack_sec)
+        if f.fill_sec is not None:
+            h['fill_fgrd'].record(f.fill_sec)
+        if b.fill_sec is not None:
+            h['fill_bybit'].record(b.fill_sec)
+        if f.ack_ts is not None and b.ack_ts is not None:
+            h['ack_skew'].record(abs(f.ack_ts - b.ack_ts))
+        if f.fill_ts is not None and b.fill_ts is not None:
+            h['fill_skew'].record(abs(f.fill_ts - b.fill_ts))
+
+    def latency_report(self) -> Dict[str, Dict[str, float]]:
+        """ヒストグラム毎の count/mean/p50/p90/p99/max [ms]。"""
+        return {name: h.summary() for name, h in self.histograms.items()}
@@ -0,0 +1,274 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import asyncio
+import itertools
+import time
+
+from exchanges.fgrd import AsyncFGRDClient
+from exchanges.fgrd_models import EntrustOrder, EntrustPage, decode_response
+
+OrderKey = Tuple[str, int, str]   # (symbol, side, 正規化価格)
+
+STATUS_PENDING = 0          # 送信済み・entrust 未確認
+STATUS_OPEN = 1             # getCurrentEntrust 上の未約定（status=1）
+STATUS_FILLED = 2           # 一覧から消え、建玉の変化で約定を確認した
+STATUS_CANCELLED = -1       # 約定せずに終わった（取消/失効/拒否）
+STATUS_CLOSED_UNKNOWN = -2  # 一覧から消えた（約定か取消かは confirm() で確かめる）
+
+# getCurrentEntrust の status（取引所のコード）→ 上の内部状態。一覧に載っている注文はどのコードでもまだ終わって
+# いないので OPEN にし、約定/取消は一覧から消えたことと建玉の変化（confirm()）で決める。コードは exchange_status に残す。
+ENTRUST_STATUS = {1: STATUS_OPEN}
+
+
+def entrust_status(code: int) -> int:
+    return ENTRUST_STATUS.get(code, STATUS_OPEN)
+
+
+def price_key(price: Any) -> str:
+    """'105000' / '105000.00' / 105000.0 を同じキーに揃える。"""
+    try:
+        return format(Decimal(str(price)).normalize(), 'f')
+    except InvalidOperation:
+        return str(price)
+
+
+def _entrust_id(item: Dict[str, Any]) -> Optional[str]:
+    oid = item.get('id') or item.get('entrust_id')
+    return str(oid) if oid is not None else None
+
+
+@dataclass
+class TrackedOrder:
+    client_id: str
+    symbol: str
+    side: int
+    price: str
+    amount: float
+    entrust_id: str | None = None
+    status: int = STATUS_PENDING        # 内部状態（STATUS_*）
+    exchange_status: int | None = None  # entrust 一覧の status（取引所のコードそのまま）
+    created_ts: float = field(default_factory=time.time)
+    acked_ts: float | None = None
+    raw: EntrustOrder | None = None
+
+    @property
+    def key(self) -> OrderKey:
+        return (self.symbol, self.side, self.price)
+
+
+@dataclass
+class EntrustDiff:
+    added: List[TrackedOrder] = field(default_factory=list)
+    changed: List[TrackedOrder] = field(default_factory=list)
+    removed: List[TrackedOrder] = field(default_factory=list)
+
+
+class OrderTracker:
+    """FGRD の未約定注文を id / client id / (symbol, side, price) で索引する。
+
+    - place() で client id を採番し、entrust に現れた時点で entrust_id と結び付ける
+    - reconcile() は 1 ページ目との差分のみ反映し、全件が 1 ページに収まらない場合は
+      resync() で全ページを並列取得して突き合わせる
+    - find / cancel は索引引きのみ（ポーリング不要）
+    - 一覧から消えた注文は取消/失効と区別できないので CLOSED_UNKNOWN にし、confirm() で建玉の変化と
+      突き合わせて FILLED / CANCELLED を決める（基準の建玉は positions に銘柄ごとに持つ）
+    """
+
+    def __init__(self, client: AsyncFGRDClient, lever_rate: int | str = 25) -> None:
+        self.client = client
+        self.lever_rate = lever_rate
+        self.by_id: Dict[str, TrackedOrder] = {}
+        self.by_client: Dict[str, TrackedOrder] = {}
+        self.by_key: Dict[OrderKey, Deque[TrackedOrder]] = {}
+        self.positions: Dict[str, float] = {}   # 銘柄 -> 最後に確認した建玉（ロング +）
+        self._confirm_lock = asyncio.Lock()
+        self._seq = itertools.count(1)
+        self._prefix = f"fgrd-{int(time.time())}-"
+
+    # --- 索引 ---
+    def _index(self, o: TrackedOrder) -> None:
+        self.by_client[o.client_id] = o
+        self.by_key.setdefault(o.key, deque()).append(o)
+        if o.entrust_id is not None:
+            self.by_id[o.entrust_id] = o
+
+    def _unindex(self, o: TrackedOrder) -> None:
+        self.by_client.pop(o.client_id, None)
+        if o.entrust_id is not None:
+            self.by_id.pop(o.entrust_id, None)
+        q = self.by_key.get(o.key)
+        if q is not None:
+            try:
+                q.remove(o)
+            except ValueError:
+                pass
+            if not q:
+                del self.by_key[o.key]
+
+    def find(self, *, entrust_id: str | int | None = None, client_id: str | None = None,
+             symbol: str | None = None, side: int | None = None, price: Any = None) -> Optional[TrackedOrder]:
+        if entrust_id is not None:
+            return self.by_id.get(str(entrust_id))
+        if client_id is not None:
+            return self.by_client.get(client_id)
+        q = self.by_key.get((symbol or '', int(side or 0), price_key(price)))
+        return q[0] if q else None
+
+    def open_orders(self) -> List[TrackedOrder]:
+        return list(self.by_client.values())
+
+    # --- 発注/取消 ---
+    async def place(self, symbol: str, side: int, price: Any, amount: int | float,
+                    order_type: int = 1) -> TrackedOrder:
+        """発注する。code != 200（拒否）なら追跡から外して RuntimeError。"""
+        if symbol not in self.positions:
+            await self.sync_position(symbol)   # 約定確認の基準
+        o = TrackedOrder(client_id=f"{self._prefix}{next(self._seq)}", symbol=symbol, side=int(side),
+                         price=price_key(price), amount=amount)
+        self._index(o)
+        resp = await self.client.create_limit_order(symbol=symbol, side=side, price=price, amount=amount,
+                                                    lever_rate=self.lever_rate, order_type=order_type)
+        try:
+            resp = decode_response(resp)
+        except RuntimeError:
+            o.status = STATUS_CANCELLED
+            self._unindex(o)
+            raise
+        o.acked_ts = time.time()
+        data = resp.get('data')
+        if isinstance(data, dict) and _entrust_id(data) is not None:
+            self._bind(o, _entrust_id(data))
+        return o
+
+    async def cancel(self, o: TrackedOrder) -> Dict[str, Any]:
+        if o.entrust_id is None:
+            # ACK 直後で entrust_id 未確定なら 1 ページ目と突き合わせてから取消す
+            await self.reconcile()
+            if o.entrust_id is None:
+                raise RuntimeError(f"entrust_id unknown for {o.client_id}")
+        return await self.client.cancel_order(entrust_id=o.entrust_id, symbol=o.symbol)
+
+    def _bind(self, o: TrackedOrder, entrust_id: str) -> None:
+        o.entrust_id = entrust_id
+        self.by_id[entrust_id] = o
+
+    # --- entrust との突き合わせ ---
+    def apply_entrust(self, items: List[EntrustOrder], complete: bool, as_of: float | None = None) -> EntrustDiff:
+        """entrust 一覧を差分反映する。
+
+        complete=True のときは一覧に無い既知注文を CLOSED_UNKNOWN にする。as_of（取得開始時刻）より前に
+        ACK 済みなのに一覧に現れない注文（即時約定 or 即時取消）も CLOSED_UNKNOWN にする。
+        """
+        diff = EntrustDiff()
+        seen = set()
+        for it in items:
+            eid = it.id
+            seen.add(eid)
+            o = self.by_id.get(eid)
+            if o is None:
+                price = price_key(it.entrust_price)
+                o = self._match_pending(it.symbol, it.side, price)
+                if o is None:
+                    # 外部（手動/別プロセス）で出された注文も追跡対象にする
+                    o = TrackedOrder(client_id=f"ext-{eid}", symbol=it.symbol, side=it.side,
+                                     price=price, amount=it.amount)
+                    self._index(o)
+                self._bind(o, eid)
+                self._apply_item(o, it)
+                diff.added.append(o)
+            elif o.raw != it:
+                self._apply_item(o, it)
+                diff.changed.append(o)
+        if complete:
+            for eid in [e for e in self.by_id if e not in seen]:
+                o = self.by_id[eid]
+                o.status = STATUS_CLOSED_UNKNOWN
+                self._unindex(o)
+                diff.removed.append(o)
+            if as_of is not None:
+                for o in [o for o in self.by_client.values()
+                          if o.entrust_id is None and o.acked_ts is not None and o.acked_ts <= as_of]:
+                    o.status = STATUS_CLOSED_UNKNOWN
+                    self._unindex(o)
+                    diff.removed.append(o)
+        return diff
+
+    @staticmethod
+    def _apply_item(o: TrackedOrder, it: EntrustOrder) -> None:
+        o.exchange_status = it.status
+        o.status = entrust_status(it.status)
+        o.raw = it
+
+    def _match_pending(self, symbol: str, side: int, price: str) -> Optional[TrackedOrder]:
+        for o in self.by_key.get((symbol, side, price), ()):
+            if o.entrust_id is None:
+                return o
+        return None
+
+    async def reconcile(self) -> EntrustDiff:
+        """1 ページ目で差分反映。全件が 1 ページに収まらなければ全ページ再同期に切り替える。"""
+        as_of = time.time()
+        first = await self.client.fetch_entrust_page(page=1)
+        if first.last_page > 1:
+            return await self.resync(first, as_of)
+        return self.apply_entrust(first.items, complete=True, as_of=as_of)
+
+    async def resync(self, first: EntrustPage | None = None, as_of: float | None = None) -> EntrustDiff:
+        """全ページを並列取得して突き合わせる。"""
+        if first is None:
+            as_of = time.time()
+            first = await self.client.fetch_entrust_page(page=1)
+        items: List[EntrustOrder] = list(first.items)
+        if first.last_page > 1:
+            for rest in await self.client.get_entrust_pages(range(2, first.last_page + 1)):
+                items.extend(rest.items)
+        return self.apply_entrust(items, complete=True, as_of=as_of)
+
+    async def wait_closed(self, o: TrackedOrder, timeout: float, poll_sec: float = 0.2) -> bool:
+        """注文が一覧から消えるまで reconcile を回す（約定したかどうかは confirm() で確かめる）。"""
+        deadline = time.perf_counter() + timeout
+        while o.status in (STATUS_PENDING, STATUS_OPEN):
+            if time.perf_counter() >= deadline:
+                return False
+            await self.reconcile()
+            if o.status in (STATUS_PENDING, STATUS_OPEN):
+                await asyncio.sleep(poll_sec)
+        return True
+
+    # --- 約定の確認 ---
+    async def sync_position(self, symbol: str) -> float:
+        """symbol の建玉を取り直して約定確認の基準にする。応答に symbol の建玉が無い・読めなければ RuntimeError。"""
+        pos = (await self.client.fetch_personal_assets()).net_position(symbol)
+        if pos is None:
+            raise RuntimeError(f"fgrd personalAssets has no readable position for {symbol}")
+        self.positions[symbol] = pos
+        return pos
+
+    async def confirm(self, o: TrackedOrder) -> int:
+        """CLOSED_UNKNOWN の注文を、前回確認した建玉からの変化で FILLED / CANCELLED に決める。
+
+        変化が注文数量とも 0 とも合わない（部分約定、同じ銘柄の注文が同時に消えた、外部の売買）ときは
+        基準を今の建玉に取り直したうえで CLOSED_UNKNOWN のまま RuntimeError にする。基準が無い・応答に建玉が
+        無い/読めないときも CLOSED_UNKNOWN のまま RuntimeError（建玉 0 とみなして取消にはしない）。
+        """
+        if o.status != STATUS_CLOSED_UNKNOWN:
+            return o.status
+        async with self._confirm_lock:
+            before = self.positions.get(o.symbol)
+            now = await self.sync_position(o.symbol)
+            if before is None:
+                raise RuntimeError(f"no fgrd position baseline for {o.symbol}, cannot confirm {o.client_id}")
+            delta = now - before
+            signed = float(o.amount) if o.side == 1 else -float(o.amount)
+            tol = 1e-9 * max(1.0, abs(signed))
+            if abs(delta - signed) <= tol:
+                o.status = STATUS_FILLED
+            elif abs(delta) <= tol:
+                o.status = STATUS_CANCELLED
+            else:
+                raise RuntimeError(f"fgrd position moved {delta:+g} {o.symbol}, cannot attribute to "
+                                   f"{o.client_id} ({signed:+g})")
+        return o.status
@@ -1,14 +1,20 @@
 from __future__ import annotations
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional
 from pathlib import Path
-import csv
-import time
 import json
 
+import numpy as np
+
+from storage.column_cache import load_table
+from utils.clock import Clock, wall_clock
+
 
 class SpreadSignals:
-    def __init__(self, config: Dict[str, Any]) -> None:
+    def __init__(self, config: Dict[str, Any], feed: Iterable[Dict[str, Any]] | None = None,
+                 clock: Clock = wall_clock) -> None:
+        # feed: {'ts', 'spread_main'} のデータ点列。未指定なら compare_10s.csv を clock の時刻で流す
         self.cfg = config
+        self.clock = clock
         # strategy rules (JSON)
         rules_path = Path(__file__).resolve().parents[1] / 'strategy_rules.json'
         if rules_path.exists():
@@ -33,27 +39,20 @@ class SpreadSignals:
             self.max_hold   = float(self.cfg['signals']['max_hold_sec'])
         self._csv_path = Path('/Users/yoshinorinomura/Desktop/private/FGRD/compare_10s.csv')
         self._it = None
-        if self._csv_path.exists():
+        if feed is not None:
+            self._it = iter(feed)
+        elif self._csv_path.exists():
             self._it = self._iter_csv(self._csv_path)
         self._entry_hits = 0
         self._tp_hits = 0
         self._sl_hits = 0
 
     def _iter_csv(self, path: Path):
-        with open(path, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    # headers in compare_10s.csv
-                    # timestamp, ..., swap_fgrd_bid, swap_fgrd_ask, ..., swap_bybit_bid, swap_bybit_ask, ...
-                    fb = float(row.get('swap_fgrd_bid') or 'nan')
-                    ba = float(row.get('swap_bybit_ask') or 'nan')
-                except ValueError:
-                    continue
-                if any(map(lambda x: x != x, [fb, ba])):
-                    continue
-                spread_main = fb - ba
-                yield {'ts': time.time(), 'spread_main': spread_main}
+        # compare_10s.csv は storage.column_cache 経由で列配列として読む（2回目以降は memmap）
+        t = load_table(path)
+        spread = t['swap_fgrd_bid'] - t['swap_bybit_ask']
+        for spread_main in spread[~np.isnan(spread)].tolist():
+            yield {'ts': self.clock(), 'spread_main': spread_main}
 
     def next_datapoint(self) -> Optional[Dict[str, Any]]:
         if self._it is None:
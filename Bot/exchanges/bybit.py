@@ -1,2 +1,296 @@
 from __future__ import annotations
-# placeholders
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple
+from urllib.parse import urlencode
+import asyncio
+import hashlib
+import hmac
+import time
+
+import httpx
+import orjson
+
+from utils.backoff import backoff_delays
+from utils.ratelimit import PRIORITY_ORDER, PRIORITY_QUERY, PRIORITY_REPORT, RateLimiter
+
+
+@dataclass
+class BybitConfig:
+    base_url: str
+    api_key: str
+    api_secret: str
+    recv_window: int = 5000
+    category: str = "linear"
+
+
+@dataclass
+class RateLimitStatus:
+    limit: int
+    remaining: int
+    reset_ms: int
+
+
+class BybitError(RuntimeError):
+    def __init__(self, ret_code: int, ret_msg: str, path: str) -> None:
+        super().__init__(f"bybit {path}: retCode={ret_code} retMsg={ret_msg}")
+        self.ret_code = ret_code
+        self.ret_msg = ret_msg
+
+
+# 429/5xx は再試行対象（retry=True のときはタイムアウト/接続エラーも再試行する）
+_RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# path -> (エンドポイント種別, 優先度)。RateLimiter のバケット/優先度選択に使う
+_ENDPOINTS: Dict[str, Tuple[str, int]] = {
+    "/v5/account/wallet-balance": ("account", PRIORITY_REPORT),
+    "/v5/position/list": ("query", PRIORITY_QUERY),
+    "/v5/order/realtime": ("query", PRIORITY_QUERY),
+    "/v5/order/history": ("query", PRIORITY_QUERY),
+    "/v5/order/create": ("order", PRIORITY_ORDER),
+    "/v5/order/cancel": ("order", PRIORITY_ORDER),
+}
+
+
+class _BybitBase:
+    """Bybit v5 の署名/ヘッダ/レート制限追跡（同期/非同期クライアント共通）。
+
+    署名: HMAC_SHA256(secret, timestamp + api_key + recv_window + (query|body)) → hex
+    鍵を登録済みの HMAC オブジェクトを1つ保持し、リクエスト毎に copy() して使う。
+    """
+
+    def __init__(self, cfg: BybitConfig, limiter: RateLimiter | None = None) -> None:
+        self.cfg = cfg
+        self.limiter = limiter
+        self._mac = hmac.new(cfg.api_secret.encode(), digestmod=hashlib.sha256)
+        self._sign_tail = (cfg.api_key + str(cfg.recv_window)).encode()
+        self._static_headers: Dict[str, str] = {
+            "X-BAPI-API-KEY": cfg.api_key,
+            "X-BAPI-RECV-WINDOW": str(cfg.recv_window),
+            "Content-Type": "application/json",
+        }
+        # path -> 直近のレート制限ヘッダ
+        self.rate_limits: Dict[str, RateLimitStatus] = {}
+
+    def _sign(self, ts: bytes, payload: bytes) -> str:
+        m = self._mac.copy()
+        m.update(ts)
+        m.update(self._sign_tail)
+        m.update(payload)
+        return m.hexdigest()
+
+    def _signed_headers(self, payload: bytes) -> Dict[str, str]:
+        ts = str(int(time.time() * 1000))
+        headers = self._static_headers.copy()
+        headers["X-BAPI-TIMESTAMP"] = ts
+        headers["X-BAPI-SIGN"] = self._sign(ts.encode(), payload)
+        return headers
+
+    def _build_get(self, path: str, params: Dict[str, Any]) -> Tuple[str, None, Dict[str, str]]:
+        query = urlencode({k: v for k, v in params.items() if v is not None})
+        url = f"{path}?{query}" if query else path
+        return url, None, self._signed_headers(query.encode())
+
+    def _build_post(self, path: str, body: Dict[str, Any]) -> Tuple[str, bytes, Dict[str, str]]:
+        content = orjson.dumps(body)
+        return path, content, self._signed_headers(content)
+
+    def _track_rate_limit(self, path: str, headers: httpx.Headers) -> None:
+        status = headers.get("X-Bapi-Limit-Status")
+        if status is None:
+            return
+        rl = self.rate_limits[path] = RateLimitStatus(
+            limit=int(headers.get("X-Bapi-Limit", 0)),
+            remaining=int(status),
+            reset_ms=int(headers.get("X-Bapi-Limit-Reset-Timestamp", 0)),
+        )
+        if rl.remaining <= 0 and self.limiter is not None:
+            # サーバ側の枠を使い切ったらリセットまで同種別の払い出しを止める（venue 全体の枠＝発注は止めない）
+            self.limiter.drain("bybit", _ENDPOINTS.get(path, ("query", PRIORITY_QUERY))[0],
+                               max(0.0, rl.reset_ms / 1000.0 - time.time()))
+
+    def _handle(self, path: str, resp: httpx.Response) -> Dict[str, Any]:
+        self._track_rate_limit(path, resp.headers)
+        try:
+            data = orjson.loads(resp.content)
+        except orjson.JSONDecodeError:
+            raise RuntimeError(f"invalid json: {resp.text[:200]}")
+        if data.get("retCode", 0) != 0:
+            raise BybitError(int(data["retCode"]), str(data.get("retMsg", "")), path)
+        return data
+
+    # --- リクエスト本体（エンドポイント共通） ---
+    def _history_params(self, symbol: str, order_id: str | None, order_link_id: str | None) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"category": self.cfg.category, "symbol": symbol}
+        if order_id:
+            params["orderId"] = order_id
+        if order_link_id:
+            params["orderLinkId"] = order_link_id
+        return params
+
+    def _order_body(self, symbol: str, side: str, order_type: str, qty: str | float,
+                    price: str | float | None, time_in_force: str, reduce_only: bool,
+                    order_link_id: str | None) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "category": self.cfg.category,
+            "symbol": symbol,
+            "side": side,
+            "orderType": order_type,
+            "qty": str(qty),
+            "timeInForce": time_in_force,
+        }
+        if price is not None:
+            body["price"] = str(price)
+        if reduce_only:
+            body["reduceOnly"] = True
+        if order_link_id:
+            body["orderLinkId"] = order_link_id
+        return body
+
+
+class BybitClient(_BybitBase):
+    """Bybit v5 REST クライアント（keep-alive コネクションプール上で動作）。
+
+    transport を渡すとローカルのスタブ（httpx.MockTransport 等）に向けられる。
+    """
+
+    def __init__(self, cfg: BybitConfig, retries: int = 3, max_connections: int = 4,
+                 limiter: RateLimiter | None = None, transport: httpx.BaseTransport | None = None) -> None:
+        super().__init__(cfg, limiter)
+        self.retries = retries
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.client = httpx.Client(base_url=cfg.base_url, timeout=10.0, limits=limits, transport=transport)
+
+    def close(self) -> None:
+        self.client.close()
+
+    def _send(self, method: str, path: str, build: Callable[[], Tuple[str, bytes | None, Dict[str, str]]],
+              retry: bool) -> Dict[str, Any]:
+        delays = [0.0, *backoff_delays(self.retries)] if retry else [0.0]
+        for i, delay in enumerate(delays):
+            last = i == len(delays) - 1
+            if delay:
+                time.sleep(delay)
+            # 再試行も1リクエストとしてレート制限を取り直す
+            if self.limiter is not None:
+                self.limiter.acquire_blocking("bybit", *_ENDPOINTS.get(path, ("query", PRIORITY_QUERY)))
+            # timestamp が古くならないよう毎回再署名する
+            url, content, headers = build()
+            try:
+                resp = self.client.request(method, url, content=content, headers=headers)
+            except httpx.TransportError:   # TimeoutException を含む
+                if last:
+                    raise
+                continue
+            if last or resp.status_code not in _RETRY_STATUS:
+                break
+        return self._handle(path, resp)
+
+    def _get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self._send("GET", path, lambda: self._build_get(path, params), retry=True)
+
+    def _post(self, path: str, body: Dict[str, Any], retry: bool = True) -> Dict[str, Any]:
+        return self._send("POST", path, lambda: self._build_post(path, body), retry=retry)
+
+    def get_wallet_balance(self, coin: str = "USDT", account_type: str = "UNIFIED") -> Dict[str, Any]:
+        return self._get("/v5/account/wallet-balance", {"accountType": account_type, "coin": coin})
+
+    def get_positions(self, symbol: str = "BTCUSDT") -> Dict[str, Any]:
+        return self._get("/v5/position/list", {"category": self.cfg.category, "symbol": symbol})
+
+    def get_open_orders(self, symbol: str = "BTCUSDT") -> Dict[str, Any]:
+        return self._get("/v5/order/realtime", {"category": self.cfg.category, "symbol": symbol})
+
+    def get_order_history(self, symbol: str = "BTCUSDT", order_id: str | None = None,
+                          order_link_id: str | None = None) -> Dict[str, Any]:
+        return self._get("/v5/order/history", self._history_params(symbol, order_id, order_link_id))
+
+    def create_order(self, symbol: str, side: str, order_type: str, qty: str | float,
+                     price: str | float | None = None, time_in_force: str = "IOC",
+                     reduce_only: bool = False, order_link_id: str | None = None) -> Dict[str, Any]:
+        """POST /v5/order/create。二重発注を避けるため order_link_id 指定時のみ再試行する。"""
+        body = self._order_body(symbol, side, order_type, qty, price, time_in_force, reduce_only, order_link_id)
+        return self._post("/v5/order/create", body, retry=order_link_id is not None)
+
+    def cancel_order(self, symbol: str, order_id: str | None = None,
+                     order_link_id: str | None = None) -> Dict[str, Any]:
+        body: Dict[str, Any] = {"category": self.cfg.category, "symbol": symbol}
+        if order_id:
+            body["orderId"] = order_id
+        if order_link_id:
+            body["orderLinkId"] = order_link_id
+        return self._post("/v5/order/cancel", body)
+
+
+class AsyncBybitClient(_BybitBase):
+    """BybitClient の asyncio 版（同じメソッド名/戻り値）。"""
+
+    def __init__(self, cfg: BybitConfig, retries: int = 3, max_connections: int = 4,
+                 limiter: RateLimiter | None = None, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        super().__init__(cfg, limiter)
+        self.retries = retries
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.client = httpx.AsyncClient(base_url=cfg.base_url, timeout=10.0, limits=limits, transport=transport)
+
+    async def __aenter__(self) -> 'AsyncBybitClient':
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def _send(self, method: str, path: str, build: Callable[[], Tuple[str, bytes | None, Dict[str, str]]],
+                    retry: bool) -> Dict[str, Any]:
+        delays = [0.0, *backoff_delays(self.retries)] if retry else [0.0]
+        for i, delay in enumerate(delays):
+            last = i == len(delays) - 1
+            if delay:
+                await asyncio.sleep(delay)
+            if self.limiter is not None:
+                await self.limiter.acquire("bybit", *_ENDPOINTS.get(path, ("query", PRIORITY_QUERY)))
+            url, content, headers = build()
+            try:
+                resp = await self.client.request(method, url, content=content, headers=headers)
+            except httpx.TransportError:
+                if last:
+                    raise
+                continue
+            if last or resp.status_code not in _RETRY_STATUS:
+                break
+        return self._handle(path, resp)
+
+    async def _get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._send("GET", path, lambda: self._build_get(path, params), retry=True)
+
+    async def _post(self, path: str, body: Dict[str, Any], retry: bool = True) -> Dict[str, Any]:
+        return await self._send("POST", path, lambda: self._build_post(path, body), retry=retry)
+
+    async def get_wallet_balance(self, coin: str = "USDT", account_type: str = "UNIFIED") -> Dict[str, Any]:
+        return await self._get("/v5/account/wallet-balance", {"accountType": account_type, "coin": coin})
+
+    async def get_positions(self, symbol: str = "BTCUSDT") -> Dict[str, Any]:
+        return await self._get("/v5/position/list", {"category": self.cfg.category, "symbol": symbol})
+
+    async def get_open_orders(self, symbol: str = "BTCUSDT") -> Dict[str, Any]:
+        return await self._get("/v5/order/realtime", {"category": self.cfg.category, "symbol": symbol})
+
+    async def get_order_history(self, symbol: str = "BTCUSDT", order_id: str | None = None,
+                                order_link_id: str | None = None) -> Dict[str, Any]:
+        """GET /v5/order/history（終端した注文の最終状態）。"""
+        return await self._get("/v5/order/history", self._history_params(symbol, order_id, order_link_id))
+
+    async def create_order(self, symbol: str, side: str, order_type: str, qty: str | float,
+                           price: str | float | None = None, time_in_force: str = "IOC",
+                           reduce_only: bool = False, order_link_id: str | None = None) -> Dict[str, Any]:
+        body = self._order_body(symbol, side, order_type, qty, price, time_in_force, reduce_only, order_link_id)
+        return await self._post("/v5/order/create", body, retry=order_link_id is not None)
+
+    async def cancel_order(self, symbol: str, order_id: str | None = None,
+                           order_link_id: str | None = None) -> Dict[str, Any]:
+        body: Dict[str, Any] = {"category": self.cfg.category, "symbol": symbol}
+        if order_id:
+            body["orderId"] = order_id
+        if order_link_id:
+            body["orderLinkId"] = order_link_id
+        return await self._post("/v5/order/cancel", body)
@@ -0,0 +1,210 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import hashlib
+import hmac
+import time
+
+import orjson
+import websockets
+
+from .bybit import AsyncBybitClient, BybitConfig
+from utils.backoff import backoff_delays
+
+BYBIT_WS_PRIVATE = "wss://stream.bybit.com/v5/private"
+
+# 終端ステータス（これ以上更新されない注文）
+TERMINAL_STATUSES = frozenset({"Filled", "Cancelled", "Rejected", "PartiallyFilledCanceled", "Deactivated"})
+
+
+class BybitPrivateStream:
+    """Bybit v5 private WS（order / execution / position）購読とローカルキャッシュ。
+
+    - orders: orderId -> 最新の注文レコード（orderLinkId からも引ける）
+    - positions: (symbol, positionIdx) -> 最新のポジションレコード
+    - wait_for_order で約定/終端ステータスをプッシュで待てる（REST ポーリング不要）
+    切断時は指数バックオフで再接続し、rest が渡されていれば再接続直後に REST で再同期する。
+    終端した注文は retain_sec だけ残してからキャッシュから消す（直後の wait_for_order には即時に返す）。
+    """
+
+    def __init__(self, cfg: BybitConfig, url: str = BYBIT_WS_PRIVATE,
+                 topics: Iterable[str] = ("order", "execution", "position"),
+                 rest: AsyncBybitClient | None = None, ping_interval: float = 20.0,
+                 retain_sec: float = 60.0) -> None:
+        self.cfg = cfg
+        self.url = url
+        self.topics = list(topics)
+        self.rest = rest
+        self.ping_interval = ping_interval
+        self.retain_sec = retain_sec
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.order_links: Dict[str, str] = {}
+        self.positions: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self._closed: Dict[str, float] = {}   # 終端した orderId -> 終端を受けた時刻（古い順）
+        self.connected = asyncio.Event()
+        self._listeners: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._waiters: List[Tuple[str | None, str | None, frozenset, asyncio.Future]] = []
+        self._stop = asyncio.Event()
+
+    # --- 公開API ---
+    def add_listener(self, topic: str, cb: Callable[[Dict[str, Any]], None]) -> None:
+        """topic（order/execution/position）の各レコードで cb を呼ぶ。"""
+        self._listeners.setdefault(topic, []).append(cb)
+
+    def get_order(self, order_id: str | None = None, order_link_id: str | None = None) -> Optional[Dict[str, Any]]:
+        if order_id is None and order_link_id is not None:
+            order_id = self.order_links.get(order_link_id)
+        return self.orders.get(order_id) if order_id is not None else None
+
+    def open_orders(self, symbol: str | None = None) -> List[Dict[str, Any]]:
+        return [o for o in self.orders.values()
+                if o.get("orderStatus") not in TERMINAL_STATUSES and (symbol is None or o.get("symbol") == symbol)]
+
+    async def wait_for_order(self, order_id: str | None = None, order_link_id: str | None = None,
+                             statuses: Iterable[str] = TERMINAL_STATUSES,
+                             timeout: float | None = None) -> Dict[str, Any]:
+        """注文が statuses のいずれかになるまで待つ（既に到達済みなら即時に返す）。"""
+        wanted = frozenset(statuses)
+        cur = self.get_order(order_id, order_link_id)
+        if cur is not None and cur.get("orderStatus") in wanted:
+            return cur
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        waiter = (order_id, order_link_id, wanted, fut)
+        self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # --- 接続ループ ---
+    def _auth_message(self) -> bytes:
+        expires = int((time.time() + 10.0) * 1000)
+        sig = hmac.new(self.cfg.api_secret.encode(), f"GET/realtime{expires}".encode(), hashlib.sha256).hexdigest()
+        return orjson.dumps({"op": "auth", "args": [self.cfg.api_key, expires, sig]})
+
+    async def run(self) -> None:
+        delays = backoff_delays(retries=1 << 30, base=0.5, max_delay=30.0)
+        while not self._stop.is_set():
+            try:
+                async with websockets.connect(self.url, ping_interval=None) as ws:
+                    await self._login(ws)
+                    delays = backoff_delays(retries=1 << 30, base=0.5, max_delay=30.0)
+                    if self.rest is not None:
+                        await self.resync()
+                    self.connected.set()
+                    heartbeat = asyncio.create_task(self._heartbeat(ws))
+                    try:
+                        async for raw in ws:
+                            self.handle_message(orjson.loads(raw))
+                            if self._stop.is_set():
+                                break
+                    finally:
+                        heartbeat.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            self.connected.clear()
+            if self._stop.is_set():
+                break
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=next(delays))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _login(self, ws: Any) -> None:
+        await ws.send(self._auth_message())
+        resp = orjson.loads(await asyncio.wait_for(ws.recv(), timeout=10.0))
+        if not resp.get("success"):
+            raise RuntimeError(f"bybit ws auth failed: {resp.get('ret_msg')}")
+        await ws.send(orjson.dumps({"op": "subscribe", "args": self.topics}))
+
+    async def _heartbeat(self, ws: Any) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send(b'{"op":"ping"}')
+
+    async def resync(self) -> None:
+        """切断中の取りこぼしを REST で補う。
+
+        open orders / positions を取り直し、キャッシュでは未終端なのに open に無い注文（切断中に約定/取消された）は
+        注文履歴で最終状態を引いて反映する。履歴にも無い注文はキャッシュから消す。
+        """
+        symbols = sorted({"BTCUSDT", *(o.get("symbol", "") for o in self.open_orders())} - {""})
+        *orders, positions = await asyncio.gather(*(self.rest.get_open_orders(s) for s in symbols),
+                                                  self.rest.get_positions())
+        listed = [o for page in orders for o in page.get("result", {}).get("list", [])]
+        for o in listed:
+            self._on_order(o)
+        for p in positions.get("result", {}).get("list", []):
+            self._on_position(p)
+        open_ids = {o.get("orderId") for o in listed}
+        missing = [o for o in self.open_orders() if o.get("orderId") not in open_ids]
+        history = await asyncio.gather(*(self.rest.get_order_history(o.get("symbol", ""), order_id=o["orderId"])
+                                         for o in missing))
+        for o, h in zip(missing, history):
+            final = [r for r in h.get("result", {}).get("list", []) if r.get("orderId") == o["orderId"]]
+            if final:
+                self._on_order(final[0])
+            else:
+                self._evict(o["orderId"])
+
+    # --- メッセージ処理 ---
+    def handle_message(self, msg: Dict[str, Any]) -> None:
+        topic = msg.get("topic")
+        if not topic:
+            return  # pong / subscribe 応答
+        records = msg.get("data") or []
+        if topic == "order":
+            for rec in records:
+                self._on_order(rec)
+        elif topic == "position":
+            for rec in records:
+                self._on_position(rec)
+        for cb in self._listeners.get(topic, ()):
+            for rec in records:
+                cb(rec)
+
+    def _on_order(self, rec: Dict[str, Any]) -> None:
+        oid = rec.get("orderId")
+        if not oid:
+            return
+        self.orders[oid] = rec
+        link = rec.get("orderLinkId")
+        if link:
+            self.order_links[link] = oid
+        status = rec.get("orderStatus")
+        if status in TERMINAL_STATUSES:
+            self._closed.pop(oid, None)
+            self._closed[oid] = time.monotonic()
+            self._prune()
+        for waiter in list(self._waiters):
+            w_oid, w_link, wanted, fut = waiter
+            if fut.done() or status not in wanted:
+                continue
+            if (w_oid is not None and w_oid == oid) or (w_link is not None and w_link == link):
+                fut.set_result(rec)
+
+    def _prune(self) -> None:
+        """retain_sec より前に終端した注文をキャッシュから消す。"""
+        cutoff = time.monotonic() - self.retain_sec
+        while self._closed:
+            oid, ts = next(iter(self._closed.items()))
+            if ts > cutoff:
+                break
+            self._evict(oid)
+
+    def _evict(self, oid: str) -> None:
+        self._closed.pop(oid, None)
+        rec = self.orders.pop(oid, None)
+        link = rec.get("orderLinkId") if rec else None
+        if link and self.order_links.get(link) == oid:
+            del self.order_links[link]
+
+    def _on_position(self, rec: Dict[str, Any]) -> None:
+        key = (rec.get("symbol", ""), int(rec.get("positionIdx", 0)))
+        self.positions[key] = rec
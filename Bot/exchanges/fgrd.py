@@ -1,12 +1,32 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
 import time
 import hmac
 import hashlib
 import httpx
 import subprocess
-import json
+
+import orjson
+
+from exchanges.fgrd_models import (AccountSnapshot, EntrustPage, PersonalAssets, decode_accounts, decode_entrust_page,
+                                   decode_fund_account, decode_personal_assets)
+from utils.ratelimit import PRIORITY_ORDER, PRIORITY_QUERY, PRIORITY_REPORT, RateLimiter
+
+# path -> (エンドポイント種別, 優先度)。RateLimiter のバケット/優先度選択に使う
+_ENDPOINTS: Dict[str, Tuple[str, int]] = {
+    "/api/wallet/accounts": ("account", PRIORITY_REPORT),
+    "/api/user/personalAssets": ("account", PRIORITY_REPORT),
+    "/api/user/fundAccount": ("account", PRIORITY_REPORT),
+    "/api/contract/getCurrentEntrust": ("query", PRIORITY_QUERY),
+    "/api/contract/openPosition": ("order", PRIORITY_ORDER),
+    "/api/contract/cancelEntrust": ("order", PRIORITY_ORDER),
+}
+
+
+def _endpoint(path: str) -> Tuple[str, int]:
+    return _ENDPOINTS.get(path.split("?", 1)[0], ("query", PRIORITY_QUERY))
 
 
 @dataclass
@@ -18,59 +38,105 @@ class FGRDConfig:
     cookie: str = ""
 
 
+# ブラウザ（btcfgrd.com）相当の固定ヘッダ。セッション内で不変なので一度だけ組み立てる
+_BROWSER_HEADERS: Tuple[Tuple[str, str], ...] = (
+    ("accept", "application/json, text/plain, */*"),
+    ("accept-language", "ja;q=0.5"),
+    # httpx が標準で展開できるものだけ（br / zstd は brotli / zstandard が要り、未展開のまま JSON パースに渡ってしまう）
+    ("accept-encoding", "gzip, deflate"),
+    ("user-agent", "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"),
+    ("lang", "en"),
+    ("x-requested-with", "XMLHttpRequest"),
+    ("Origin", "https://btcfgrd.com"),
+    ("Referer", "https://btcfgrd.com/"),
+    ("sec-ch-ua", '"Chromium";v="124", "Brave";v="124", "Not-A.Brand";v="99"'),
+    ("sec-ch-ua-mobile", "?0"),
+    ("sec-ch-ua-platform", '"macOS"'),
+    ("sec-fetch-dest", "empty"),
+    ("sec-fetch-mode", "cors"),
+    ("sec-fetch-site", "cross-site"),
+    ("sec-gpc", "1"),
+    ("priority", "u=1, i"),
+)
+
+# cURL 送信時のヘッダ（観測した実リクエストと同じ並び/値）
+_CURL_HEADERS: Tuple[Tuple[str, str], ...] = (
+    ("lang", "en"),
+    ("origin", "https://btcfgrd.com"),
+    ("priority", "u=1, i"),
+    ("referer", "https://btcfgrd.com/"),
+    ("sec-ch-ua", '"Chromium";v="124", "Brave";v="124", "Not-A.Brand";v="99"'),
+    ("sec-ch-ua-mobile", "?0"),
+    ("sec-ch-ua-platform", '"macOS"'),
+    ("sec-fetch-dest", "empty"),
+    ("sec-fetch-mode", "cors"),
+    ("sec-fetch-site", "cross-site"),
+    ("sec-gpc", "1"),
+    ("user-agent", "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"),
+    ("x-requested-with", "XMLHttpRequest"),
+)
+
+
+def _bearer(token: str) -> str:
+    tok = token.strip()
+    # APIは小文字の 'bearer ' を使用しているため合わせる
+    return tok if tok.lower().startswith("bearer ") else f"bearer {tok}"
+
+
 class FGRDClient:
-    def __init__(self, cfg: FGRDConfig) -> None:
+    def __init__(self, cfg: FGRDConfig, limiter: RateLimiter | None = None) -> None:
         self.cfg = cfg
+        self.limiter = limiter
+        self._build_templates()
         # 一部APIはHTTP/2依存の挙動のため http2=True を有効化
         self.client = httpx.Client(timeout=10.0, http2=True)
 
+    def _build_templates(self) -> None:
+        """セッション不変のヘッダ/ cURL 引数を一度だけ組み立てる。"""
+        cfg = self.cfg
+        base: Dict[str, str] = dict(_BROWSER_HEADERS)
+        # 優先度: Bearer -> Cookie -> HMAC 署名（署名は Bearer/Cookie が無いときだけ付与）
+        if cfg.bearer_token:
+            base["authorization"] = _bearer(cfg.bearer_token)
+        if cfg.cookie:
+            base["cookie"] = cfg.cookie
+        self._use_hmac = not (cfg.bearer_token or cfg.cookie)
+        if self._use_hmac:
+            base["api-key"] = cfg.api_key
+            self._mac = hmac.new(cfg.api_secret.encode(), digestmod=hashlib.sha256)
+        self._base_headers = base
+        self._base_post_empty = {**base, "content-length": "0"}
+        self._base_post_json = {**base, "content-type": "application/json"}
+        common = ["-H", "accept: application/json, text/plain, */*",
+                  "-H", "accept-language: ja;q=0.5",
+                  "-H", f"authorization: {_bearer(cfg.bearer_token)}"]
+        tail: list = []
+        for k, v in _CURL_HEADERS:
+            tail += ["-H", f"{k}: {v}"]
+        self._curl_get = common + tail
+        self._curl_post_empty = common + ["-H", "content-length: 0"] + tail
+        self._curl_post_json = common + ["-H", "content-type: application/json;charset=UTF-8"] + tail
+
+    def _throttle(self, path: str) -> None:
+        if self.limiter is not None:
+            self.limiter.acquire_blocking("fgrd", *_endpoint(path))
+
     # NOTE: 署名形式は未確定。観測後に実装を差し替える。
     def _sign(self, method: str, path: str, body: str, ts: str) -> str:
-        payload = (method.upper() + path + body + ts).encode()
-        return hmac.new(self.cfg.api_secret.encode(), payload, hashlib.sha256).hexdigest()
+        m = self._mac.copy()
+        m.update((method.upper() + path + body + ts).encode())
+        return m.hexdigest()
 
     def _headers(self, method: str, path: str, body: str = "") -> Dict[str, str]:
-        # 優先度: Bearer -> Cookie -> HMAC 署名
-        headers: Dict[str, str] = {
-            "accept": "application/json, text/plain, */*",
-            "accept-language": "ja;q=0.5",
-            "accept-encoding": "gzip, deflate, br, zstd",
-            "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            "lang": "en",
-            "x-requested-with": "XMLHttpRequest",
-            "Origin": "https://btcfgrd.com",
-            "Referer": "https://btcfgrd.com/",
-            "sec-ch-ua": '"Chromium";v="124", "Brave";v="124", "Not-A.Brand";v="99"',
-            "sec-ch-ua-mobile": "?0",
-            "sec-ch-ua-platform": '"macOS"',
-            "sec-fetch-dest": "empty",
-            "sec-fetch-mode": "cors",
-            "sec-fetch-site": "cross-site",
-            "sec-gpc": "1",
-            "priority": "u=1, i",
-        }
-        if self.cfg.bearer_token:
-            tok = self.cfg.bearer_token.strip()
-            # APIは小文字の 'bearer ' を使用しているため合わせる
-            if tok.lower().startswith("bearer "):
-                headers["authorization"] = tok
-            else:
-                headers["authorization"] = f"bearer {tok}"
-        if self.cfg.cookie:
-            headers["cookie"] = self.cfg.cookie
         if method.upper() == "POST":
             # 空ボディPOSTは content-length:0 のみ（content-typeは付与しない）
-            if body == "":
-                headers["content-length"] = "0"
-            else:
-                headers["content-type"] = "application/json"
-        ts = str(int(time.time() * 1000))
-        sig = self._sign(method, path, body, ts)
-        headers.update({
-            "api-key": self.cfg.api_key,
-            "api-sign": sig,
-            "api-ts": ts,
-        })
+            headers = (self._base_post_empty if body == "" else self._base_post_json).copy()
+        else:
+            headers = self._base_headers.copy()
+        if self._use_hmac:
+            ts = str(int(time.time() * 1000))
+            headers["api-sign"] = self._sign(method, path, body, ts)
+            headers["api-ts"] = ts
         return headers
 
     def get_balances(self) -> Dict[str, Any]:
@@ -88,73 +154,28 @@ class FGRDClient:
         path = "/api/user/fundAccount"
         return self._curl_post_json(path)
 
-    def _curl_post_json(self, path: str) -> Dict[str, Any]:
-        url = self.cfg.base_url + path
-        auth = self.cfg.bearer_token.strip()
-        if not auth.lower().startswith("bearer "):
-            auth = f"bearer {auth}"
-        cmd = [
-            "curl", url,
-            "-s",
-            "-X", "POST",
-            "-H", "accept: application/json, text/plain, */*",
-            "-H", "accept-language: ja;q=0.5",
-            "-H", f"authorization: {auth}",
-            "-H", "content-length: 0",
-            "-H", "lang: en",
-            "-H", "origin: https://btcfgrd.com",
-            "-H", "priority: u=1, i",
-            "-H", "referer: https://btcfgrd.com/",
-            "-H", 'sec-ch-ua: "Chromium";v="124", "Brave";v="124", "Not-A.Brand";v="99"',
-            "-H", "sec-ch-ua-mobile: ?0",
-            "-H", 'sec-ch-ua-platform: "macOS"',
-            "-H", "sec-fetch-dest: empty",
-            "-H", "sec-fetch-mode: cors",
-            "-H", "sec-fetch-site: cross-site",
-            "-H", "sec-gpc: 1",
-            "-H", "user-agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            "-H", "x-requested-with: XMLHttpRequest",
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+    def _run_curl(self, cmd: List[str]) -> Dict[str, Any]:
+        # stdout はバイト列のまま orjson に渡す（str へのデコードを挟まない）
+        result = subprocess.run(cmd, capture_output=True)
         if result.returncode != 0:
-            raise RuntimeError(f"curl failed: {result.returncode}: {result.stderr}")
+            raise RuntimeError(f"curl failed: {result.returncode}: {result.stderr.decode(errors='replace')}")
         try:
-            return json.loads(result.stdout)
-        except json.JSONDecodeError:
-            raise RuntimeError(f"invalid json: {result.stdout[:200]}")
+            return orjson.loads(result.stdout)
+        except orjson.JSONDecodeError:
+            raise RuntimeError(f"invalid json: {result.stdout[:200]!r}")
+
+    def _curl_post_json(self, path: str) -> Dict[str, Any]:
+        self._throttle(path)
+        return self._run_curl(["curl", self.cfg.base_url + path, "-s", "-X", "POST", *self._curl_post_empty])
 
     def _curl_get_json(self, path: str) -> Dict[str, Any]:
-        url = self.cfg.base_url + path
-        auth = self.cfg.bearer_token.strip()
-        if not auth.lower().startswith("bearer "):
-            auth = f"bearer {auth}"
-        cmd = [
-            "curl", url,
-            "-s",
-            "-H", "accept: application/json, text/plain, */*",
-            "-H", "accept-language: ja;q=0.5",
-            "-H", f"authorization: {auth}",
-            "-H", "lang: en",
-            "-H", "origin: https://btcfgrd.com",
-            "-H", "priority: u=1, i",
-            "-H", "referer: https://btcfgrd.com/",
-            "-H", 'sec-ch-ua: "Chromium";v="124", "Brave";v="124", "Not-A.Brand";v="99"',
-            "-H", "sec-ch-ua-mobile: ?0",
-            "-H", 'sec-ch-ua-platform: "macOS"',
-            "-H", "sec-fetch-dest: empty",
-            "-H", "sec-fetch-mode: cors",
-            "-H", "sec-fetch-site: cross-site",
-            "-H", "sec-gpc: 1",
-            "-H", "user-agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            "-H", "x-requested-with: XMLHttpRequest",
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            raise RuntimeError(f"curl failed: {result.returncode}: {result.stderr}")
-        try:
-            return json.loads(result.stdout)
-        except json.JSONDecodeError:
-            raise RuntimeError(f"invalid json: {result.stdout[:200]}")
+        self._throttle(path)
+        return self._run_curl(["curl", self.cfg.base_url + path, "-s", *self._curl_get])
+
+    def _curl_post_body(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        self._throttle(path)
+        return self._run_curl(["curl", self.cfg.base_url + path, "-s", "-X", "POST", *self._curl_post_json,
+                               "--data-raw", orjson.dumps(body).decode()])
 
     # --- Entrust list (open orders) ---
     def get_current_entrust(self, page: int = 1) -> Dict[str, Any]:
@@ -169,94 +190,152 @@ class FGRDClient:
         order_type: 1=Limit（暫定。変更があれば差し替え）
         amount: 契約数量（ユーザー提供情報で 1=1BTC 分）
         """
-        path = "/api/contract/openPosition"
-        url = self.cfg.base_url + path
-        auth = self.cfg.bearer_token.strip()
-        if not auth.lower().startswith("bearer "):
-            auth = f"bearer {auth}"
-        payload = {
-            "side": int(side),
-            "symbol": symbol,
-            "type": int(order_type),
-            "entrust_price": str(price),
-            "amount": amount,
-            "lever_rate": str(lever_rate),
-        }
-        cmd = [
-            "curl", url, "-s", "-X", "POST",
-            "-H", "accept: application/json, text/plain, */*",
-            "-H", "accept-language: ja;q=0.5",
-            "-H", f"authorization: {auth}",
-            "-H", "content-type: application/json;charset=UTF-8",
-            "-H", "lang: en",
-            "-H", "origin: https://btcfgrd.com",
-            "-H", "priority: u=1, i",
-            "-H", "referer: https://btcfgrd.com/",
-            "-H", 'sec-ch-ua: "Chromium";v="124", "Brave";v="124", "Not-A.Brand";v="99"',
-            "-H", "sec-ch-ua-mobile: ?0",
-            "-H", 'sec-ch-ua-platform: "macOS"',
-            "-H", "sec-fetch-dest: empty",
-            "-H", "sec-fetch-mode: cors",
-            "-H", "sec-fetch-site: cross-site",
-            "-H", "sec-gpc: 1",
-            "-H", "user-agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            "-H", "x-requested-with: XMLHttpRequest",
-            "--data-raw", json.dumps(payload)
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            raise RuntimeError(f"curl failed: {result.returncode}: {result.stderr}")
-        try:
-            return json.loads(result.stdout)
-        except json.JSONDecodeError:
-            raise RuntimeError(f"invalid json: {result.stdout[:200]}")
+        return self._curl_post_body("/api/contract/openPosition",
+                                    _order_payload(symbol, side, price, amount, lever_rate, order_type))
 
     def cancel_order(self, *, entrust_id: int | str | None = None, order_no: str | None = None, id: str | None = None,
                      client_order_id: str | None = None, symbol: str | None = None) -> Dict[str, Any]:
         """Cancel order via POST /api/contract/cancelEntrust.
         未確定なキー名に対応するため、order_no / id / client_order_id のいずれかを受け取り、存在するキーで送る。
         """
-        path = "/api/contract/cancelEntrust"
-        url = self.cfg.base_url + path
-        auth = self.cfg.bearer_token.strip()
-        if not auth.lower().startswith("bearer "):
-            auth = f"bearer {auth}"
-        body: Dict[str, Any] = {}
-        if entrust_id is not None:
-            body["entrust_id"] = int(entrust_id)
-        if order_no:
-            body["order_no"] = order_no
-        if id:
-            body["id"] = id
-        if client_order_id:
-            body["clientOrderId"] = client_order_id
-        if symbol:
-            body["symbol"] = symbol
-        cmd = [
-            "curl", url, "-s", "-X", "POST",
-            "-H", "accept: application/json, text/plain, */*",
-            "-H", "accept-language: ja;q=0.5",
-            "-H", f"authorization: {auth}",
-            "-H", "content-type: application/json;charset=UTF-8",
-            "-H", "lang: en",
-            "-H", "origin: https://btcfgrd.com",
-            "-H", "priority: u=1, i",
-            "-H", "referer: https://btcfgrd.com/",
-            "-H", 'sec-ch-ua: "Chromium";v="124", "Brave";v="124", "Not-A.Brand";v="99"',
-            "-H", "sec-ch-ua-mobile: ?0",
-            "-H", 'sec-ch-ua-platform: "macOS"',
-            "-H", "sec-fetch-dest: empty",
-            "-H", "sec-fetch-mode: cors",
-            "-H", "sec-fetch-site: cross-site",
-            "-H", "sec-gpc: 1",
-            "-H", "user-agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            "-H", "x-requested-with: XMLHttpRequest",
-            "--data-raw", json.dumps(body or {"noop": True})
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            raise RuntimeError(f"curl failed: {result.returncode}: {result.stderr}")
+        body = _cancel_payload(entrust_id, order_no, id, client_order_id, symbol)
+        return self._curl_post_body("/api/contract/cancelEntrust", body or {"noop": True})
+
+
+def _order_payload(symbol: str, side: int, price: str | float, amount: int | float,
+                   lever_rate: int | str, order_type: int) -> Dict[str, Any]:
+    return {
+        "side": int(side),
+        "symbol": symbol,
+        "type": int(order_type),
+        "entrust_price": str(price),
+        "amount": amount,
+        "lever_rate": str(lever_rate),
+    }
+
+
+def _cancel_payload(entrust_id: int | str | None, order_no: str | None, id: str | None,
+                    client_order_id: str | None, symbol: str | None) -> Dict[str, Any]:
+    body: Dict[str, Any] = {}
+    if entrust_id is not None:
+        body["entrust_id"] = int(entrust_id)
+    if order_no:
+        body["order_no"] = order_no
+    if id:
+        body["id"] = id
+    if client_order_id:
+        body["clientOrderId"] = client_order_id
+    if symbol:
+        body["symbol"] = symbol
+    return body
+
+
+class AsyncFGRDClient:
+    """asyncio版 FGRDClient。
+
+    FGRDClient と同じメソッド名/戻り値（dict）を持ち、1本の httpx.AsyncClient
+    （keep-alive コネクションプール）を共有する。独立したリクエストは
+    get_account_snapshot / get_entrust_pages / cancel_and_requery で並列発行する。
+    """
+
+    def __init__(self, cfg: FGRDConfig, max_connections: int = 8, limiter: RateLimiter | None = None,
+                 transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self.cfg = cfg
+        self.limiter = limiter
+        self._build_templates()
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.client = httpx.AsyncClient(base_url=cfg.base_url, timeout=10.0, http2=True,
+                                        limits=limits, transport=transport)
+
+    # ヘッダテンプレート/署名は同期版と共通
+    _build_templates = FGRDClient._build_templates
+    _sign = FGRDClient._sign
+    _headers = FGRDClient._headers
+
+    async def __aenter__(self) -> 'AsyncFGRDClient':
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def _request_raw(self, method: str, path: str, payload: Dict[str, Any] | None = None) -> bytes:
+        if self.limiter is not None:
+            await self.limiter.acquire("fgrd", *_endpoint(path))
+        body = orjson.dumps(payload) if payload is not None else b""
+        headers = self._headers(method, path, body.decode())
+        resp = await self.client.request(method, path, headers=headers, content=body or None)
+        if resp.status_code >= 400:
+            # エラーページ（HTML など）を JSON として読まない
+            raise RuntimeError(f"fgrd http {resp.status_code} {method} {path}: {resp.content[:200]!r}")
+        return resp.content
+
+    async def _request_json(self, method: str, path: str, payload: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        raw = await self._request_raw(method, path, payload)
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            raise RuntimeError(f"invalid json: {raw[:200]!r}")
+
+    async def _request_model(self, method: str, path: str, decode: Any) -> Any:
+        raw = await self._request_raw(method, path)
         try:
-            return json.loads(result.stdout)
-        except json.JSONDecodeError:
-            raise RuntimeError(f"invalid json: {result.stdout[:200]}")
+            return decode(raw)
+        except orjson.JSONDecodeError:
+            raise RuntimeError(f"invalid json: {raw[:200]!r}")
+
+    async def get_balances(self) -> Dict[str, Any]:
+        return await self._request_json("GET", "/api/wallet/accounts")
+
+    async def get_positions(self, symbol: Optional[str] = None) -> Dict[str, Any]:
+        return await self._request_json("POST", "/api/user/personalAssets")
+
+    async def get_fund_account(self) -> Dict[str, Any]:
+        return await self._request_json("POST", "/api/user/fundAccount")
+
+    async def fetch_personal_assets(self) -> PersonalAssets:
+        """personalAssets を PersonalAssets（建玉つき）にデコードして返す。"""
+        return await self._request_model("POST", "/api/user/personalAssets", decode_personal_assets)
+
+    async def get_current_entrust(self, page: int = 1) -> Dict[str, Any]:
+        return await self._request_json("GET", f"/api/contract/getCurrentEntrust?page={page}")
+
+    async def fetch_entrust_page(self, page: int = 1) -> EntrustPage:
+        """getCurrentEntrust を EntrustPage にデコードして返す。"""
+        return await self._request_model("GET", f"/api/contract/getCurrentEntrust?page={page}", decode_entrust_page)
+
+    async def create_limit_order(self, symbol: str, side: int, price: str | float, amount: int | float,
+                                 lever_rate: int | str = 25, order_type: int = 1) -> Dict[str, Any]:
+        """Create a limit order (FGRDClient.create_limit_order と同じ payload)。"""
+        return await self._request_json("POST", "/api/contract/openPosition",
+                                        _order_payload(symbol, side, price, amount, lever_rate, order_type))
+
+    async def cancel_order(self, *, entrust_id: int | str | None = None, order_no: str | None = None, id: str | None = None,
+                           client_order_id: str | None = None, symbol: str | None = None) -> Dict[str, Any]:
+        """Cancel order via POST /api/contract/cancelEntrust（キー名の扱いは同期版と同じ）。"""
+        body = _cancel_payload(entrust_id, order_no, id, client_order_id, symbol)
+        return await self._request_json("POST", "/api/contract/cancelEntrust", body or {"noop": True})
+
+    # --- 並列 fan-out ---
+    async def get_account_snapshot(self) -> AccountSnapshot:
+        """accounts / fund_account / personal_assets を同時に取得し、AccountSnapshot にまとめる。"""
+        ts = time.time()
+        acc, fa, pa = await asyncio.gather(
+            self._request_model("GET", "/api/wallet/accounts", decode_accounts),
+            self._request_model("POST", "/api/user/fundAccount", decode_fund_account),
+            self._request_model("POST", "/api/user/personalAssets", decode_personal_assets),
+        )
+        return AccountSnapshot(ts, acc, fa, pa)
+
+    async def get_entrust_pages(self, pages: Iterable[int]) -> List[EntrustPage]:
+        """複数ページの getCurrentEntrust を同時に取得する（ページ順で返す）。"""
+        return list(await asyncio.gather(*(self.fetch_entrust_page(page=p) for p in pages)))
+
+    async def cancel_and_requery(self, entrust_ids: Sequence[int | str], symbol: str | None = None,
+                                 pages: Iterable[int] = (1,)) -> Tuple[List[Dict[str, Any]], List[EntrustPage]]:
+        """複数注文を同時にキャンセルし、その後 entrust ページを同時に再取得する。"""
+        cancels = await asyncio.gather(*(self.cancel_order(entrust_id=e, symbol=symbol) for e in entrust_ids))
+        entrust = await self.get_entrust_pages(pages)
+        return list(cancels), entrust
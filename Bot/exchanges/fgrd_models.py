@@ -0,0 +1,194 @@
+from __future__ import annotations
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Tuple
+
+import orjson
+
+# FGRD REST レスポンスの型付きモデル。
+# orjson でバイト列から直接デコードし、Bot が使うフィールドだけを slots の dataclass に詰める
+# （アイコン URL や出金上限などの未使用フィールドは保持しない）。
+
+
+def _payload(raw: bytes | str | Dict[str, Any]) -> Dict[str, Any]:
+    data = orjson.loads(raw) if isinstance(raw, (bytes, str)) else raw
+    code = data.get('code')
+    if code is not None and int(code) != 200:
+        raise RuntimeError(f"fgrd api error: {code}: {data.get('message')}")
+    return data
+
+
+def _f(v: Any) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@dataclass(slots=True)
+class WalletAccount:
+    id: int
+    name: str
+    account: str
+
+
+@dataclass(slots=True)
+class FundBalance:
+    coin_name: str
+    coin_id: int
+    usable_balance: float
+    freeze_balance: float
+    valuation: float
+    usd_estimate: float
+
+
+@dataclass(slots=True)
+class AssetPosition:
+    symbol: str
+    side: int              # 1 = ロング, 2 = ショート（建玉 0 なら何でもよい）
+    hold_position: float   # 読めなければ NaN
+    avg_price: float
+
+    @property
+    def signed(self) -> float | None:
+        """符号付きの建玉。数量か方向が読めなければ None。"""
+        if self.hold_position != self.hold_position:
+            return None
+        if self.hold_position == 0:
+            return 0.0
+        if self.side not in (1, 2):
+            return None
+        return self.hold_position if self.side == 1 else -self.hold_position
+
+
+@dataclass(slots=True)
+class PersonalAssets:
+    values: Dict[str, float]             # data 直下の数値（total_assets_usd など）
+    positions: List[AssetPosition] | None   # data.positions が無い/配列でなければ None
+    # スキーマ未確定の入れ子（資産ごとの一覧など）は account_snapshot.csv から落とさないようそのまま持つ
+    nested: Dict[str, Any]
+
+    def net_position(self, symbol: str) -> float | None:
+        """symbol の建玉（ロング +, ショート -）。応答に symbol の行が無い・読めない行があれば None（建玉 0 とはみなさない）。"""
+        rows = [p.signed for p in self.positions or () if p.symbol == symbol]
+        if not rows or any(v is None for v in rows):
+            return None
+        return sum(rows)
+
+
+@dataclass(slots=True)
+class EntrustOrder:
+    id: str
+    order_no: str
+    symbol: str
+    side: int
+    type: int
+    entrust_price: str
+    amount: float
+    lever_rate: int
+    status: int
+
+
+@dataclass(slots=True)
+class EntrustPage:
+    current_page: int
+    last_page: int
+    total: int
+    items: List[EntrustOrder]
+
+
+@dataclass(slots=True)
+class AccountSnapshot:
+    ts: float
+    accounts: List[WalletAccount]
+    funds: List[FundBalance]
+    personal: PersonalAssets
+
+    def fund(self, coin_name: str) -> FundBalance | None:
+        for b in self.funds:
+            if b.coin_name == coin_name:
+                return b
+        return None
+
+    def to_json_columns(self) -> Tuple[str, str, str]:
+        """account_snapshot.csv 用のコンパクトな JSON 3列。"""
+        return (orjson.dumps([asdict(a) for a in self.accounts]).decode(),
+                orjson.dumps([asdict(b) for b in self.funds]).decode(),
+                orjson.dumps({**self.personal.values, **self.personal.nested,
+                              'positions': [asdict(p) for p in self.personal.positions or ()]}).decode())
+
+
+def decode_response(raw: bytes | str | Dict[str, Any]) -> Dict[str, Any]:
+    """モデルの無いレスポンス（openPosition / cancelEntrust など）。code != 200 なら RuntimeError。"""
+    return _payload(raw)
+
+
+def decode_accounts(raw: bytes | str | Dict[str, Any]) -> List[WalletAccount]:
+    return [WalletAccount(int(a.get('id', 0)), str(a.get('name', '')), str(a.get('account', '')))
+            for a in _payload(raw).get('data') or []]
+
+
+def decode_fund_account(raw: bytes | str | Dict[str, Any]) -> List[FundBalance]:
+    lst = (_payload(raw).get('data') or {}).get('list') or []
+    return [FundBalance(str(b.get('coin_name', '')), int(b.get('coin_id', 0)), _f(b.get('usable_balance')),
+                        _f(b.get('freeze_balance')), _f(b.get('valuation')), _f(b.get('usd_estimate')))
+            for b in lst]
+
+
+def decode_personal_assets(raw: bytes | str | Dict[str, Any]) -> PersonalAssets:
+    """personalAssets の応答。
+
+    建玉は data.positions = [{symbol, side (1 ロング / 2 ショート), hold_position, avg_price}, ...] を想定している。
+    この形は実 API では確かめられておらず、mock.server が返す形に合わせたもの。キーが無い・配列でなければ
+    positions=None、数量や方向が読めない行は hold_position=NaN にして、net_position() が None を返すようにする
+    （OrderTracker.confirm はそのとき約定/取消を決めない）。
+    """
+    data = _payload(raw).get('data') or {}
+    if not isinstance(data, dict):
+        return PersonalAssets({}, None, {})
+    rows = data.get('positions')
+    positions = None
+    if isinstance(rows, list):
+        positions = [AssetPosition(str(p.get('symbol', '')), _side(p.get('side')), _f_nan(p.get('hold_position')),
+                                   _f(p.get('avg_price')))
+                     for p in rows if isinstance(p, dict)]
+    values = {k: _f(v) for k, v in data.items() if isinstance(v, (int, float, str)) and _is_num(v)}
+    nested = {k: v for k, v in data.items() if isinstance(v, (dict, list)) and k != 'positions'}
+    return PersonalAssets(values, positions, nested)
+
+
+def _f_nan(v: Any) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+def _side(v: Any) -> int:
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _is_num(v: Any) -> bool:
+    try:
+        float(v)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def decode_entrust_page(raw: bytes | str | Dict[str, Any]) -> EntrustPage:
+    page = _payload(raw).get('data') or {}
+    items = []
+    for it in page.get('data') or []:
+        oid = it.get('id') or it.get('entrust_id')
+        if oid is None:
+            continue
+        items.append(EntrustOrder(
+            id=str(oid), order_no=str(it.get('order_no', '')), symbol=str(it.get('symbol', '')),
+            side=int(it.get('side', 0)), type=int(it.get('type', 0) or 0), entrust_price=str(it.get('entrust_price', '')),
+            amount=_f(it.get('amount')), lever_rate=int(_f(it.get('lever_rate'))), status=int(it.get('status', 1)),
+        ))
+    return EntrustPage(int(page.get('current_page', 1) or 1), int(page.get('last_page', 1) or 1),
+                       int(page.get('total', len(items)) or len(items)), items)
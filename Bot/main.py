@@ -1,5 +1,5 @@
 from __future__ import annotations
-import time
+import asyncio
 import yaml
 from pathlib import Path
 
@@ -15,14 +15,9 @@ def main() -> None:
     cfg = load_config(Path(__file__).parent / 'config.yaml')
     engine = Engine(cfg)
     try:
-        engine.start()
-        while True:
-            engine.tick()
-            time.sleep(1)
+        asyncio.run(engine.run(interval_sec=1.0))
     except KeyboardInterrupt:
         pass
-    finally:
-        engine.stop()
 
 
 if __name__ == '__main__':
@@ -0,0 +1 @@
+# mock exchange package
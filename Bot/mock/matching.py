@@ -0,0 +1,130 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+import itertools
+import random
+import time
+
+
+@dataclass
+class MockOrder:
+    order_id: int
+    venue: str
+    symbol: str
+    side: str                 # 'buy' | 'sell'
+    qty: float
+    price: float | None       # None = 成行
+    tif: str = 'GTC'          # GTC | IOC
+    reduce_only: bool = False
+    link_id: str = ''
+    status: str = 'New'       # New | Filled | Cancelled | Rejected
+    filled_qty: float = 0.0
+    avg_price: float = 0.0
+    created_ms: int = field(default_factory=lambda: int(time.time() * 1000))
+    updated_ms: int = 0
+
+
+@dataclass
+class MockPosition:
+    size: float = 0.0         # 符号付き（ロング +）
+    avg_price: float = 0.0
+
+    def apply(self, side: str, qty: float, price: float) -> None:
+        signed = qty if side == 'buy' else -qty
+        new = self.size + signed
+        if self.size == 0 or (self.size > 0) == (signed > 0):
+            # 同方向の積み増し: 平均建値を更新
+            self.avg_price = (self.avg_price * abs(self.size) + price * qty) / abs(new) if new else 0.0
+        elif new != 0 and (new > 0) != (self.size > 0):
+            # ドテン: 残りは新規建て
+            self.avg_price = price
+        self.size = new
+        if self.size == 0:
+            self.avg_price = 0.0
+
+
+class MatchingEngine:
+    """venue ごとの最良気配（mid ± half_spread）に対して注文を約定させる簡易マッチングエンジン。
+
+    - 成行 / 気配を跨ぐ指値は即時約定（taker）
+    - 跨がない指値は GTC なら板に残り、mid の更新で跨いだ時点で約定。IOC は取消
+    - 約定/状態変化は on_event(venue, order) で通知する（WS プッシュ用）
+    """
+
+    def __init__(self, mid: float = 60000.0, half_spread: float = 0.5, vol_per_tick: float = 2.0,
+                 seed: int | None = None) -> None:
+        self.mid: Dict[str, float] = {}
+        self.default_mid = mid
+        self.half_spread = half_spread
+        self.vol_per_tick = vol_per_tick
+        self.rng = random.Random(seed)
+        self.orders: Dict[int, MockOrder] = {}
+        self.resting: Dict[str, List[MockOrder]] = {}
+        self.positions: Dict[str, Dict[str, MockPosition]] = {}
+        self.on_event: Optional[Callable[[str, MockOrder], None]] = None
+        self._ids = itertools.count(180000)
+
+    def quote(self, venue: str) -> tuple:
+        m = self.mid.setdefault(venue, self.default_mid)
+        return m - self.half_spread, m + self.half_spread
+
+    def position(self, venue: str, symbol: str) -> MockPosition:
+        return self.positions.setdefault(venue, {}).setdefault(symbol, MockPosition())
+
+    def submit(self, venue: str, symbol: str, side: str, qty: float, price: float | None,
+               tif: str = 'GTC', reduce_only: bool = False, link_id: str = '') -> MockOrder:
+        o = MockOrder(next(self._ids), venue, symbol, side, float(qty), price, tif, reduce_only, link_id)
+        self.orders[o.order_id] = o
+        if reduce_only:
+            pos = self.position(venue, symbol).size
+            if pos == 0 or (pos > 0) == (side == 'buy'):
+                return self._finish(o, 'Rejected')
+            o.qty = min(o.qty, abs(pos))
+        bid, ask = self.quote(venue)
+        touch = ask if side == 'buy' else bid
+        if price is None or (side == 'buy' and price >= ask) or (side == 'sell' and price <= bid):
+            return self._fill(o, touch)
+        if tif == 'IOC':
+            return self._finish(o, 'Cancelled')
+        self.resting.setdefault(venue, []).append(o)
+        self._emit(o)
+        return o
+
+    def cancel(self, order_id: int) -> Optional[MockOrder]:
+        o = self.orders.get(order_id)
+        if o is None or o.status != 'New':
+            return None
+        self.resting[o.venue].remove(o)
+        return self._finish(o, 'Cancelled')
+
+    def open_orders(self, venue: str) -> List[MockOrder]:
+        return list(self.resting.get(venue, ()))
+
+    def step(self) -> None:
+        """mid をランダムウォークさせ、跨いだ指値を約定させる。"""
+        for venue in list(self.mid):
+            self.set_mid(venue, self.mid[venue] + self.rng.gauss(0.0, self.vol_per_tick))
+
+    def set_mid(self, venue: str, mid: float) -> None:
+        self.mid[venue] = mid
+        bid, ask = self.quote(venue)
+        book = self.resting.get(venue, [])
+        for o in [o for o in book if (o.side == 'buy' and o.price >= ask) or (o.side == 'sell' and o.price <= bid)]:
+            book.remove(o)
+            self._fill(o, o.price)
+
+    def _fill(self, o: MockOrder, price: float) -> MockOrder:
+        o.filled_qty = o.qty
+        o.avg_price = price
+        self.position(o.venue, o.symbol).apply(o.side, o.qty, price)
+        return self._finish(o, 'Filled')
+
+    def _finish(self, o: MockOrder, status: str) -> MockOrder:
+        o.status = status
+        self._emit(o)
+        return o
+
+    def _emit(self, o: MockOrder) -> None:
+        o.updated_ms = int(time.time() * 1000)
+        if self.on_event is not None:
+            self.on_event(o.venue, o)
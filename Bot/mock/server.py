@@ -0,0 +1,341 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+import argparse
+import asyncio
+import hashlib
+import hmac
+import random
+import time
+
+import orjson
+import websockets
+
+from .matching import MatchingEngine, MockOrder
+
+_REASONS = {200: 'OK', 404: 'Not Found', 429: 'Too Many Requests', 500: 'Internal Server Error'}
+_ENTRUST_PAGE_SIZE = 10
+
+
+@dataclass
+class VenueProfile:
+    latency_ms: float = 5.0     # 片道ではなく応答までの付加遅延
+    jitter_ms: float = 2.0      # 一様分布 ±jitter
+    error_rate: float = 0.0     # HTTP 500 を返す確率
+    throttle_rate: float = 0.0  # HTTP 429 を返す確率
+
+
+class MockExchangeServer:
+    """FGRD / Bybit v5 の REST・Bybit private WS を模したローカルサーバ（asyncio 1ループ）。
+
+    - FGRD: wallet/accounts, personalAssets, fundAccount, getCurrentEntrust, openPosition, cancelEntrust
+    - Bybit: wallet-balance, position/list, order/realtime, order/create, order/cancel + /v5/private WS
+    venue 毎に遅延/ジッタ/エラー注入を設定でき、約定は MatchingEngine で決まる。
+    """
+
+    def __init__(self, engine: MatchingEngine | None = None, fgrd: VenueProfile | None = None,
+                 bybit: VenueProfile | None = None, bybit_key: str = 'mock-key', bybit_secret: str = 'mock-secret',
+                 tick_sec: float = 0.0, seed: int | None = None, fgrd_symbols: Tuple[str, ...] = ('BTC',)) -> None:
+        self.engine = engine or MatchingEngine(seed=seed)
+        self.profiles = {'fgrd': fgrd or VenueProfile(), 'bybit': bybit or VenueProfile()}
+        self.bybit_key = bybit_key
+        self.bybit_secret = bybit_secret
+        self.tick_sec = tick_sec
+        self.fgrd_symbols = fgrd_symbols   # personalAssets に建玉 0 でも載せる銘柄
+        self.rng = random.Random(seed)
+        self.request_count: Dict[str, int] = {}
+        self._ws_clients: Set[Any] = set()
+        self._servers: List[Any] = []
+        self._ticker: asyncio.Task | None = None
+        self.http_url = ''
+        self.ws_url = ''
+        self.engine.on_event = self._on_order_event
+
+    # --- 起動/停止 ---
+    async def start(self, host: str = '127.0.0.1', http_port: int = 0, ws_port: int = 0) -> 'MockExchangeServer':
+        http = await asyncio.start_server(self._handle_http, host, http_port)
+        ws = await websockets.serve(self._handle_ws, host, ws_port)
+        self._servers = [http, ws]
+        self.http_url = f"http://{host}:{http.sockets[0].getsockname()[1]}"
+        self.ws_url = f"ws://{host}:{list(ws.sockets)[0].getsockname()[1]}/v5/private"
+        if self.tick_sec > 0:
+            self._ticker = asyncio.create_task(self._tick_loop())
+        return self
+
+    async def stop(self) -> None:
+        if self._ticker is not None:
+            self._ticker.cancel()
+        for s in self._servers:
+            s.close()
+            await s.wait_closed()
+
+    async def __aenter__(self) -> 'MockExchangeServer':
+        return await self.start()
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.stop()
+
+    async def _tick_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick_sec)
+            self.engine.step()
+
+    # --- HTTP/1.1（keep-alive） ---
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, _ = line.decode('latin-1').split(' ', 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b'\r\n', b'\n', b''):
+                        break
+                    k, v = h.decode('latin-1').split(':', 1)
+                    headers[k.strip().lower()] = v.strip()
+                n = int(headers.get('content-length') or 0)
+                body = await reader.readexactly(n) if n else b''
+                status, payload, extra = await self._dispatch(method, target, headers, body)
+                data = orjson.dumps(payload)
+                head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", "content-type: application/json",
+                        f"content-length: {len(data)}"] + [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + data)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, target: str, headers: Dict[str, str],
+                        body: bytes) -> Tuple[int, Any, Dict[str, str]]:
+        url = urlsplit(target)
+        path = url.path
+        venue = 'bybit' if path.startswith('/v5/') else 'fgrd'
+        self.request_count[path] = self.request_count.get(path, 0) + 1
+        prof = self.profiles[venue]
+        delay = prof.latency_ms + self.rng.uniform(-prof.jitter_ms, prof.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+        r = self.rng.random()
+        if r < prof.error_rate:
+            return 500, {'code': 500, 'message': 'injected error'}, {}
+        if r < prof.error_rate + prof.throttle_rate:
+            if venue == 'bybit':
+                return 429, {'retCode': 10006, 'retMsg': 'Too many visits!'}, {}
+            return 429, {'code': 429, 'message': 'Too Many Attempts.'}, {}
+        query = dict(parse_qsl(url.query))
+        payload = orjson.loads(body) if body else {}
+        if venue == 'fgrd':
+            handler = self._FGRD_ROUTES.get(path)
+            if handler is None:
+                return 404, {'code': 404, 'message': 'not found'}, {}
+            return 200, handler(self, query, payload), {}
+        handler = self._BYBIT_ROUTES.get(path)
+        if handler is None:
+            return 404, {'retCode': 404, 'retMsg': 'not found'}, {}
+        if not self._bybit_sig_ok(headers, url.query if method == 'GET' else body.decode()):
+            return 200, {'retCode': 10004, 'retMsg': 'error sign!'}, {}
+        rl = {'X-Bapi-Limit': '10', 'X-Bapi-Limit-Status': '9',
+              'X-Bapi-Limit-Reset-Timestamp': str(int(time.time() * 1000) + 1000)}
+        return 200, handler(self, query, payload), rl
+
+    # --- FGRD ---
+    def _fgrd_accounts(self, q: Dict[str, str], p: Dict[str, Any]) -> Dict[str, Any]:
+        return {'code': 200, 'message': 'success', 'data': [
+            {'id': 1, 'name': 'assets', 'account': 'UserWallet'},
+            {'id': 2, 'name': 'Contract account', 'account': 'ContractAccount'},
+        ]}
+
+    def _fgrd_personal_assets(self, q: Dict[str, str], p: Dict[str, Any]) -> Dict[str, Any]:
+        for sym in self.fgrd_symbols:
+            self.engine.position('fgrd', sym)
+        return {'code': 200, 'message': 'success', 'data': {
+            'total_assets_usd': '10000.00',
+            'positions': [{'symbol': sym, 'side': 1 if pos.size >= 0 else 2,
+                           'hold_position': abs(pos.size), 'avg_price': pos.avg_price}
+                          for sym, pos in self.engine.positions.get('fgrd', {}).items()],
+        }}
+
+    def _fgrd_fund_account(self, q: Dict[str, str], p: Dict[str, Any]) -> Dict[str, Any]:
+        return {'code': 200, 'message': 'success', 'data': {'list': [
+            {'usable_balance': 10000.0, 'freeze_balance': 0.0, 'valuation': 10000.0, 'coin_name': 'USDT',
+             'coin_id': 1, 'usd_estimate': '10000.00'},
+        ]}}
+
+    def _fgrd_current_entrust(self, q: Dict[str, str], p: Dict[str, Any]) -> Dict[str, Any]:
+        page = max(1, int(q.get('page', 1)))
+        items = sorted(self.engine.open_orders('fgrd'), key=lambda o: -o.order_id)
+        last = max(1, -(-len(items) // _ENTRUST_PAGE_SIZE))
+        chunk = items[(page - 1) * _ENTRUST_PAGE_SIZE:page * _ENTRUST_PAGE_SIZE]
+        return {'code': 200, 'message': 'success', 'data': {
+            'current_page': page, 'last_page': last, 'per_page': _ENTRUST_PAGE_SIZE, 'total': len(items),
+            'data': [{'id': o.order_id, 'order_no': f"PCB{o.order_id}", 'order_type': 1,
+                      'side': 1 if o.side == 'buy' else 2, 'symbol': o.symbol, 'type': 1,
+                      'entrust_price': o.price, 'amount': o.qty, 'lever_rate': 25, 'status': 1, 'hang_status': 1}
+                     for o in chunk],
+        }}
+
+    def _fgrd_open_position(self, q: Dict[str, str], p: Dict[str, Any]) -> Dict[str, Any]:
+        price = p.get('entrust_price')
+        self.engine.submit('fgrd', str(p.get('symbol', 'BTC')), 'buy' if int(p.get('side', 1)) == 1 else 'sell',
+                           float(p.get('amount', 0)), float(price) if int(p.get('type', 1)) == 1 else None)
+        # 実 API 同様 data は null（entrust_id は一覧から引く）
+        return {'code': 200, 'message': 'Entrust the success', 'data': None}
+
+    def _fgrd_cancel(self, q: Dict[str, str], p: Dict[str, Any]) -> Dict[str, Any]:
+        o = self.engine.cancel(int(p.get('entrust_id', 0) or 0))
+        if o is None:
+            return {'code': 4001, 'message': 'order not found', 'data': None}
+        return {'code': 200, 'message': 'success', 'data': None}
+
+    _FGRD_ROUTES = {
+        '/api/wallet/accounts': _fgrd_accounts,
+        '/api/user/personalAssets': _fgrd_personal_assets,
+        '/api/user/fundAccount': _fgrd_fund_account,
+        '/api/contract/getCurrentEntrust': _fgrd_current_entrust,
+        '/api/contract/openPosition': _fgrd_open_position,
+        '/api/contract/cancelEntrust': _fgrd_cancel,
+    }
+
+    # --- Bybit v5 ---
+    def _bybit_sig_ok(self, headers: Dict[str, str], payload: str) -> bool:
+        ts = headers.get('x-bapi-timestamp', '')
+        pre = ts + headers.get('x-bapi-api-key', '') + headers.get('x-bapi-recv-window', '') + payload
+        expect = hmac.new(self.bybit_secret.encode(), pre.encode(), hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expect, headers.get('x-bapi-sign', ''))
+
+    @staticmethod
+    def _bybit_ok(result: Dict[str, Any]) -> Dict[str, Any]:
+        return {'retCode': 0, 'retMsg': 'OK', 'result': result, 'time': int(time.time() * 1000)}
+
+    @staticmethod
+    def _bybit_order(o: MockOrder) -> Dict[str, Any]:
+        return {
+            'orderId': str(o.order_id), 'orderLinkId': o.link_id, 'symbol': o.symbol, 'category': 'linear',
+            'side': 'Buy' if o.side == 'buy' else 'Sell', 'orderType': 'Market' if o.price is None else 'Limit',
+            'price': '' if o.price is None else str(o.price), 'qty': str(o.qty), 'timeInForce': o.tif,
+            'orderStatus': o.status, 'cumExecQty': str(o.filled_qty), 'avgPrice': str(o.avg_price),
+            'reduceOnly': o.reduce_only, 'createdTime': str(o.created_ms), 'updatedTime': str(o.updated_ms),
+        }
+
+    def _bybit_position(self, symbol: str) -> Dict[str, Any]:
+        pos = self.engine.position('bybit', symbol)
+        return {'symbol': symbol, 'positionIdx': 0, 'side': 'Buy' if pos.size > 0 else ('Sell' if pos.size < 0 else ''),
+                'size': str(abs(pos.size)), 'avgPrice': str(pos.avg_price), 'category': 'linear'}
+
+    def _bybit_wallet(self, q: Dict[str, str], p: Dict[str, Any]) -> Dict[str, Any]:
+        return self._bybit_ok({'list': [{'accountType': q.get('accountType', 'UNIFIED'), 'coin': [
+            {'coin': q.get('coin', 'USDT'), 'walletBalance': '10000', 'availableToWithdraw': '10000'}]}]})
+
+    def _bybit_positions(self, q: Dict[str, str], p: Dict[str, Any]) -> Dict[str, Any]:
+        return self._bybit_ok({'category': 'linear', 'list': [self._bybit_position(q.get('symbol', 'BTCUSDT'))]})
+
+    def _bybit_realtime(self, q: Dict[str, str], p: Dict[str, Any]) -> Dict[str, Any]:
+        return self._bybit_ok({'category': 'linear', 'list': [self._bybit_order(o) for o in self.engine.open_orders('bybit')
+                                                              if o.symbol == q.get('symbol', o.symbol)]})
+
+    def _bybit_history(self, q: Dict[str, str], p: Dict[str, Any]) -> Dict[str, Any]:
+        orders = [o for o in self.engine.orders.values() if o.venue == 'bybit'
+                  and o.symbol == q.get('symbol', o.symbol)
+                  and str(o.order_id) == q.get('orderId', str(o.order_id))
+                  and o.link_id == q.get('orderLinkId', o.link_id)]
+        return self._bybit_ok({'category': 'linear',
+                               'list': [self._bybit_order(o) for o in sorted(orders, key=lambda o: -o.order_id)]})
+
+    def _bybit_create(self, q: Dict[str, str], p: Dict[str, Any]) -> Dict[str, Any]:
+        price = p.get('price')
+        o = self.engine.submit('bybit', p['symbol'], 'buy' if p['side'] == 'Buy' else 'sell', float(p['qty']),
+                               float(price) if p.get('orderType') == 'Limit' and price is not None else None,
+                               tif=p.get('timeInForce', 'GTC'), reduce_only=bool(p.get('reduceOnly')),
+                               link_id=p.get('orderLinkId', ''))
+        return self._bybit_ok({'orderId': str(o.order_id), 'orderLinkId': o.link_id})
+
+    def _bybit_cancel(self, q: Dict[str, str], p: Dict[str, Any]) -> Dict[str, Any]:
+        oid = p.get('orderId')
+        if oid is None and p.get('orderLinkId'):
+            oid = next((o.order_id for o in self.engine.orders.values() if o.link_id == p['orderLinkId']), None)
+        o = self.engine.cancel(int(oid)) if oid is not None else None
+        if o is None:
+            return {'retCode': 110001, 'retMsg': 'order not exists or too late to cancel', 'result': {}}
+        return self._bybit_ok({'orderId': str(o.order_id), 'orderLinkId': o.link_id})
+
+    _BYBIT_ROUTES = {
+        '/v5/account/wallet-balance': _bybit_wallet,
+        '/v5/position/list': _bybit_positions,
+        '/v5/order/realtime': _bybit_realtime,
+        '/v5/order/history': _bybit_history,
+        '/v5/order/create': _bybit_create,
+        '/v5/order/cancel': _bybit_cancel,
+    }
+
+    # --- Bybit private WS ---
+    async def _handle_ws(self, ws: Any, *_: Any) -> None:
+        authed = False
+        try:
+            async for raw in ws:
+                msg = orjson.loads(raw)
+                op = msg.get('op')
+                if op == 'auth':
+                    key, expires, sig = msg.get('args', [None, 0, ''])
+                    expect = hmac.new(self.bybit_secret.encode(), f"GET/realtime{expires}".encode(), hashlib.sha256).hexdigest()
+                    authed = key == self.bybit_key and hmac.compare_digest(expect, str(sig))
+                    await ws.send(orjson.dumps({'success': authed, 'ret_msg': '' if authed else 'auth failed', 'op': 'auth'}))
+                elif op == 'subscribe' and authed:
+                    self._ws_clients.add(ws)
+                    await ws.send(orjson.dumps({'success': True, 'ret_msg': '', 'op': 'subscribe'}))
+                elif op == 'ping':
+                    await ws.send(orjson.dumps({'success': True, 'ret_msg': 'pong', 'op': 'pong'}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._ws_clients.discard(ws)
+
+    def _on_order_event(self, venue: str, o: MockOrder) -> None:
+        if venue != 'bybit' or not self._ws_clients:
+            return
+        now = int(time.time() * 1000)
+        msgs = [{'topic': 'order', 'creationTime': now, 'data': [self._bybit_order(o)]}]
+        if o.status == 'Filled':
+            msgs.append({'topic': 'execution', 'creationTime': now, 'data': [{
+                'orderId': str(o.order_id), 'orderLinkId': o.link_id, 'symbol': o.symbol,
+                'side': 'Buy' if o.side == 'buy' else 'Sell', 'execQty': str(o.filled_qty),
+                'execPrice': str(o.avg_price), 'execTime': str(now)}]})
+            msgs.append({'topic': 'position', 'creationTime': now, 'data': [self._bybit_position(o.symbol)]})
+        delay = self.profiles['bybit']
+        for ws in list(self._ws_clients):
+            for m in msgs:
+                asyncio.get_running_loop().call_later(
+                    max(0.0, delay.latency_ms + self.rng.uniform(-delay.jitter_ms, delay.jitter_ms)) / 2000.0,
+                    lambda ws=ws, data=orjson.dumps(m): asyncio.ensure_future(self._ws_send(ws, data)))
+
+    @staticmethod
+    async def _ws_send(ws: Any, data: bytes) -> None:
+        try:
+            await ws.send(data)
+        except websockets.ConnectionClosed:
+            pass
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    srv = MockExchangeServer(fgrd=VenueProfile(args.latency_ms, args.jitter_ms, args.error_rate),
+                             bybit=VenueProfile(args.latency_ms, args.jitter_ms, args.error_rate),
+                             tick_sec=args.tick_sec, seed=args.seed)
+    await srv.start(args.host, args.http_port, args.ws_port)
+    print(f"http: {srv.http_url}  ws: {srv.ws_url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='FGRD/Bybit mock exchange')
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--http-port', type=int, default=18080)
+    ap.add_argument('--ws-port', type=int, default=18081)
+    ap.add_argument('--latency-ms', type=float, default=5.0)
+    ap.add_argument('--jitter-ms', type=float, default=2.0)
+    ap.add_argument('--error-rate', type=float, default=0.0)
+    ap.add_argument('--tick-sec', type=float, default=0.5)
+    ap.add_argument('--seed', type=int, default=None)
+    asyncio.run(_serve(ap.parse_args()))
@@ -0,0 +1,183 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+import hashlib
+import io
+import os
+
+import numpy as np
+import orjson
+import pandas as pd
+
+# CSV（compare_10s.csv など）を列ごとのバイナリに変換して保存し、以降は np.memmap で読む。
+# キャッシュは 元ファイルのパス + サイズ + mtime で識別し、末尾に追記されただけなら差分行だけを変換して追記する。
+#
+#   <root>/<sha1(path)[:16]>/meta.json   ... 元ファイルの指紋, 変換済みバイト位置, 行数, 列の dtype
+#   <root>/<sha1(path)[:16]>/<列名>.bin  ... 生の列データ（timestamp 列は int64 ns UTC, 他は float64）
+
+DEFAULT_ROOT = Path(__file__).resolve().parents[1] / 'cache' / 'columns'
+TIME_COLUMN = 'timestamp'
+_CHUNK_BYTES = 64 << 20
+_SAMPLE_BYTES = 4096   # 追記判定用に、変換済み範囲の先頭・末尾と途中のブロックをハッシュしておく
+_SAMPLE_BLOCKS = 16
+
+
+@dataclass
+class CachedTable:
+    source: Path
+    rows: int
+    columns: Dict[str, np.ndarray]   # 読み取り専用 memmap
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def ts(self) -> np.ndarray:
+        """timestamp 列を datetime64[ns]（UTC, tz なし）として返す。"""
+        return self.columns[TIME_COLUMN].view('datetime64[ns]')
+
+    def to_frame(self, columns: Sequence[str] | None = None) -> pd.DataFrame:
+        names = list(columns or self.columns)
+        return pd.DataFrame({n: (self.ts() if n == TIME_COLUMN else self.columns[n]) for n in names})
+
+
+def _fingerprint(path: Path) -> Dict[str, Any]:
+    st = path.stat()
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _sample_hash(path: Path, offset: int) -> str:
+    """[0, offset) の先頭から末尾まで等間隔に取った _SAMPLE_BLOCKS 個のブロックのハッシュ（短ければ全体）。"""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        if offset <= _SAMPLE_BLOCKS * _SAMPLE_BYTES:
+            h.update(f.read(offset))
+        else:
+            for start in np.linspace(0, offset - _SAMPLE_BYTES, _SAMPLE_BLOCKS).astype(np.int64):
+                f.seek(int(start))
+                h.update(f.read(_SAMPLE_BYTES))
+    return h.hexdigest()
+
+
+def _parse_block(block: bytes, header: List[str]) -> Dict[str, np.ndarray]:
+    # 数値列は C パーサの推論に任せ、非数値が混じって object になった列だけ to_numeric で NaN に落とす
+    df = pd.read_csv(io.BytesIO(block), header=None, names=header, dtype={TIME_COLUMN: str})
+    out: Dict[str, np.ndarray] = {}
+    for name in header:
+        if name == TIME_COLUMN:
+            ts = pd.to_datetime(df[name], utc=True, format='ISO8601', errors='coerce').dt.tz_localize(None)
+            out[name] = ts.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        else:
+            col = df[name]
+            if col.dtype.kind not in 'fi':
+                col = pd.to_numeric(col, errors='coerce')
+            out[name] = col.to_numpy(dtype=np.float64)
+    return out
+
+
+def _iter_blocks(path: Path, start: int, end: int) -> Iterator[Tuple[bytes, int]]:
+    """[start, end) を改行位置で区切ったブロックにして (bytes, ブロック終端の位置) を返す。末尾の未完行は含めない。"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        pos = start
+        carry = b''
+        while pos < end:
+            buf = f.read(min(_CHUNK_BYTES, end - pos))
+            if not buf:
+                break
+            pos += len(buf)
+            buf = carry + buf
+            cut = buf.rfind(b'\n') + 1
+            carry = buf[cut:]
+            if cut:
+                yield buf[:cut], pos - len(carry)
+
+
+class ColumnCache:
+    """CSV → 列バイナリの変換キャッシュ。"""
+
+    def __init__(self, root: Path | None = None) -> None:
+        self.root = Path(root or DEFAULT_ROOT)
+
+    def _dir(self, source: Path) -> Path:
+        return self.root / hashlib.sha1(str(source).encode()).hexdigest()[:16]
+
+    def load(self, source: Path | str) -> CachedTable:
+        source = Path(source).resolve()
+        d = self._dir(source)
+        meta_path = d / 'meta.json'
+        fp = _fingerprint(source)
+        meta = orjson.loads(meta_path.read_bytes()) if meta_path.exists() else None
+        if meta is not None and (meta['size'], meta['mtime_ns']) != (fp['size'], fp['mtime_ns']):
+            # 伸びただけ（サイズが増え、変換済み範囲の標本ブロックが一致）なら差分を追記、それ以外は作り直し。
+            # サイズが増えずに mtime だけ変わったものはその場で書き換えられたとみなす
+            grown = (fp['size'] > meta['size'] and fp['size'] >= meta['offset']
+                     and _sample_hash(source, meta['offset']) == meta.get('sample_hash'))
+            meta = self._extend(source, d, meta, fp) if grown else None
+        if meta is None:
+            meta = self._build(source, d, fp)
+        return self._open(source, d, meta)
+
+    def _build(self, source: Path, d: Path, fp: Dict[str, Any]) -> Dict[str, Any]:
+        d.mkdir(parents=True, exist_ok=True)
+        with open(source, 'rb') as f:
+            header_line = f.readline()
+        header = [h.strip() for h in header_line.decode().strip().split(',')]
+        dtypes = {n: ('<i8' if n == TIME_COLUMN else '<f8') for n in header}
+        for n in header:
+            (d / f'{n}.bin').write_bytes(b'')
+        meta = {'source': str(source), 'header': header, 'dtypes': dtypes, 'rows': 0,
+                'offset': len(header_line), 'size': 0, 'mtime_ns': 0, 'sample_hash': ''}
+        return self._extend(source, d, meta, fp)
+
+    def _extend(self, source: Path, d: Path, meta: Dict[str, Any], fp: Dict[str, Any]) -> Dict[str, Any]:
+        header = meta['header']
+        files = {}
+        for n in header:
+            p = d / f'{n}.bin'
+            # 前回の追記が途中で落ちていても meta の行数に揃えてから書き足す
+            with open(p, 'r+b') as f:
+                f.truncate(meta['rows'] * np.dtype(meta['dtypes'][n]).itemsize)
+            files[n] = open(p, 'ab')
+        rows, offset = meta['rows'], meta['offset']
+        try:
+            for block, end in _iter_blocks(source, offset, fp['size']):
+                cols = _parse_block(block, header)
+                for n in header:
+                    files[n].write(np.ascontiguousarray(cols[n], dtype=meta['dtypes'][n]).tobytes())
+                rows += len(cols[header[0]])
+                offset = end
+        finally:
+            for f in files.values():
+                f.close()
+        meta = {**meta, 'rows': rows, 'offset': offset, 'size': fp['size'], 'mtime_ns': fp['mtime_ns'],
+                'sample_hash': _sample_hash(source, offset)}
+        tmp = d / 'meta.json.tmp'
+        tmp.write_bytes(orjson.dumps(meta))
+        os.replace(tmp, d / 'meta.json')
+        return meta
+
+    def _open(self, source: Path, d: Path, meta: Dict[str, Any]) -> CachedTable:
+        rows = meta['rows']
+        cols = {}
+        for n in meta['header']:
+            dt = np.dtype(meta['dtypes'][n])
+            # 0 行の memmap は作れないので空配列で代用する
+            cols[n] = np.memmap(d / f'{n}.bin', dtype=dt, mode='r', shape=(rows,)) if rows else np.empty(0, dtype=dt)
+        return CachedTable(source, rows, cols)
+
+
+_default: ColumnCache | None = None
+
+
+def load_table(source: Path | str, root: Path | None = None) -> CachedTable:
+    """既定のキャッシュ（Bot/cache/columns）経由で CSV を読む。"""
+    global _default
+    if root is not None:
+        return ColumnCache(root).load(source)
+    if _default is None:
+        _default = ColumnCache()
+    return _default.load(source)
@@ -1,2 +1,32 @@
 from __future__ import annotations
-# placeholders
+from pathlib import Path
+from typing import List, Tuple
+import csv
+
+JOURNAL_HEADER = ['ts', 'event', 'mode', 'spread', 'size_btc']
+
+JournalRow = Tuple[float, str, str, float, float]
+
+
+class CsvJournal:
+    """trade_journal.csv への追記（ライブ用）。"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        if not self.path.exists():
+            with open(self.path, 'w', newline='') as f:
+                csv.writer(f).writerow(JOURNAL_HEADER)
+
+    def append(self, ts: float, event: str, mode: str, spread: float, size_btc: float) -> None:
+        with open(self.path, 'a', newline='') as f:
+            csv.writer(f).writerow([ts, event, mode, f"{spread:.6f}", f"{size_btc:.6f}"])
+
+
+class MemoryJournal:
+    """メモリ上に保持するだけのジャーナル（リプレイ/バックテスト用）。値は丸めずに保持する。"""
+
+    def __init__(self) -> None:
+        self.rows: List[JournalRow] = []
+
+    def append(self, ts: float, event: str, mode: str, spread: float, size_btc: float) -> None:
+        self.rows.append((ts, event, mode, spread, size_btc))
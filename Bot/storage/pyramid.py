@@ -0,0 +1,320 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+import argparse
+import hashlib
+import os
+import time
+
+import numpy as np
+import orjson
+import pandas as pd
+
+from .column_cache import TIME_COLUMN, CachedTable, load_table
+
+# スプレッド/ベーシスの多段の集計（1m / 5m / 1h / 1d ごとの min / max / mean / last）。
+# 列キャッシュ（column_cache）から作り、CSV に行が足されたら足された行だけを集計して各段に書き足す。
+# 問い合わせは要求された解像度を満たす一番粗い段を読むので、数か月分の概観も数千行を読むだけで済む。
+#
+#   pyr = load_pyramid('compare_10s.csv')
+#   agg = pyr.query('s', start='2025-01-01', end='2025-04-01', points=1800)   # 1 点 ≒ 1.2h → 1h の段
+#
+#   <root>/<sha1(path)[:16]>/meta.json                  ... 取り込んだ行数, 最後の時刻, 段ごとのバケット数
+#   <root>/<sha1(path)[:16]>/<段>/timestamp.bin        ... バケットの開始時刻（int64 ns UTC、UTC 0 時基準で揃える）
+#   <root>/<sha1(path)[:16]>/<段>/<系列>.<統計>.bin     ... min / max / sum / last（float64）, count（int64）
+#
+# mean は sum / count で出す（NaN の行は数えない）。last はバケット内で最後の NaN でない値。
+# 差分は細かい段から順に「足された行だけの集計」を粗い段へ畳み込み、各段の最後の（途中の）バケットとだけ合わせ直す。
+
+DEFAULT_ROOT = Path(__file__).resolve().parents[1] / 'cache' / 'pyramid'
+LEVELS: Tuple[Tuple[str, int], ...] = (('1m', 60), ('5m', 300), ('1h', 3600), ('1d', 86400))
+# 差で定義する系列（trading_strategy/features.py の SPREADS と同じ定義）
+SERIES: Dict[str, Tuple[str, str]] = {
+    'spot_spread_fgrd_bybit': ('spot_fgrd_bid', 'spot_bybit_ask'),
+    'spot_spread_bybit_fgrd': ('spot_bybit_bid', 'spot_fgrd_ask'),
+    'swap_spread_fgrd_bybit': ('swap_fgrd_bid', 'swap_bybit_ask'),
+    'swap_spread_bybit_fgrd': ('swap_bybit_bid', 'swap_fgrd_ask'),
+    'basis_fgrd': ('swap_fgrd_last', 'spot_fgrd_last'),
+    'basis_bybit': ('swap_bybit_last', 'spot_bybit_last'),
+    's': ('swap_fgrd_last', 'swap_bybit_last'),
+}
+STATS = ('min', 'max', 'sum', 'count', 'last')
+_BLOCK_ROWS = 1 << 20   # 取り込みはこの行数ずつ（メモリを一定に保つ）
+_NAT = np.iinfo(np.int64).min
+
+
+def _dtype(stat: str) -> np.dtype:
+    return np.dtype('<i8') if stat == 'count' else np.dtype('<f8')
+
+
+def _ns(t: Any) -> int:
+    """時刻（文字列 / datetime64 / Timestamp、tz 付きは UTC に直す）を int64 ns に。"""
+    ts = pd.Timestamp(t)
+    if ts.tz is not None:
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return int(ts.as_unit('ns').value)
+
+
+def _reduce(keys: np.ndarray, cols: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """昇順の keys が同じ行を 1 つのバケットにまとめる（入力も同じ統計の形なので何段でも畳める）。"""
+    n = len(keys)
+    if n == 0:
+        return keys, cols
+    g = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+    out: Dict[str, np.ndarray] = {}
+    for name in {c.rsplit('.', 1)[0] for c in cols}:
+        last = cols[f'{name}.last']
+        li = np.maximum.reduceat(np.where(np.isnan(last), -1, np.arange(n)), g)
+        out[f'{name}.min'] = np.fmin.reduceat(cols[f'{name}.min'], g)
+        out[f'{name}.max'] = np.fmax.reduceat(cols[f'{name}.max'], g)
+        out[f'{name}.sum'] = np.add.reduceat(cols[f'{name}.sum'], g)
+        out[f'{name}.count'] = np.add.reduceat(cols[f'{name}.count'], g)
+        out[f'{name}.last'] = np.where(li >= 0, last[np.maximum(li, 0)], np.nan)
+    return keys[g], out
+
+
+def _raw_stats(table: CachedTable, lo: int, hi: int,
+               series: Dict[str, Tuple[str, str]]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """[lo, hi) 行を 1 行 = 1 バケットの統計にする（時刻が読めない行は除く）。"""
+    ts = np.asarray(table[TIME_COLUMN][lo:hi])
+    ok = ts != _NAT
+    cols: Dict[str, np.ndarray] = {}
+    for name, (a, b) in series.items():
+        v = (np.asarray(table[a][lo:hi]) - np.asarray(table[b][lo:hi]))[ok]
+        nan = np.isnan(v)
+        cols.update({f'{name}.min': v, f'{name}.max': v, f'{name}.sum': np.where(nan, 0.0, v),
+                     f'{name}.count': (~nan).astype(np.int64), f'{name}.last': v})
+    return ts[ok], cols
+
+
+@dataclass
+class Level:
+    name: str
+    step_ns: int
+    start: np.ndarray                # バケットの開始時刻 int64 ns（読み取り専用 memmap）
+    columns: Dict[str, np.ndarray]   # '<系列>.<統計>' -> memmap
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+
+@dataclass
+class Aggregates:
+    level: str                       # 段の名前（段が無いときは 'raw'）
+    ts: np.ndarray                   # バケットの開始時刻 datetime64[ns]
+    min: np.ndarray
+    max: np.ndarray
+    mean: np.ndarray
+    last: np.ndarray
+    count: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def envelope(self) -> Tuple[np.ndarray, np.ndarray]:
+        """描画用の (x, y): バケットごとに min と max を並べる（raw はそのまま）。"""
+        if self.level == 'raw':
+            return self.ts, self.last
+        return np.repeat(self.ts, 2), np.column_stack([self.min, self.max]).reshape(-1)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({'timestamp': self.ts, 'min': self.min, 'max': self.max, 'mean': self.mean,
+                             'last': self.last, 'count': self.count})
+
+
+@dataclass
+class Pyramid:
+    table: CachedTable
+    levels: Dict[str, Level]         # 細かい順
+
+    @property
+    def series(self) -> List[str]:
+        return list(SERIES)
+
+    def span(self) -> Tuple[int, int]:
+        """取り込み済みの最初と最後の時刻（ns）。"""
+        ts = self.table[TIME_COLUMN]
+        return (int(ts[0]), int(ts[-1])) if len(ts) else (0, 0)
+
+    def level_for(self, resolution_sec: float) -> Level | None:
+        """バケット幅が resolution_sec 以下の段のうち一番粗いもの（無ければ None = 生データ）。"""
+        best = None
+        for lv in self.levels.values():
+            if lv.step_ns <= resolution_sec * 1e9:
+                best = lv
+        return best
+
+    def query(self, name: str, start: Any = None, end: Any = None, resolution: float | None = None,
+              points: int | None = None) -> Aggregates:
+        """name の [start, end] を resolution 秒（または points 点）の解像度で返す。"""
+        if name not in SERIES:
+            raise RuntimeError(f'unknown series for pyramid: {name}')
+        first, last = self.span()
+        t0 = first if start is None else _ns(start)
+        t1 = last if end is None else _ns(end)
+        if resolution is None:
+            resolution = (t1 - t0) / 1e9 / points if points else 0.0
+        lv = self.level_for(resolution)
+        if lv is None:
+            return self._raw(name, t0, t1)
+        lo = int(np.searchsorted(lv.start, t0 - lv.step_ns, side='right'))   # t0 を含むバケットから
+        hi = int(np.searchsorted(lv.start, t1, side='right'))
+        c = {s: np.asarray(lv.columns[f'{name}.{s}'][lo:hi]) for s in STATS}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(c['count'] > 0, c['sum'] / c['count'], np.nan)
+        return Aggregates(lv.name, np.asarray(lv.start[lo:hi]).view('datetime64[ns]'), c['min'], c['max'], mean,
+                          c['last'], c['count'])
+
+    def _raw(self, name: str, t0: int, t1: int) -> Aggregates:
+        ts = self.table[TIME_COLUMN]
+        lo, hi = int(np.searchsorted(ts, t0, side='left')), int(np.searchsorted(ts, t1, side='right'))
+        a, b = SERIES[name]
+        v = np.asarray(self.table[a][lo:hi]) - np.asarray(self.table[b][lo:hi])
+        return Aggregates('raw', np.asarray(ts[lo:hi]).view('datetime64[ns]'), v, v, v, v,
+                          (~np.isnan(v)).astype(np.int64))
+
+
+class PyramidCache:
+    """列キャッシュ → 集計ピラミッドの差分更新。"""
+
+    def __init__(self, root: Path | None = None) -> None:
+        self.root = Path(root or DEFAULT_ROOT)
+
+    def _dir(self, source: Path) -> Path:
+        return self.root / hashlib.sha1(str(source).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _layout() -> Dict[str, Any]:
+        return {'levels': [list(lv) for lv in LEVELS], 'series': SERIES}
+
+    def load(self, table: CachedTable) -> Pyramid:
+        d = self._dir(Path(table.source))
+        meta_path = d / 'meta.json'
+        meta = orjson.loads(meta_path.read_bytes()) if meta_path.exists() else None
+        if meta is not None and not self._current(meta, table):
+            meta = None
+        if meta is None:
+            meta = self._reset(d)
+        if meta['rows'] < len(table):
+            meta = self._extend(table, d, meta)
+        return self._open(table, d, meta)
+
+    def _current(self, meta: Dict[str, Any], table: CachedTable) -> bool:
+        """途中で落ちていない・定義が同じ・取り込み済みの行が（作り直されずに）残っている。"""
+        if not meta.get('complete') or meta['layout'] != orjson.loads(orjson.dumps(self._layout())):
+            return False
+        rows = meta['rows']
+        return rows <= len(table) and (rows == 0 or int(table[TIME_COLUMN][rows - 1]) == meta['check_ts'])
+
+    def _reset(self, d: Path) -> Dict[str, Any]:
+        for name, _ in LEVELS:
+            (d / name).mkdir(parents=True, exist_ok=True)
+            for p in (d / name).glob('*.bin'):
+                p.unlink()
+        meta = {'layout': self._layout(), 'rows': 0, 'last_ts': _NAT, 'check_ts': _NAT,
+                'buckets': {name: 0 for name, _ in LEVELS}, 'complete': True}
+        self._write_meta(d, meta)
+        return meta
+
+    @staticmethod
+    def _write_meta(d: Path, meta: Dict[str, Any]) -> None:
+        tmp = d / 'meta.json.tmp'
+        tmp.write_bytes(orjson.dumps(meta))
+        os.replace(tmp, d / 'meta.json')
+
+    def _extend(self, table: CachedTable, d: Path, meta: Dict[str, Any]) -> Dict[str, Any]:
+        # 書き込み中に落ちたら次回は作り直す（最後のバケットを書き換えるので途中の状態は使えない）
+        self._write_meta(d, {**meta, 'complete': False})
+        buckets = dict(meta['buckets'])
+        last_ts = meta['last_ts']
+        for lo in range(meta['rows'], len(table), _BLOCK_ROWS):
+            hi = min(lo + _BLOCK_ROWS, len(table))
+            keys, cols = _raw_stats(table, lo, hi, SERIES)
+            if len(keys) == 0:
+                continue
+            if keys[0] < last_ts or np.any(keys[1:] < keys[:-1]):
+                raise RuntimeError('pyramid needs rows sorted by timestamp')
+            last_ts = int(keys[-1])
+            for name, sec in LEVELS:
+                step = sec * 1_000_000_000
+                keys, cols = _reduce(keys // step * step, cols)   # 足された行だけの集計（次の段の入力）
+                buckets[name] = self._merge(d / name, buckets[name], keys, cols)
+        meta = {**meta, 'rows': len(table), 'last_ts': last_ts, 'buckets': buckets, 'complete': True,
+                'check_ts': int(table[TIME_COLUMN][len(table) - 1])}
+        self._write_meta(d, meta)
+        return meta
+
+    @staticmethod
+    def _merge(d: Path, stored: int, keys: np.ndarray, cols: Dict[str, np.ndarray]) -> int:
+        """差分のバケットを d の段に足す。先頭が保存済みの最後のバケットと同じなら合わせて書き直す。"""
+        keep = stored
+        if stored:
+            with open(d / f'{TIME_COLUMN}.bin', 'rb') as f:
+                f.seek((stored - 1) * 8)
+                tail = np.frombuffer(f.read(8), dtype='<i8')
+            if tail[0] == keys[0]:
+                keep = stored - 1
+                old = {}
+                for c in cols:
+                    dt = _dtype(c.rsplit('.', 1)[1])
+                    with open(d / f'{c}.bin', 'rb') as f:
+                        f.seek(keep * dt.itemsize)
+                        old[c] = np.frombuffer(f.read(dt.itemsize), dtype=dt)
+                keys, cols = _reduce(np.concatenate([tail, keys]),
+                                     {c: np.concatenate([old[c], v]) for c, v in cols.items()})
+        for c, v in [(TIME_COLUMN, keys), *cols.items()]:
+            dt = np.dtype('<i8') if c == TIME_COLUMN else _dtype(c.rsplit('.', 1)[1])
+            p = d / f'{c}.bin'
+            with open(p, 'r+b' if p.exists() else 'wb') as f:
+                f.truncate(keep * dt.itemsize)
+                f.seek(keep * dt.itemsize)
+                f.write(np.ascontiguousarray(v, dtype=dt).tobytes())
+        return keep + len(keys)
+
+    def _open(self, table: CachedTable, d: Path, meta: Dict[str, Any]) -> Pyramid:
+        levels: Dict[str, Level] = {}
+        for name, sec in LEVELS:
+            n = meta['buckets'][name]
+
+            def mm(c: str, dt: np.dtype) -> np.ndarray:
+                # 0 行の memmap は作れないので空配列で代用する
+                return np.memmap(d / name / f'{c}.bin', dtype=dt, mode='r', shape=(n,)) if n else np.empty(0, dtype=dt)
+            cols = {f'{s}.{st}': mm(f'{s}.{st}', _dtype(st)) for s in SERIES for st in STATS}
+            levels[name] = Level(name, sec * 1_000_000_000, mm(TIME_COLUMN, np.dtype('<i8')), cols)
+        return Pyramid(table, levels)
+
+
+_default: PyramidCache | None = None
+
+
+def load_pyramid(source: Path | str, root: Path | None = None, table_root: Path | None = None) -> Pyramid:
+    """CSV を列キャッシュ経由で読み、集計ピラミッドを最新にして返す（既定は Bot/cache/pyramid）。"""
+    global _default
+    table = load_table(source, table_root)
+    if root is not None:
+        return PyramidCache(root).load(table)
+    if _default is None:
+        _default = PyramidCache()
+    return _default.load(table)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='multi-resolution spread aggregates over the column cache')
+    ap.add_argument('--csv', type=Path, required=True)
+    ap.add_argument('--series', default='s', choices=list(SERIES))
+    ap.add_argument('--start', default=None)
+    ap.add_argument('--end', default=None)
+    ap.add_argument('--points', type=int, default=1800)
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    pyr = load_pyramid(args.csv)
+    t1 = time.perf_counter()
+    agg = pyr.query(args.series, args.start, args.end, points=args.points)
+    t2 = time.perf_counter()
+    print(f"{len(pyr.table):,} rows, update {t1 - t0:.3f}s; " + ', '.join(f'{k}: {len(v):,}' for k, v in pyr.levels.items()))
+    print(f"query {args.series} -> level {agg.level}, {len(agg):,} buckets in {(t2 - t1) * 1e3:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+import hashlib
+import io
+import os
+
+import numpy as np
+import orjson
+
+# バックテスト結果の内容アドレス型ストア。
+# キーは (入力データの指紋, Config/戦略パラメータ, コードのバージョン) の sha1 で、同じ入力なら再計算せずに読むだけ。
+#
+#   <root>/<key[:2]>/<key>.npz   ... 配列（トレード列など）+ '__meta__'（summary 等の JSON）
+#
+# 読み出しのたびに mtime を更新し、合計サイズが max_bytes を超えたら mtime の古い順に消す（LRU）。
+
+DEFAULT_ROOT = Path(__file__).resolve().parents[1] / 'cache' / 'results'
+DEFAULT_MAX_BYTES = 512 << 20
+_META = '__meta__'
+_BLOCK_BYTES = 8 << 20
+
+
+def data_fingerprint(*arrays: np.ndarray) -> str:
+    """配列の中身（数値/日時の列）の指紋。_BLOCK_BYTES ごとのブロックのハッシュを連結してハッシュする。"""
+    h = hashlib.blake2b(digest_size=16)
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        h.update(f'{arr.dtype.str}{arr.shape}'.encode())
+        raw = arr.reshape(-1).view(np.uint8)
+        for lo in range(0, len(raw), _BLOCK_BYTES):
+            h.update(hashlib.blake2b(raw[lo:lo + _BLOCK_BYTES], digest_size=16).digest())
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _file_digest(path: str) -> str:
+    return hashlib.sha1(Path(path).read_bytes()).hexdigest()
+
+
+def code_version(*paths: Path | str) -> str:
+    """結果を作るソースファイルの中身から作るバージョン（ロジックを変えたら別キーになる）。"""
+    return hashlib.sha1(''.join(_file_digest(str(Path(p).resolve())) for p in paths).encode()).hexdigest()[:16]
+
+
+def result_key(data_fp: str, params: Dict[str, Any], version: str) -> str:
+    payload = orjson.dumps({'data': data_fp, 'params': params, 'code': version}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha1(payload).hexdigest()
+
+
+@dataclass
+class StoredResult:
+    arrays: Dict[str, np.ndarray]
+    meta: Dict[str, Any]
+
+
+class ResultStore:
+    """key -> (配列, メタ JSON) のディスクキャッシュ。"""
+
+    def __init__(self, root: Path | None = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = Path(root or DEFAULT_ROOT)
+        self.max_bytes = max_bytes
+        self._bytes: int | None = None   # 合計サイズ（初回の put でディレクトリを走査して求める）
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f'{key}.npz'
+
+    def get(self, key: str) -> StoredResult | None:
+        p = self._path(key)
+        try:
+            with np.load(p, allow_pickle=False) as z:
+                arrays = {n: z[n] for n in z.files}
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        try:
+            os.utime(p)   # LRU: 最終利用時刻として mtime を使う
+        except OSError:
+            pass
+        meta = orjson.loads(arrays.pop(_META).tobytes()) if _META in arrays else {}
+        return StoredResult(arrays, meta)
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray] | None = None, meta: Dict[str, Any] | None = None) -> None:
+        p = self._path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        buf = io.BytesIO()
+        payload = dict(arrays or {})
+        payload[_META] = np.frombuffer(orjson.dumps(meta or {}, option=orjson.OPT_SERIALIZE_NUMPY), dtype=np.uint8)
+        np.savez_compressed(buf, **payload)
+        tmp = p.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_bytes(buf.getvalue())
+        old = p.stat().st_size if p.exists() else 0
+        os.replace(tmp, p)
+        if self._bytes is None:
+            self._bytes = sum(size for _, size, _ in self._entries())
+        else:
+            self._bytes += buf.tell() - old
+        if self._bytes > self.max_bytes:
+            self.evict()
+
+    def _entries(self) -> List[Tuple[int, int, Path]]:
+        out = []
+        for p in self.root.glob('*/*.npz'):
+            try:
+                st = p.stat()
+            except FileNotFoundError:   # 別プロセスが消した
+                continue
+            out.append((st.st_mtime_ns, st.st_size, p))
+        return out
+
+    def evict(self, max_bytes: int | None = None) -> int:
+        """合計が max_bytes 以下になるまで古い順に削除し、削除件数を返す。"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, p in entries:
+            if total <= limit:
+                break
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        self._bytes = total
+        return removed
+
+
+_default: ResultStore | None = None
+
+
+def default_store() -> ResultStore:
+    """既定のストア（Bot/cache/results）。"""
+    global _default
+    if _default is None:
+        _default = ResultStore()
+    return _default
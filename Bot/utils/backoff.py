@@ -1,2 +1,12 @@
 from __future__ import annotations
-# placeholders
+from typing import Iterator
+import random
+
+
+def backoff_delays(retries: int, base: float = 0.2, factor: float = 2.0, max_delay: float = 5.0,
+                   jitter: float = 0.1) -> Iterator[float]:
+    """指数バックオフの待機秒を retries 回ぶん返す（jitter は比率、0 で無効）。"""
+    delay = base
+    for _ in range(retries):
+        yield min(max_delay, delay) * (1.0 + random.uniform(-jitter, jitter))
+        delay *= factor
@@ -0,0 +1,22 @@
+from __future__ import annotations
+from typing import Callable
+import time
+
+# 時計は「呼ぶと epoch 秒を返す callable」。ライブは time.time、リプレイは SimClock を渡す
+Clock = Callable[[], float]
+
+wall_clock: Clock = time.time
+
+
+class SimClock:
+    """リプレイ用の時計。フィードがデータ点ごとに set() して進める。"""
+    __slots__ = ('t',)
+
+    def __init__(self, t: float = 0.0) -> None:
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+    def set(self, t: float) -> None:
+        self.t = t
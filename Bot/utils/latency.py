@@ -0,0 +1,50 @@
+from __future__ import annotations
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+# 上限 [ms]: 0.25ms から 2 倍刻みで約 65 秒まで
+_BOUNDS_MS: List[float] = [0.25 * (2 ** i) for i in range(19)]
+
+
+class LatencyHistogram:
+    """対数バケットのレイテンシ・ヒストグラム（記録は O(log buckets)）。"""
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * (len(_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000.0
+        self.counts[bisect_left(_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, q: float) -> float:
+        """q (0-100) 分位点の上限バケット値 [ms]。"""
+        if self.count == 0:
+            return 0.0
+        target = q / 100.0 * self.count
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= target and c:
+                return min(_BOUNDS_MS[i], self.max_ms) if i < len(_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """(上限ms, 件数) の一覧。最後の上限は inf。"""
+        return list(zip(_BOUNDS_MS + [float('inf')], self.counts))
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'mean_ms': self.total_ms / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p90_ms': self.percentile(90),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max_ms,
+        }
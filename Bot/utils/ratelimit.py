@@ -0,0 +1,183 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+from .latency import LatencyHistogram
+
+# 優先度（小さいほど先に通す）
+PRIORITY_ORDER = 0    # 発注/取消
+PRIORITY_QUERY = 1    # 注文状態の照会
+PRIORITY_REPORT = 2   # 残高スナップショット/レポート
+
+PRIORITY_NAMES = {PRIORITY_ORDER: 'order', PRIORITY_QUERY: 'query', PRIORITY_REPORT: 'report'}
+
+
+@dataclass
+class BucketSpec:
+    rate: float        # tokens / sec
+    burst: float       # バケット容量
+    reserve: float = 0.0  # PRIORITY_ORDER 以外が使えない残量（発注用に常に確保）
+
+
+class _PriorityBucket:
+    """優先度付き待ち行列を持つトークンバケット。asyncio/同期の両方から取得できる。"""
+
+    def __init__(self, spec: BucketSpec) -> None:
+        self.spec = spec
+        self.tokens = spec.burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+        self._heap: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._dispatcher: asyncio.Task | None = None
+        self._wake: asyncio.Event | None = None   # 待ち行列に積んだら立てる（先頭が変わったら待ち時間を計算し直す）
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.spec.burst, self.tokens + (now - self.last) * self.spec.rate)
+        self.last = now
+
+    def _floor(self, priority: int) -> float:
+        return 1.0 + (self.spec.reserve if priority > PRIORITY_ORDER else 0.0)
+
+    def try_take(self, priority: int) -> float:
+        """取れたら 0、取れなければ次に取れるまでの秒数を返す。"""
+        with self.lock:
+            self._refill(time.monotonic())
+            need = self._floor(priority)
+            if self.tokens >= need:
+                self.tokens -= 1.0
+                return 0.0
+            return (need - self.tokens) / self.spec.rate
+
+    def _queued_ahead(self, priority: int) -> bool:
+        """非同期側の待ち行列に、優先度が同じか高い未処理の要求があるか（同期の取得はそれを追い越さない）。"""
+        try:
+            asyncio.get_running_loop()
+            return False   # イベントループのスレッドから同期で呼ばれた: ここで待つと払い出しが進まないので譲らない
+        except RuntimeError:
+            pass
+        return any(p <= priority and not fut.done() for p, _, fut in list(self._heap))
+
+    def acquire_blocking(self, priority: int) -> None:
+        while True:
+            if self._queued_ahead(priority):
+                wait = 1.0 / self.spec.rate
+            else:
+                wait = self.try_take(priority)
+                if wait <= 0.0:
+                    return
+            time.sleep(wait)
+
+    async def acquire(self, priority: int) -> None:
+        # 発注と、待ち行列の先頭より優先度の高い要求は、トークンがあれば行列を追い越して通す
+        ahead = priority <= PRIORITY_ORDER or not self._heap or priority < self._heap[0][0]
+        if ahead and self.try_take(priority) <= 0.0:
+            return
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (priority, next(self._seq), fut))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wake = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch(self._wake))
+        else:
+            self._wake.set()
+        await fut
+
+    async def _dispatch(self, wake: asyncio.Event) -> None:
+        while self._heap:
+            priority, _, fut = self._heap[0]
+            if fut.done():
+                heapq.heappop(self._heap)
+                continue
+            wait = self.try_take(priority)
+            if wait <= 0.0:
+                heapq.heappop(self._heap)
+                fut.set_result(None)
+                continue
+            wake.clear()
+            try:
+                await asyncio.wait_for(wake.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def drain(self, resume_at: float) -> None:
+        """サーバ側の制限到達時: resume_at（monotonic）まで払い出しを止める。"""
+        with self.lock:
+            self.tokens = -max(0.0, resume_at - time.monotonic()) * self.spec.rate
+            self.last = time.monotonic()
+
+
+class RateLimiter:
+    """venue/エンドポイント種別ごとのトークンバケットと優先度スケジューラ。
+
+    FGRDClient / BybitClient（同期・非同期とも）で1インスタンスを共有する。
+    取得は (venue, endpoint) バケット → venue 全体バケット の順で、いずれも優先度順に払い出す。
+    各リクエストのキュー待ち時間は metrics に記録する。
+    """
+
+    def __init__(self, specs: Dict[str, BucketSpec], default: BucketSpec | None = None) -> None:
+        # specs のキー: 'fgrd' (venue 全体) / 'fgrd/order' (種別別)
+        self.specs = specs
+        self.default = default
+        self._buckets: Dict[str, _PriorityBucket] = {}
+        self.metrics: Dict[str, LatencyHistogram] = {}
+
+    @staticmethod
+    def from_config(config: Dict[str, Any]) -> 'RateLimiter':
+        specs = {key: BucketSpec(float(v['rate']), float(v['burst']), float(v.get('reserve', 0.0)))
+                 for key, v in (config.get('rate_limits') or {}).items()}
+        return RateLimiter(specs)
+
+    def _chain(self, venue: str, endpoint: str) -> List[_PriorityBucket]:
+        out = []
+        for key in (f"{venue}/{endpoint}", venue):
+            b = self._buckets.get(key)
+            if b is None:
+                spec = self.specs.get(key) or (self.default if key == venue else None)
+                if spec is None:
+                    continue
+                b = self._buckets[key] = _PriorityBucket(spec)
+            out.append(b)
+        return out
+
+    def _record(self, venue: str, endpoint: str, priority: int, waited: float) -> None:
+        name = f"{venue}/{endpoint}/{PRIORITY_NAMES.get(priority, priority)}"
+        h = self.metrics.get(name)
+        if h is None:
+            h = self.metrics[name] = LatencyHistogram()
+        h.record(waited)
+
+    async def acquire(self, venue: str, endpoint: str, priority: int) -> float:
+        t0 = time.perf_counter()
+        for b in self._chain(venue, endpoint):
+            await b.acquire(priority)
+        waited = time.perf_counter() - t0
+        self._record(venue, endpoint, priority, waited)
+        return waited
+
+    def acquire_blocking(self, venue: str, endpoint: str, priority: int) -> float:
+        t0 = time.perf_counter()
+        for b in self._chain(venue, endpoint):
+            b.acquire_blocking(priority)
+        waited = time.perf_counter() - t0
+        self._record(venue, endpoint, priority, waited)
+        return waited
+
+    def drain(self, venue: str, endpoint: str, resume_in: float) -> None:
+        """(venue, endpoint) のバケットだけを resume_in 秒止める。
+
+        venue 全体のバケットは止めない（サーバ側の枠はエンドポイントごとなので、照会の枠切れで発注まで止めない）。
+        種別別のバケットが設定されていなければ何もしない。
+        """
+        chain = self._chain(venue, endpoint)
+        b = self._buckets.get(f"{venue}/{endpoint}")
+        if b is not None and b in chain:
+            b.drain(time.monotonic() + resume_in)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """'venue/endpoint/priority' ごとのキュー待ち時間サマリ [ms]。"""
+        return {name: h.summary() for name, h in sorted(self.metrics.items())}
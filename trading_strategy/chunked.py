@@ -0,0 +1,497 @@
+"""run_analysis の集計を、履歴全体を読み込まずにパーティションごとに流して出す（アウトオブコア）。
+
+    cd trading_strategy && python chunked.py [--csv ../compare_10s.csv] [--rows 250000]
+
+CSV は列キャッシュ（storage.column_cache の memmap）から rows 行ずつ取り出し、load() と同じ前処理
+（ffill → bfill）を前のパーティションの最終値を持ち越して行う。ローリング窓のために、各パーティションの前に
+直前の (最大窓 - 1) 行を助走として付ける。各集計は状態（ポジション、累積 PnL、連続ヒット数など）を
+パーティションをまたいで持ち越すので、メモリはパーティションの大きさで決まり、履歴長によらない
+（履歴に比例するのは決済の記録だけで、列で持つので 1 トレード 100 バイト程度）。
+
+出力は img/ の CSV（hit_summary / pair_* / oneway_* / oneway_sweep* / premium_events）で、インメモリ版と同じ値になる。
+ただし
+  - ローリング標準偏差は pandas の逐次更新が系列の先頭からの履歴に依存するので、z は末尾数ビット違いうる
+    （閾値ちょうどの行でなければトレードは変わらない）
+  - 全行にわたる平均（hit_summary の avg_gain、sharpe_like_daily）は足し合わせの順が違うので丸め誤差の範囲でずれる
+  - 図は描かない（全行が要るので）。premium の事後バックテストは対象外
+時刻が昇順でない CSV はパーティションに分けられないので RuntimeError（インメモリ版で並べ替える）。
+"""
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from run_analysis import (CSV, IMG, MAX_HOLD_SEC, ONEWAY_Z_ENTRY, ONEWAY_Z_EXIT, SLIPPAGE_USD, SMA_WINDOW,
+                          STD_WINDOW, TAKER_FEE_SPOT, TAKER_FEE_SWAP, UNIT, Z_ENTRY, Z_EXIT, _next_at,
+                          _oneway_events, _pair_events, _pos_after, _premium_runs, _seconds, effective_spread)
+from features import FeatureStore
+from storage.column_cache import TIME_COLUMN, CachedTable, load_table
+
+STEPS_PER_DAY = 8640
+
+
+@dataclass
+class Partition:
+    frame: pd.DataFrame   # 先頭 skip 行は前のパーティションの末尾（ローリング窓の助走）
+    offset: int           # skip 行目の、履歴全体での行番号
+    skip: int
+
+    @property
+    def first(self) -> bool:
+        return self.offset == 0
+
+
+def _first_valid(col: np.ndarray, rows: int) -> float:
+    for lo in range(0, len(col), rows):
+        v = col[lo:lo + rows]
+        ok = np.flatnonzero(~np.isnan(v))
+        if len(ok):
+            return float(v[ok[0]])
+    return np.nan
+
+
+def iter_partitions(table: CachedTable, rows: int = 250_000, overlap: int = 0) -> Iterator[Partition]:
+    """load() と同じ前処理（ffill → bfill）をしたパーティション。各 frame の先頭に直前の overlap 行を付ける。"""
+    names = [c for c in table.columns if c != TIME_COLUMN]
+    carry = {c: _first_valid(table[c], rows) for c in names}   # 先頭の欠損は最初の有効値で埋める（bfill）
+    tail: Dict[str, np.ndarray] = {}
+    last_ts = None
+    for lo in range(0, len(table), rows):
+        hi = min(lo + rows, len(table))
+        t = np.array(table[TIME_COLUMN][lo:hi])
+        if (np.diff(t) < 0).any() or (last_ts is not None and t[0] < last_ts):
+            raise RuntimeError(f"{table.source}: timestamps are not sorted around row {lo}; use the in-memory run")
+        last_ts = t[-1]
+        cols: Dict[str, np.ndarray] = {TIME_COLUMN: t.view('datetime64[ns]')}
+        for c in names:
+            v = pd.Series(table[c][lo:hi]).ffill().to_numpy(dtype=np.float64, copy=True)
+            v[np.isnan(v)] = carry[c]   # 先頭の欠損は前のパーティションの最終値で埋める
+            carry[c] = v[-1]
+            cols[c] = v
+        skip = len(tail.get(TIME_COLUMN, ()))
+        if skip:
+            cols = {c: np.concatenate((tail[c], v)) for c, v in cols.items()}
+        # 列ごとの配列をそのまま持たせる（ブロックへまとめるコピーをしない）
+        yield Partition(pd.DataFrame(cols, copy=False), lo, skip)
+        tail = {c: v[max(0, len(v) - overlap):].copy() for c, v in cols.items()} if overlap else {}
+        del cols
+
+
+class Stream(ABC):
+    """パーティションを順に受け取る集計。"""
+    window = 0   # 必要な助走（ローリング窓）
+
+    @abstractmethod
+    def feed(self, part: Partition, feat: FeatureStore) -> None:
+        ...
+
+    @abstractmethod
+    def write(self, out: Path) -> None:
+        ...
+
+
+@dataclass
+class EquityStats:
+    """累積 PnL 列のドローダウンと、1 行ごとの差分の平均/分散（Chan の並列更新）。"""
+    last: float | None = None
+    peak: float = -np.inf
+    max_dd: float = -np.inf
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def update(self, eq: np.ndarray) -> None:
+        if not len(eq):
+            return
+        peak = np.maximum(np.maximum.accumulate(eq), self.peak)
+        self.max_dd = max(self.max_dd, float((peak - eq).max()))
+        self.peak = float(peak[-1])
+        step = np.diff(eq) if self.last is None else np.diff(eq, prepend=self.last)
+        self.last = float(eq[-1])
+        if len(step):
+            n, mu = len(step), float(step.mean())
+            m2 = float(((step - mu) ** 2).sum())
+            total = self.count + n
+            delta = mu - self.mean
+            self.mean += delta * n / total
+            self.m2 += m2 + delta * delta * self.count * n / total
+            self.count = total
+
+    def sharpe(self) -> float:
+        sigma = np.sqrt(self.m2 / self.count) if self.count else 0.0
+        return float((self.mean / sigma) * np.sqrt(STEPS_PER_DAY)) if sigma > 0 else 0.0
+
+
+def _trades(parts: List[pd.DataFrame]) -> pd.DataFrame:
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def _summary(tr: pd.DataFrame, stats: EquityStats) -> pd.DataFrame:
+    # backtest_swap_pair / backtest_oneway_fgrd_high のサマリと同じ列
+    final = stats.last if stats.last is not None else np.nan
+    if tr.empty:
+        return pd.DataFrame([{'trades': 0, 'wins': 0, 'win_rate': 0.0, 'final_equity': final}])
+    num = len(tr)
+    wins = int((tr['pnl_net'] > 0).sum())
+    return pd.DataFrame([{
+        'trades': num,
+        'wins': wins,
+        'win_rate': wins / num,
+        'avg_pnl': float(tr['pnl_net'].mean()),
+        'median_pnl': float(tr['pnl_net'].median()),
+        'final_equity': final,
+        'max_drawdown': stats.max_dd,
+        'sharpe_like_daily': stats.sharpe(),
+        'avg_duration_sec': float(tr['duration_sec'].mean()),
+    }])
+
+
+@dataclass
+class _Path:
+    """パーティション内の累積 PnL（ループ版と同じ順に足す）。first なら行 0 は含めない。"""
+    eq: np.ndarray
+    first: bool
+
+    @staticmethod
+    def build(carry: float, last_s: float | None, last_pos: int, s: np.ndarray, pos: np.ndarray,
+              cost: np.ndarray, first: bool, unit: float) -> '_Path':
+        if first:
+            ds, held, c = np.diff(s) * unit, pos[:-1], cost[1:]
+            ops = np.empty(2 * len(ds))
+            ops[0::2] = held * ds
+            ops[1::2] = -c
+            return _Path(np.cumsum(ops)[1::2], True)
+        ds = np.diff(s, prepend=last_s) * unit
+        held = np.concatenate(([last_pos], pos[:-1]))
+        ops = np.empty(2 * len(ds) + 1)
+        ops[0] = carry
+        ops[1::2] = held * ds
+        ops[2::2] = -cost
+        return _Path(np.cumsum(ops)[2::2], False)
+
+    def at(self, i: int) -> float:
+        return float(self.eq[i - 1] if self.first else self.eq[i])
+
+
+def _cost(f: np.ndarray, b: np.ndarray, rows: np.ndarray, fee: float, slip: float, unit: float) -> np.ndarray:
+    return fee * (np.abs(f[rows] * unit) + np.abs(b[rows] * unit)) + 2.0 * slip
+
+
+@dataclass
+class PairStream(Stream):
+    """backtest_swap_pair（pair_trades.csv / pair_backtest_summary.csv）。"""
+    window = max(SMA_WINDOW, STD_WINDOW)
+    pos: int = 0
+    open: Dict[str, Any] | None = None   # 保有中のエントリー（全体の行番号, pos, s, 時刻, 累積 PnL, 片道コスト）
+    equity: float = 0.0
+    last_s: float | None = None
+    stats: EquityStats = field(default_factory=EquityStats)
+    trades: List[pd.DataFrame] = field(default_factory=list)   # パーティションごとの決済（列で持つ）
+
+    def feed(self, part: Partition, feat: FeatureStore) -> None:
+        k = part.skip
+        z = feat.z('s', SMA_WINDOW, STD_WINDOW, 5, 5)[k:]
+        s = feat.spread('s')[k:]
+        ts = feat.ts_ns()[k:]
+        n = len(s)
+        events = _pair_events(z, Z_ENTRY, Z_EXIT, 1 if part.first else 0, self.pos)
+        rows = np.array([i for i, _, _ in events], dtype=np.int64)
+        tc = _cost(feat.column('swap_fgrd_last')[k:], feat.column('swap_bybit_last')[k:], rows, TAKER_FEE_SWAP,
+                   SLIPPAGE_USD, UNIT)
+        ev_cost = np.where([kind == 'reverse' for _, _, kind in events], tc * 2.0, tc) if len(events) else tc
+        cost = np.zeros(n)
+        cost[rows] = ev_cost
+        pos = _pos_after(n, events)
+        if not events or events[0][0] > 0:
+            pos[:events[0][0] if events else n] = self.pos
+        path = _Path.build(self.equity, self.last_s, self.pos, s, pos, cost, part.first, UNIT)
+        trades = []
+        for j, (i, p, kind) in enumerate(events):
+            if kind != 'enter':
+                o = self.open
+                trades.append({
+                    'entry_idx': o['idx'],
+                    'exit_idx': part.offset + i,
+                    'entry_pos': o['pos'],
+                    'exit_pos': p,
+                    'entry_s': o['s'],
+                    'exit_s': float(s[i]),
+                    'pnl_net': float(path.at(i) - o['equity']),
+                    'cost_total': float(o['cost'] + (ev_cost[j] / 2.0 if kind == 'reverse' else ev_cost[j])),
+                    'duration_sec': _seconds(int(ts[i]) - o['ts']),
+                })
+            self.open = None if p == 0 else {
+                'idx': part.offset + i, 'pos': p, 's': float(s[i]), 'ts': int(ts[i]), 'equity': path.at(i),
+                'cost': ev_cost[j] / 2.0 if kind == 'reverse' else ev_cost[j]}
+            self.pos = p
+        if trades:
+            self.trades.append(pd.DataFrame(trades))
+        self.stats.update(path.eq)
+        if len(path.eq):
+            self.equity = float(path.eq[-1])
+        self.last_s = float(s[-1])
+
+    def write(self, out: Path) -> None:
+        tr = _trades(self.trades)
+        if not tr.empty:
+            tr['direction'] = tr['entry_pos'].map({1: 'FGRD_buy/Bybit_sell', -1: 'FGRD_sell/Bybit_buy'})
+            tr.to_csv(out / 'pair_trades.csv', index=False)
+        _summary(tr, self.stats).to_csv(out / 'pair_backtest_summary.csv', index=False)
+
+
+@dataclass
+class OnewayStream(Stream):
+    """backtest_oneway_fgrd_high（既定の窓。cooldown/persistence も同じ意味）。"""
+    z_entry: float = ONEWAY_Z_ENTRY
+    z_exit: float = ONEWAY_Z_EXIT
+    max_hold_sec: float = MAX_HOLD_SEC
+    taker_fee_swap: float = TAKER_FEE_SWAP
+    slippage_usd: float = SLIPPAGE_USD
+    unit: float = UNIT
+    persistence_n: int = 1
+    cooldown_sec: float = 0
+    window = max(SMA_WINDOW, STD_WINDOW)
+    consec: int = 0                      # フラット時の連続ヒット数（persistence_n で頭打ち）
+    open: Dict[str, Any] | None = None   # 保有中のエントリー（全体の行番号, s, 時刻, 累積 PnL）
+    last_exit_ns: int | None = None
+    equity: float = 0.0
+    last_s: float | None = None
+    stats: EquityStats = field(default_factory=EquityStats)
+    trades: List[pd.DataFrame] = field(default_factory=list)   # パーティションごとの決済（列で持つ）
+
+    def feed(self, part: Partition, feat: FeatureStore) -> None:
+        k = part.skip
+        z = feat.z('s', SMA_WINDOW, STD_WINDOW)[k:]
+        s = feat.spread('s')[k:]
+        ts = feat.ts_ns()[k:]
+        n = len(s)
+        start = 1 if part.first else 0
+        pairs = _oneway_events(z, ts, self.z_entry, self.z_exit, self.max_hold_sec, self.persistence_n,
+                               self.cooldown_sec, start, self.consec, self.open and self.open['ts'],
+                               self.last_exit_ns)
+        pos = np.zeros(n, dtype=np.int64)
+        cost = np.zeros(n)
+        ev = np.array([i for pair in pairs for i in pair if 0 <= i < n], dtype=np.int64)
+        cost[ev] = _cost(feat.column('swap_fgrd_last')[k:], feat.column('swap_bybit_last')[k:], ev,
+                         self.taker_fee_swap, self.slippage_usd, self.unit)
+        for e, x in pairs:
+            pos[max(e, 0):x] = -1
+        # ds はループ版どおりグローバルの UNIT を掛ける
+        path = _Path.build(self.equity, self.last_s, -1 if self.open else 0, s, pos, cost, part.first, UNIT)
+        trades = []
+        for e, x in pairs:
+            entry = self.open if e < 0 else {'idx': part.offset + e, 's': float(s[e]), 'ts': int(ts[e]),
+                                             'equity': path.at(e)}
+            if x >= n:
+                self.open = entry
+                break
+            trades.append({
+                'entry_idx': entry['idx'],
+                'exit_idx': part.offset + x,
+                'entry_s': entry['s'],
+                'exit_s': float(s[x]),
+                'pnl_net': float(path.at(x) - entry['equity']),
+                'cost_total': float(cost[x]),
+                'duration_sec': _seconds(int(ts[x]) - entry['ts']),
+                'direction': 'FGRD_sell/Bybit_buy'
+            })
+            self.open = None
+            self.last_exit_ns = int(ts[x])
+        if trades:
+            self.trades.append(pd.DataFrame(trades))
+        self._carry_consec(z, pairs, start, n)
+        self.stats.update(path.eq)
+        if len(path.eq):
+            self.equity = float(path.eq[-1])
+        self.last_s = float(s[-1])
+
+    def _carry_consec(self, z: np.ndarray, pairs, start: int, n: int) -> None:
+        # 末尾がフラットなら、最後の決済（無ければパーティション先頭）以降の連続ヒット数を持ち越す
+        if self.open is not None:
+            return
+        hit = z > self.z_entry
+        hit[:start] = False
+        f, base = (pairs[-1][1] + 1, self.persistence_n) if pairs else (0, self.consec)
+        miss = np.flatnonzero(~hit[f:])
+        run = n - 1 - (f + int(miss[-1])) if len(miss) else base + (n - f)
+        self.consec = min(run, self.persistence_n)
+
+    def summary(self) -> pd.DataFrame:
+        return _summary(_trades(self.trades), self.stats)
+
+    def write(self, out: Path, prefix: str = 'oneway') -> None:
+        tr = _trades(self.trades)
+        if not tr.empty:
+            tr.to_csv(out / f'{prefix}_trades.csv', index=False)
+        _summary(tr, self.stats).to_csv(out / f'{prefix}_summary.csv', index=False)
+
+
+@dataclass
+class OnewaySweep(Stream):
+    """sweep_oneway_params と同じ格子を1回の読み込みで回す。"""
+    window = max(SMA_WINDOW, STD_WINDOW)
+    streams: List[OnewayStream] = field(default_factory=list)
+    params: List[Dict[str, Any]] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        for ze in [2.0, 2.5, 3.0]:
+            for zx in [0.2, 0.3]:
+                for mh in [60, 120, 300]:
+                    for fee in [0.0006, 0.0003]:
+                        for sl in [0.5, 0.2]:
+                            for un in [1.0]:
+                                self.streams.append(OnewayStream(ze, zx, mh, fee, sl, un))
+                                self.params.append({'z_entry': ze, 'z_exit': zx, 'max_hold': mh, 'fee': fee,
+                                                    'slippage': sl, 'unit': un})
+
+    def feed(self, part: Partition, feat: FeatureStore) -> None:
+        for st in self.streams:
+            st.feed(part, feat)
+
+    def write(self, out: Path) -> None:
+        res = pd.DataFrame([{**st.summary().iloc[0].to_dict(), **p} for st, p in zip(self.streams, self.params)])
+        res.sort_values(['final_equity', 'win_rate', 'avg_pnl'], ascending=[False, False, False], inplace=True)
+        res.to_csv(out / 'oneway_sweep.csv', index=False)
+        res.head(20).to_csv(out / 'oneway_sweep_top20.csv', index=False)
+
+
+@dataclass
+class PremiumStream(Stream):
+    """detect_premium_events（premium_events.csv）。区間がパーティションをまたぐ場合は途中の集計を持ち越す。"""
+    sma_window: int = 6 * 60
+    std_window: int = 6 * 60
+    z_high: float = 2.5
+    z_low: float = 0.5
+    min_duration_sec: float = 20 * 60
+    open: Dict[str, Any] | None = None   # 継続中の区間（開始時刻, 途中までの面積, max_z, peak_spread）
+    events: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def window(self) -> int:
+        return max(self.sma_window, self.std_window)
+
+    def _extend(self, z: np.ndarray, s: np.ndarray, lo: int, hi: int) -> None:
+        # 開始行の次から hi 行目まで（開始行を含むパーティションでは lo = 開始行 + 1）を継続中の区間に足す
+        o = self.open
+        if hi > lo:
+            a = np.maximum(0.0, z[lo:hi] - self.z_low)
+            o['area'] = float(np.cumsum(a if o['area'] is None else np.concatenate(([o['area']], a)))[-1])
+            k = lo + int(np.argmax(z[lo:hi]))
+            if z[k] > o['max_z']:   # 同じ値なら先の行（ループ版の z > max_z と同じ）
+                o['max_z'], o['peak_s'] = float(z[k]), float(s[k])
+
+    def _close(self, t_end: int) -> None:
+        o, self.open = self.open, None
+        dur = _seconds(t_end - o['ts'])
+        if dur >= self.min_duration_sec:
+            self.events.append({
+                'start': pd.Timestamp(o['ts']).isoformat(),
+                'end': pd.Timestamp(t_end).isoformat(),
+                'duration_sec': dur,
+                'max_z': o['max_z'],
+                'peak_spread': o['peak_s'],
+                'area_over_low': o['area'],
+            })
+
+    def feed(self, part: Partition, feat: FeatureStore) -> None:
+        k = part.skip
+        z = feat.z('s', self.sma_window, self.std_window)[k:]
+        s = feat.spread('s')[k:]
+        ts = feat.ts_ns()[k:]
+        n = len(z)
+        f = 0
+        if self.open is not None:
+            j = _next_at(np.flatnonzero(z < self.z_low), 0, n)
+            self._extend(z, s, 0, min(j + 1, n))
+            if j >= n:
+                return
+            self._close(int(ts[j]))
+            f = j + 1
+        runs = _premium_runs(z[f:], self.z_high, self.z_low)
+        for i, j in runs:
+            i, j = f + i, f + j
+            self.open = {'ts': int(ts[i]), 'area': None, 'max_z': float(z[i]), 'peak_s': float(s[i])}
+            self._extend(z, s, i + 1, j + 1)
+            self._close(int(ts[j]))
+        g = f + runs[-1][1] + 1 if runs else f
+        i = _next_at(np.flatnonzero(z[g:] > self.z_high), 0, n - g) + g
+        if i < n:   # 終わらないまま末尾に達した区間
+            self.open = {'ts': int(ts[i]), 'area': None, 'max_z': float(z[i]), 'peak_s': float(s[i])}
+            self._extend(z, s, i + 1, n)
+
+    def write(self, out: Path) -> None:
+        pd.DataFrame(self.events).to_csv(out / 'premium_events.csv', index=False)
+
+
+@dataclass
+class HitStream(Stream):
+    """run() の hit_summary.csv（実効スプレッドが閾値を超えた行数と平均）。"""
+    thresholds: List[float] = field(default_factory=lambda: [0.0, 0.5, 1.0, 2.0])
+    series: Dict[str, tuple] = field(default_factory=lambda: {
+        'eff_spot_fgrd_bybit': ('spot_spread_fgrd_bybit', TAKER_FEE_SPOT),
+        'eff_spot_bybit_fgrd': ('spot_spread_bybit_fgrd', TAKER_FEE_SPOT),
+        'eff_swap_fgrd_bybit': ('swap_spread_fgrd_bybit', TAKER_FEE_SWAP),
+        'eff_swap_bybit_fgrd': ('swap_spread_bybit_fgrd', TAKER_FEE_SWAP),
+    })
+    rows: int = 0
+    hits: Dict[tuple, int] = field(default_factory=dict)
+    sums: Dict[tuple, float] = field(default_factory=dict)
+
+    def feed(self, part: Partition, feat: FeatureStore) -> None:
+        self.rows += len(part.frame) - part.skip
+        for name, (raw, fee) in self.series.items():
+            eff = effective_spread(pd.Series(feat.spread(raw)[part.skip:]), fee, fee).to_numpy()
+            for t in self.thresholds:
+                sel = eff[eff > t]
+                self.hits[name, t] = self.hits.get((name, t), 0) + len(sel)
+                self.sums[name, t] = self.sums.get((name, t), 0.0) + float(sel.sum())
+
+    def write(self, out: Path) -> None:
+        rows = []
+        for t in self.thresholds:
+            for name in self.series:
+                h = self.hits.get((name, t), 0)
+                rows.append({'series': name, 'thresh': t, 'hits': int(h), 'ratio': h / self.rows if self.rows else 0.0,
+                             'avg_gain': self.sums[name, t] / h if h > 0 else 0.0})
+        pd.DataFrame(rows).to_csv(out / 'hit_summary.csv', index=False)
+
+
+def run_streams(csv_path: Path, streams: Iterable[Stream], rows: int = 250_000,
+                table: CachedTable | None = None) -> List[Stream]:
+    """CSV を1回だけ先頭から流して、各集計にパーティションを渡す。"""
+    streams = list(streams)
+    table = table or load_table(csv_path)
+    overlap = max([st.window for st in streams] + [1]) - 1
+    for part in iter_partitions(table, rows, overlap):
+        feat = FeatureStore(part.frame)   # パーティションごとに作って捨てる（z などは集計間で共有）
+        for st in streams:
+            st.feed(part, feat)
+    return streams
+
+
+def main(argv: Iterable[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description='chunked (out-of-core) run of the run_analysis summaries')
+    ap.add_argument('--csv', type=Path, default=CSV)
+    ap.add_argument('--rows', type=int, default=250_000, help='1 パーティションの行数')
+    ap.add_argument('--out', type=Path, default=IMG)
+    ap.add_argument('--no-sweep', action='store_true')
+    args = ap.parse_args(argv)
+    streams: List[Stream] = [HitStream(), PairStream(), OnewayStream(), PremiumStream()]
+    if not args.no_sweep:
+        streams.append(OnewaySweep())
+    t0 = time.perf_counter()
+    run_streams(args.csv, streams, args.rows)
+    args.out.mkdir(parents=True, exist_ok=True)
+    for st in streams:
+        st.write(args.out)
+    print(f"{len(streams)} analyses in {time.perf_counter() - t0:.1f}s -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
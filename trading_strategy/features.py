@@ -0,0 +1,156 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Hashable, List
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# run_analysis の派生系列（スプレッド、ベーシス、ローリング平均/標準偏差、z）を DataFrame ごとに1回だけ計算して使い回す。
+#
+#   feat = features(df)
+#   s = feat.spread('s'); z = feat.z('s', 36, 36)
+#
+# 値は (系列名, 窓, パラメータ) をキーにメモ化し、書き込み不可の ndarray で返す（呼び出し側で書き換えない）。
+# 元の列が差し替えられた（df[c] = ... で別の配列になった）場合は、次の features(df) で全部捨てて作り直す。
+# 同じ配列の中身をその場で書き換えた場合は検出しないので、forget(df) を呼ぶ。
+
+# 差で定義する系列: 名前 -> (被減数の列, 減数の列)
+SPREADS = {
+    'spot_spread_fgrd_bybit': ('spot_fgrd_bid', 'spot_bybit_ask'),
+    'spot_spread_bybit_fgrd': ('spot_bybit_bid', 'spot_fgrd_ask'),
+    'swap_spread_fgrd_bybit': ('swap_fgrd_bid', 'swap_bybit_ask'),
+    'swap_spread_bybit_fgrd': ('swap_bybit_bid', 'swap_fgrd_ask'),
+    'basis_fgrd': ('swap_fgrd_last', 'spot_fgrd_last'),
+    'basis_bybit': ('swap_bybit_last', 'spot_bybit_last'),
+    's': ('swap_fgrd_last', 'swap_bybit_last'),   # 契約系バックテストのスプレッド
+}
+
+
+def _readonly(a: np.ndarray) -> np.ndarray:
+    a.flags.writeable = False
+    return a
+
+
+def _ptr(df: pd.DataFrame, name: str) -> int:
+    # 列の識別子: numpy で持つ列はバッファの先頭アドレス、拡張配列（read_csv の文字列列など）は配列オブジェクトの id
+    col = df[name]
+    if isinstance(col.dtype, np.dtype):
+        return np.asarray(col).__array_interface__['data'][0]
+    return id(col.array)
+
+
+def default_min_periods(window: int) -> int:
+    # run_analysis の rolling で使っている min_periods
+    return max(5, int(window * 0.2))
+
+
+class FeatureStore:
+    """1 つのデータ（と、その列を共有する DataFrame）の派生系列のキャッシュ。"""
+
+    def __init__(self, df: pd.DataFrame):
+        self._frames: List[weakref.ref] = [weakref.ref(df)]
+        self._src: Dict[str, int] = {}   # 使った元の列 -> 配列の先頭アドレス
+        self._cache: Dict[Hashable, Any] = {}
+
+    def _frame(self) -> pd.DataFrame:
+        for ref in self._frames:
+            df = ref()
+            if df is not None:
+                return df
+        raise RuntimeError('feature store has no live DataFrame')
+
+    def _valid_for(self, df: pd.DataFrame) -> bool:
+        return all(c in df.columns and _ptr(df, c) == p for c, p in self._src.items())
+
+    def clear(self) -> None:
+        self._src.clear()
+        self._cache.clear()
+
+    def get(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """key の値が無ければ fn() で作って覚える。ndarray は書き込み不可にする。"""
+        if key not in self._cache:
+            v = fn()
+            self._cache[key] = _readonly(v) if isinstance(v, np.ndarray) else v
+        return self._cache[key]
+
+    def column(self, name: str) -> np.ndarray:
+        def load() -> np.ndarray:
+            df = self._frame()
+            self._src[name] = _ptr(df, name)
+            return df[name].to_numpy(dtype=np.float64).view()
+        return self.get(('column', name), load)
+
+    def ts_ns(self) -> np.ndarray:
+        """timestamp 列の int64 ns（UTC）。"""
+        def load() -> np.ndarray:
+            df = self._frame()
+            self._src['timestamp'] = _ptr(df, 'timestamp')
+            return pd.to_datetime(df['timestamp']).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        return self.get(('ts_ns',), load)
+
+    def spread(self, name: str) -> np.ndarray:
+        a, b = SPREADS[name]
+        return self.get(('spread', name), lambda: self.column(a) - self.column(b))
+
+    def series(self, name: str) -> np.ndarray:
+        return self.spread(name) if name in SPREADS else self.column(name)
+
+    def sma(self, name: str, window: int, min_periods: int | None = None) -> np.ndarray:
+        mp = default_min_periods(window) if min_periods is None else min_periods
+        return self.get(('sma', name, window, mp),
+                        lambda: pd.Series(self.series(name)).rolling(window, min_periods=mp).mean().to_numpy())
+
+    def std(self, name: str, window: int, min_periods: int | None = None) -> np.ndarray:
+        mp = default_min_periods(window) if min_periods is None else min_periods
+        return self.get(('std', name, window, mp),
+                        lambda: pd.Series(self.series(name)).rolling(window, min_periods=mp).std(ddof=0).to_numpy())
+
+    def z(self, name: str, sma_window: int, std_window: int, sma_min: int | None = None,
+          std_min: int | None = None) -> np.ndarray:
+        """(x - SMA) / std。inf と NaN（窓が埋まる前、std = 0）は 0。"""
+        sma_min = default_min_periods(sma_window) if sma_min is None else sma_min
+        std_min = default_min_periods(std_window) if std_min is None else std_min
+
+        def build() -> np.ndarray:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                z = (self.series(name) - self.sma(name, sma_window, sma_min)) / self.std(name, std_window, std_min)
+            return np.where(np.isfinite(z), z, 0.0)
+        return self.get(('z', name, sma_window, std_window, sma_min, std_min), build)
+
+    def nbytes(self) -> int:
+        return sum(v.nbytes for v in self._cache.values() if isinstance(v, np.ndarray))
+
+
+_STORES: Dict[int, FeatureStore] = {}
+
+
+def _register(df: pd.DataFrame, store: FeatureStore) -> None:
+    key = id(df)
+    if key not in _STORES:
+        weakref.finalize(df, _STORES.pop, key, None)
+    _STORES[key] = store
+
+
+def features(df: pd.DataFrame) -> FeatureStore:
+    """df の FeatureStore（無ければ作る）。"""
+    store = _STORES.get(id(df))
+    if store is None:
+        store = FeatureStore(df)
+        _register(df, store)
+    elif not store._valid_for(df):
+        store.clear()
+    return store
+
+
+def share(src: pd.DataFrame, dst: pd.DataFrame) -> pd.DataFrame:
+    """dst（src に列を足しただけの DataFrame）を src と同じ FeatureStore で引けるようにする。"""
+    store = features(src)
+    store._frames.append(weakref.ref(dst))
+    _register(dst, store)
+    return dst
+
+
+def forget(df: pd.DataFrame) -> None:
+    store = _STORES.get(id(df))
+    if store is not None:
+        store.clear()
@@ -1,10 +1,18 @@
+import json
 import os
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from pathlib import Path
 
 BASE = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE.parent / 'Bot'))
+from storage.column_cache import load_table  # noqa: E402
+from storage.pyramid import SERIES as PYRAMID_SERIES, Pyramid, load_pyramid  # noqa: E402
+from storage.results import code_version, data_fingerprint, default_store, result_key  # noqa: E402
+from backtest.report import BUCKETS, Figure, Panel, render, render_all  # noqa: E402
+from features import features, share  # noqa: E402
+
 CSV = BASE.parent / 'compare_10s.csv'
 IMG = BASE / 'img'
 IMG.mkdir(parents=True, exist_ok=True)
@@ -21,27 +29,33 @@ UNIT = 1.0  # 1枚あたりの想定（PnLはUSD）
 ONEWAY_Z_ENTRY = 2.0
 ONEWAY_Z_EXIT = 0.5
 MAX_HOLD_SEC = 600  # 10分
+XTICKS = {'labelrotation': 90, 'labelsize': 7}  # 時刻軸の目盛り
+# 結果ストアのキーに含めるソース（このファイルと、系列を作る features・図を作る report）
+CODE_FILES = (Path(__file__), BASE / 'features.py', BASE.parent / 'Bot' / 'backtest' / 'report.py')
 
 
 def load():
-    df = pd.read_csv(CSV)
+    # CSV は列キャッシュ経由（初回のみパース、以降は memmap。追記分だけ差分変換）
+    df = load_table(CSV).to_frame()
     # 欠損を前方/後方補完
     df = df.sort_values('timestamp')
     df.reset_index(drop=True, inplace=True)
-    df = df.fillna(method='ffill').fillna(method='bfill')
+    df = df.ffill().bfill()
     return df
 
 
 def compute_spreads(df: pd.DataFrame) -> pd.DataFrame:
-    d = df.copy()
+    # 元の列は共有し（列を足すだけなので浅いコピー）、派生系列は features で1回だけ計算する
+    feat = features(df)
+    d = share(df, df.copy(deep=False))
     # スプレッド定義
-    d['spot_spread_fgrd_bybit'] = d['spot_fgrd_bid'] - d['spot_bybit_ask']
-    d['spot_spread_bybit_fgrd'] = d['spot_bybit_bid'] - d['spot_fgrd_ask']
-    d['swap_spread_fgrd_bybit'] = d['swap_fgrd_bid'] - d['swap_bybit_ask']
-    d['swap_spread_bybit_fgrd'] = d['swap_bybit_bid'] - d['swap_fgrd_ask']
+    d['spot_spread_fgrd_bybit'] = feat.spread('spot_spread_fgrd_bybit')
+    d['spot_spread_bybit_fgrd'] = feat.spread('spot_spread_bybit_fgrd')
+    d['swap_spread_fgrd_bybit'] = feat.spread('swap_spread_fgrd_bybit')
+    d['swap_spread_bybit_fgrd'] = feat.spread('swap_spread_bybit_fgrd')
     # ベーシス
-    d['basis_fgrd'] = d['swap_fgrd_last'] - d['spot_fgrd_last']
-    d['basis_bybit'] = d['swap_bybit_last'] - d['spot_bybit_last']
+    d['basis_fgrd'] = feat.spread('basis_fgrd')
+    d['basis_bybit'] = feat.spread('basis_bybit')
     return d
 
 
@@ -51,24 +65,57 @@ def effective_spread(raw: pd.Series, fee_a: float, fee_b: float) -> pd.Series:
 
 
 def add_effective(df: pd.DataFrame) -> pd.DataFrame:
-    d = df.copy()
-    d['eff_spot_fgrd_bybit'] = effective_spread(d['spot_spread_fgrd_bybit'], TAKER_FEE_SPOT, TAKER_FEE_SPOT)
-    d['eff_spot_bybit_fgrd'] = effective_spread(d['spot_spread_bybit_fgrd'], TAKER_FEE_SPOT, TAKER_FEE_SPOT)
-    d['eff_swap_fgrd_bybit'] = effective_spread(d['swap_spread_fgrd_bybit'], TAKER_FEE_SWAP, TAKER_FEE_SWAP)
-    d['eff_swap_bybit_fgrd'] = effective_spread(d['swap_spread_bybit_fgrd'], TAKER_FEE_SWAP, TAKER_FEE_SWAP)
+    feat = features(df)
+    d = share(df, df.copy(deep=False))
+
+    def eff(name, fee):
+        return feat.get(('effective', name, fee, SLIPPAGE_USD),
+                        lambda: effective_spread(pd.Series(feat.spread(name)), fee, fee).to_numpy())
+    d['eff_spot_fgrd_bybit'] = eff('spot_spread_fgrd_bybit', TAKER_FEE_SPOT)
+    d['eff_spot_bybit_fgrd'] = eff('spot_spread_bybit_fgrd', TAKER_FEE_SPOT)
+    d['eff_swap_fgrd_bybit'] = eff('swap_spread_fgrd_bybit', TAKER_FEE_SWAP)
+    d['eff_swap_bybit_fgrd'] = eff('swap_spread_bybit_fgrd', TAKER_FEE_SWAP)
     return d
 
 
-def plot_series(df: pd.DataFrame, cols, title, fname):
-    plt.figure(figsize=(12,6))
+def _times(df: pd.DataFrame) -> np.ndarray:
+    return features(df).ts_ns().view('datetime64[ns]')
+
+
+def load_overview() -> Pyramid | None:
+    """CSV の集計ピラミッド（時刻順でない CSV は集計できないので None）。"""
+    try:
+        return load_pyramid(CSV)
+    except RuntimeError:
+        return None
+
+
+def series_figure(df: pd.DataFrame, cols, title, fname, pyramid: Pyramid | None = None) -> Figure:
+    # pyramid にある系列は、図の解像度を満たす一番粗い段の min/max を描く（段が無い短い期間は df をそのまま間引く）
+    t = _times(df)
+    panel = Panel(legend='best')
     for c in cols:
-        plt.plot(df['timestamp'], df[c], label=c)
-    plt.xticks(rotation=90, fontsize=7)
-    plt.title(title)
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(IMG / fname, dpi=150)
-    plt.close()
+        agg = pyramid.query(c, points=BUCKETS) if pyramid is not None and c in PYRAMID_SERIES else None
+        if agg is not None and agg.level != 'raw':
+            panel.line(*agg.envelope(), c)
+        else:
+            panel.line(t, df[c].to_numpy(), c)
+    return Figure(IMG / fname, [panel], title=title, xticks=XTICKS)
+
+
+def plot_series(df: pd.DataFrame, cols, title, fname):
+    render(series_figure(df, cols, title, fname))
+
+
+def overview_figures(df: pd.DataFrame, pyr: Pyramid | None = None) -> list:
+    # run() の時系列図（compute_spreads / add_effective 済みの df）
+    return [
+        series_figure(df, ['spot_spread_fgrd_bybit','spot_spread_bybit_fgrd'], 'Spot spread (raw)', 'spot_spread_raw.png', pyr),
+        series_figure(df, ['swap_spread_fgrd_bybit','swap_spread_bybit_fgrd'], 'Swap spread (raw)', 'swap_spread_raw.png', pyr),
+        series_figure(df, ['eff_spot_fgrd_bybit','eff_spot_bybit_fgrd'], 'Spot spread (effective)', 'spot_spread_eff.png'),
+        series_figure(df, ['eff_swap_fgrd_bybit','eff_swap_bybit_fgrd'], 'Swap spread (effective)', 'swap_spread_eff.png'),
+        series_figure(df, ['basis_fgrd','basis_bybit'], 'Basis (swap - spot)', 'basis.png', pyr),
+    ]
 
 
 def summarize_hits(s: pd.Series, thresh: float) -> dict:
@@ -84,11 +131,7 @@ def run():
     df = add_effective(df)
 
     # 可視化
-    plot_series(df, ['spot_spread_fgrd_bybit','spot_spread_bybit_fgrd'], 'Spot spread (raw)', 'spot_spread_raw.png')
-    plot_series(df, ['swap_spread_fgrd_bybit','swap_spread_bybit_fgrd'], 'Swap spread (raw)', 'swap_spread_raw.png')
-    plot_series(df, ['eff_spot_fgrd_bybit','eff_spot_bybit_fgrd'], 'Spot spread (effective)', 'spot_spread_eff.png')
-    plot_series(df, ['eff_swap_fgrd_bybit','eff_swap_bybit_fgrd'], 'Swap spread (effective)', 'swap_spread_eff.png')
-    plot_series(df, ['basis_fgrd','basis_bybit'], 'Basis (swap - spot)', 'basis.png')
+    render_all(overview_figures(df, load_overview()))
 
     # ヒット集計
     thresholds = [0.0, 0.5, 1.0, 2.0]
@@ -100,6 +143,202 @@ def run():
         summaries.append({'series':'eff_swap_bybit_fgrd', **summarize_hits(df['eff_swap_bybit_fgrd'], t)})
     pd.DataFrame(summaries).to_csv(IMG / 'hit_summary.csv', index=False)
 
+def _swap_fp(df: pd.DataFrame) -> str:
+    # 契約系バックテストが使う列の中身の指紋（同じ df なら features に覚えておく）
+    feat = features(df)
+    return feat.get(('swap_fp',), lambda: data_fingerprint(feat.ts_ns(), feat.column('swap_fgrd_last'),
+                                                           feat.column('swap_bybit_last')))
+
+
+def _swap_key(df: pd.DataFrame, params: dict, fp: str = None) -> str:
+    # 結果ストアのキー: 使う列の中身 + パラメータ + CODE_FILES のソース（モジュール定数の変更もここで拾う）
+    return result_key(fp or _swap_fp(df), params, code_version(*CODE_FILES))
+
+
+def _outputs_current(name: str, key: str) -> bool:
+    # 前回 img/ に書いた出力が同じ入力から作られたもので、そのとき書いたファイルが全部残っているか
+    marker = IMG / f'.{name}.key'
+    if not marker.exists():
+        return False
+    try:
+        m = json.loads(marker.read_text())
+    except ValueError:
+        return False
+    return isinstance(m, dict) and m.get('key') == key and all((IMG / f).exists() for f in m.get('files', []))
+
+
+def _mark_outputs(name: str, key: str, files) -> None:
+    (IMG / f'.{name}.key').write_text(json.dumps({'key': key, 'files': list(files)}))
+
+
+def _seconds(delta_ns):
+    # pd.Timedelta.total_seconds() と同じ値（マイクロ秒に切り捨ててから秒へ）
+    return (delta_ns // 1000) / 1e6
+
+
+def _next_at(cand: np.ndarray, lo: int, n: int) -> int:
+    # cand（昇順の行番号）のうち lo 以上の最初の行。無ければ n
+    j = np.searchsorted(cand, lo)
+    return int(cand[j]) if j < len(cand) else n
+
+
+def _ordered(ts: np.ndarray) -> bool:
+    # 時刻が昇順か（呼び出しごとに全行を見ないよう、系列ごとに1回だけ判定して渡す）
+    return len(ts) < 2 or not (np.diff(ts) < 0).any()
+
+
+def _first_elapsed(ts: np.ndarray, t0: int, sec: float, lo: int, strict: bool, ordered: bool = None) -> int:
+    """lo 以降で (ts[i] - t0).total_seconds() が sec を超える（strict=False なら sec 以上になる）最初の行。t0 は ns。"""
+    n = len(ts)
+    if lo >= n:
+        return n
+
+    def ok(i):
+        e = _seconds(int(ts[i]) - t0)
+        return e > sec if strict else e >= sec
+
+    if not np.isfinite(sec) or not (_ordered(ts) if ordered is None else ordered):
+        # 時刻が昇順でない（or 無限大）なら素直に全行を判定する
+        el = _seconds(ts[lo:] - t0)
+        hit = el > sec if strict else el >= sec
+        j = int(np.argmax(hit))
+        return lo + j if hit[j] else n
+    target = min(t0 + int(sec * 1e9), int(ts[-1]) + 1)
+    i = max(lo, int(np.searchsorted(ts, target)))
+    while i > lo and ok(i - 1):
+        i -= 1
+    while i < n and not ok(i):
+        i += 1
+    return i
+
+
+def _equity_path(pos_after: np.ndarray, ds: np.ndarray, cost: np.ndarray) -> np.ndarray:
+    """行 1..n-1 の累積 PnL。ループ版の pnl += pos * ds; pnl -= c と同じ順に足すので結果はビット単位で一致する。"""
+    ops = np.empty(2 * len(ds))
+    ops[0::2] = pos_after[:-1] * ds
+    ops[1::2] = -cost
+    return np.cumsum(ops)[1::2]
+
+
+def _ns(ts: pd.Series) -> np.ndarray:
+    # 時刻列は1回だけ int64 ns に変換する
+    return pd.to_datetime(ts).to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+
+def _pair_events(z: np.ndarray, z_entry: float, z_exit: float, start: int = 1, pos: int = 0):
+    """backtest_swap_pair の状態遷移 [(行, 遷移後の pos, 種別)]。候補行の間を searchsorted でジャンプする。
+
+    start 行から判定する（既定はループ版と同じく行 0 を飛ばす）。途中から続ける場合は直前の pos を渡す。
+    """
+    n = len(z)
+    hi = np.flatnonzero(z > z_entry)
+    lo = np.flatnonzero(z < -z_entry)
+    mid = np.flatnonzero(np.abs(z) < z_exit)
+    events = []
+    k = start
+    while True:
+        if pos == 0:
+            a, b = _next_at(hi, k, n), _next_at(lo, k, n)
+            i = min(a, b)
+            if i >= n:
+                return events
+            pos = -1 if a < b else +1   # 高位→縮小期待 / 低位→拡大期待
+            events.append((i, pos, 'enter'))
+        else:
+            r = _next_at(lo if pos == -1 else hi, k, n)
+            x = _next_at(mid, k, n)
+            i = min(r, x)
+            if i >= n:
+                return events
+            if r <= x:   # 反転が中性域での決済より優先
+                pos = -pos
+                events.append((i, pos, 'reverse'))
+            else:
+                pos = 0
+                events.append((i, 0, 'exit'))
+        k = i + 1
+
+
+def _pos_after(n: int, events) -> np.ndarray:
+    # 各行の判定後のポジション（遷移の間は一定）
+    pos = np.zeros(n, dtype=np.int64)
+    for j, (i, p, _) in enumerate(events):
+        end = events[j + 1][0] if j + 1 < len(events) else n
+        pos[i:end] = p
+    return pos
+
+
+def _oneway_events(z: np.ndarray, ts: np.ndarray, z_entry: float, z_exit: float, max_hold_sec: float,
+                   persistence_n: int, cooldown_sec: float, start: int = 1, consec: int = 0,
+                   entry_ns: int = None, last_exit_ns: int = None):
+    """backtest_oneway_fgrd_high の (エントリー行, 決済行) の列。決済行が n のものは未決済。
+
+    連続ヒット数 consec はフラットの行でだけ更新され、決済後も前回エントリー時の値から数え続ける
+    （ループ版の挙動）。なので決済直後から z > z_entry が続く区間はすぐに再エントリーの対象になる。
+    途中から続ける場合は start=0 と、直前までの consec・保有中ならエントリー時刻 entry_ns・前回の決済時刻
+    last_exit_ns（いずれも ns）を渡す。持ち越したポジションの決済は (-1, 決済行) で返す。
+    """
+    n = len(z)
+    hit = z > z_entry
+    hit[:start] = False
+    idx = np.arange(n)
+    last_false = np.where(hit, start - 1 - consec, idx)
+    np.maximum.accumulate(last_false, out=last_false)
+    eligible = np.flatnonzero(idx - last_false >= persistence_n)
+    eligible = eligible[eligible >= start]
+    misses = np.flatnonzero(~hit)
+    z_out = np.flatnonzero(z < z_exit)
+    ordered = _ordered(ts)
+    trades = []
+    k = start
+    after_exit = False
+    if entry_ns is not None:
+        x = min(_next_at(z_out, start, n), _first_elapsed(ts, entry_ns, max_hold_sec, start, True, ordered))
+        trades.append((-1, x))
+        if x >= n:
+            return trades
+        last_exit_ns, after_exit, k = int(ts[x]), True, x + 1
+    while True:
+        m = k if (not cooldown_sec or last_exit_ns is None) else _first_elapsed(ts, last_exit_ns, cooldown_sec, k,
+                                                                                False, ordered)
+        e = _next_at(eligible, m, n)
+        if after_exit and m < _next_at(misses, k, n):
+            e = min(e, m)   # 決済直後から続くヒット区間（consec は持ち越し分で条件を満たしている）
+        if e >= n:
+            return trades
+        x = min(_next_at(z_out, e + 1, n), _first_elapsed(ts, int(ts[e]), max_hold_sec, e + 1, True, ordered))
+        trades.append((e, x))
+        if x >= n:
+            return trades
+        last_exit_ns, after_exit, k = int(ts[x]), True, x + 1
+
+
+def _premium_runs(z: np.ndarray, z_high: float, z_low: float):
+    """z > z_high で始まり、開始行より後で最初に z < z_low となる行で終わる区間 [(開始行, 終了行)]。終わらない区間は含めない。"""
+    n = len(z)
+    highs = np.flatnonzero(z > z_high)
+    lows = np.flatnonzero(z < z_low)
+    runs = []
+    i = _next_at(highs, 0, n)
+    while i < n:
+        j = _next_at(lows, i + 1, n)
+        if j >= n:
+            break
+        runs.append((i, j))
+        i = _next_at(highs, j + 1, n)
+    return runs
+
+
+def _nearest_row(t_ns: np.ndarray, t: int, ordered: bool = None) -> int:
+    """(ts - t).abs().argmin() と同じ行（同じ距離なら先頭側）。時刻が昇順なら searchsorted で引く。"""
+    if not (_ordered(t_ns) if ordered is None else ordered):
+        return int(np.abs(t_ns - t).argmin())
+    k = int(np.searchsorted(t_ns, t))
+    if k < len(t_ns) and (k == 0 or t_ns[k] - t < t - t_ns[k - 1]):
+        return k
+    return int(np.searchsorted(t_ns, t_ns[k - 1]))
+
+
 def backtest_swap_pair(df: pd.DataFrame):
     """
     ペアトレード検証（契約のみ）
@@ -108,147 +347,66 @@ def backtest_swap_pair(df: pd.DataFrame):
       pos = -1: FGRD売り + Bybit買い（スプレッド低下で利益）
     PnL増分: dPnL = pos * Δs
     取引コスト: 片道で両側taker+スリッページ（USD）を差引。往復時は2倍。
+    入力とパラメータが前回と同じなら img/ の出力をそのまま使う。
     """
-    d = df.copy()
-    d['s'] = d['swap_fgrd_last'] - d['swap_bybit_last']
-    d['sma'] = d['s'].rolling(SMA_WINDOW, min_periods=5).mean()
-    d['std'] = d['s'].rolling(STD_WINDOW, min_periods=5).std(ddof=0)
-    d['z'] = (d['s'] - d['sma']) / d['std']
-    d['z'] = d['z'].replace([np.inf, -np.inf], np.nan).fillna(0.0)
-
-    pos = 0
-    pnl = 0.0  # 累積PnL（ネット）
-    equities = []
-    poss = []
-    trades = []  # list of dicts
-    entry_idx = None
-    entry_s = None
-    entry_pos = None
-    entry_cost = 0.0
-    equity_at_entry = 0.0
-
-    def trade_cost(row):
-        # 片道で両サイドのtaker+スリッページ×2
-        price_f = float(row['swap_fgrd_last']) * UNIT
-        price_b = float(row['swap_bybit_last']) * UNIT
-        fee = TAKER_FEE_SWAP * (abs(price_f) + abs(price_b))
-        slip = 2.0 * SLIPPAGE_USD
-        return fee + slip
-
-    for i in range(1, len(d)):
-        row_prev = d.iloc[i-1]
-        row = d.iloc[i]
-        ds = float(row['s'] - row_prev['s']) * UNIT
-
-        # マークトゥマーケット
-        pnl += pos * ds
-
-        # エントリー/エグジット判定
-        z = float(row['z'])
-        new_pos = pos
+    key = _swap_key(df, {'pair': []})   # パラメータはモジュール定数なのでソースのバージョンに含まれる
+    if _outputs_current('pair', key):
+        return
+    # s / SMA / z は features に覚えてあるものを使う（df はコピーしない）
+    feat = features(df)
+    s = feat.spread('s')
+    d = pd.DataFrame({'timestamp': df['timestamp'], 's': s, 'sma': feat.sma('s', SMA_WINDOW, 5),
+                      'z': feat.z('s', SMA_WINDOW, STD_WINDOW, 5, 5)})
+
+    # 状態遷移は z の候補行をジャンプして求め、PnL は遷移から組み立てた増分の累積和で出す（ループ版と同じ値）
+    n = len(d)
+    ts = feat.ts_ns()
+    events = _pair_events(feat.z('s', SMA_WINDOW, STD_WINDOW, 5, 5), Z_ENTRY, Z_EXIT)
+    rows = np.array([i for i, _, _ in events], dtype=np.int64)
+    # 片道で両サイドのtaker+スリッページ×2（反転は往復分）
+    tc = TAKER_FEE_SWAP * (np.abs(feat.column('swap_fgrd_last')[rows] * UNIT)
+                           + np.abs(feat.column('swap_bybit_last')[rows] * UNIT)) + 2.0 * SLIPPAGE_USD
+    ev_cost = np.where([kind == 'reverse' for _, _, kind in events], tc * 2.0, tc) if len(events) else tc
+    cost = np.zeros(n)
+    cost[rows] = ev_cost
+    pos = _pos_after(n, events)
+    equity = _equity_path(pos, np.diff(s) * UNIT, cost[1:]) if n > 1 else np.zeros(0)
 
-        if pos == 0:
-            if z > Z_ENTRY:
-                new_pos = -1  # 高位→縮小期待
-            elif z < -Z_ENTRY:
-                new_pos = +1  # 低位→拡大期待
-            if new_pos != 0:
-                c = trade_cost(row)
-                pnl -= c
-                entry_idx = i
-                entry_s = float(row['s'])
-                entry_pos = new_pos
-                entry_cost = c
-                equity_at_entry = pnl
-        else:
-            exit_signal = abs(z) < Z_EXIT  # 中性域で利確/撤退
-            reverse_signal = (z > Z_ENTRY and pos == +1) or (z < -Z_ENTRY and pos == -1)
-            if reverse_signal:
-                # 反転（エグジット+エントリー）
-                c = trade_cost(row) * 2.0
-                pnl -= c
-                # 記録（クローズ分）
-                trade_pnl = pnl - equity_at_entry
-                trades.append({
-                    'entry_idx': entry_idx,
-                    'exit_idx': i,
-                    'entry_pos': entry_pos,
-                    'exit_pos': -pos,
-                    'entry_s': entry_s,
-                    'exit_s': float(row['s']),
-                    'pnl_net': float(trade_pnl),
-                    'cost_total': float(entry_cost + c/2.0),
-                    'duration_sec': (pd.to_datetime(row['timestamp']) - pd.to_datetime(d['timestamp'].iloc[entry_idx])).total_seconds()
-                })
-                # 新規エントリー
-                entry_idx = i
-                entry_s = float(row['s'])
-                entry_pos = -pos
-                entry_cost = c/2.0
-                equity_at_entry = pnl
-                new_pos = -pos
-            elif exit_signal:
-                # クローズ
-                c = trade_cost(row)
-                pnl -= c
-                trade_pnl = pnl - equity_at_entry
-                trades.append({
-                    'entry_idx': entry_idx,
-                    'exit_idx': i,
-                    'entry_pos': entry_pos,
-                    'exit_pos': 0,
-                    'entry_s': entry_s,
-                    'exit_s': float(row['s']),
-                    'pnl_net': float(trade_pnl),
-                    'cost_total': float(entry_cost + c),
-                    'duration_sec': (pd.to_datetime(row['timestamp']) - pd.to_datetime(d['timestamp'].iloc[entry_idx])).total_seconds()
-                })
-                new_pos = 0
-                entry_idx = None
-                entry_s = None
-                entry_pos = None
-                entry_cost = 0.0
-                equity_at_entry = pnl
-
-        pos = new_pos
-        poss.append(pos)
-        equities.append(pnl)
+    trades = []  # list of dicts
+    for j, (i, p, kind) in enumerate(events):
+        if kind != 'enter':
+            e, _, _ = events[j - 1]
+            prev_cost = ev_cost[j - 1]
+            entry_cost = prev_cost / 2.0 if events[j - 1][2] == 'reverse' else prev_cost
+            trades.append({
+                'entry_idx': e,
+                'exit_idx': i,
+                'entry_pos': events[j - 1][1],
+                'exit_pos': p,
+                'entry_s': float(s[e]),
+                'exit_s': float(s[i]),
+                'pnl_net': float(equity[i - 1] - equity[e - 1]),
+                'cost_total': float(entry_cost + (ev_cost[j] / 2.0 if kind == 'reverse' else ev_cost[j])),
+                'duration_sec': _seconds(int(ts[i]) - int(ts[e])),
+            })
+    poss = pos[1:]
+    equities = equity
 
     d = d.iloc[1:].copy()
     d['pos'] = poss
     d['equity'] = equities
 
-    # プロット: スプレッドとz、ポジション
-    plt.figure(figsize=(12,6))
-    ax1 = plt.gca()
-    ax1.plot(d['timestamp'], d['s'], label='spread s=fgrd-last - bybit-last')
-    ax1.plot(d['timestamp'], d['sma'], label='SMA', alpha=0.7)
-    ax1.legend(loc='upper left')
-    ax2 = ax1.twinx()
-    ax2.plot(d['timestamp'], d['z'], color='tab:orange', label='z', alpha=0.6)
-    ax2.axhline(Z_ENTRY, color='tab:red', linestyle='--', alpha=0.4)
-    ax2.axhline(-Z_ENTRY, color='tab:green', linestyle='--', alpha=0.4)
-    ax2.axhline(0.0, color='gray', linestyle=':')
-    ax2.legend(loc='upper right')
-    # ポジション帯
-    y0 = d['s'].min()
-    y1 = d['s'].max()
-    for i, p in enumerate(d['pos']):
-        if p != 0:
-            ax1.axvspan(d['timestamp'].iloc[i], d['timestamp'].iloc[i], color='red' if p<0 else 'green', alpha=0.08)
-    plt.xticks(rotation=90, fontsize=7)
-    plt.tight_layout()
-    plt.savefig(IMG / 'swap_spread_z_positions.png', dpi=150)
-    plt.close()
-
+    # プロット: スプレッドとz、ポジション（系列は間引き、ポジション帯は区間にまとめる）
+    t = _times(df)[1:]
+    z = Panel(legend='upper right').line(t, d['z'].to_numpy(), 'z', color='tab:orange', alpha=0.6)
+    z.hline(Z_ENTRY, color='tab:red', linestyle='--', alpha=0.4).hline(-Z_ENTRY, color='tab:green', linestyle='--', alpha=0.4)
+    z.hline(0.0, color='gray', linestyle=':')
+    spread = Panel(legend='upper left', twin=z).line(t, d['s'].to_numpy(), 'spread s=fgrd-last - bybit-last')
+    spread.line(t, d['sma'].to_numpy(), 'SMA', alpha=0.7).positions(t, poss)
     # エクイティカーブ
-    plt.figure(figsize=(12,5))
-    plt.plot(d['timestamp'], d['equity'], label='equity')
-    plt.xticks(rotation=90, fontsize=7)
-    plt.title('Pair-trade equity (swap)')
-    plt.tight_layout()
-    plt.savefig(IMG / 'pair_equity.png', dpi=150)
-    plt.close()
+    equity = Panel().line(t, equities, 'equity')
+    render_all([Figure(IMG / 'swap_spread_z_positions.png', [spread], xticks=XTICKS),
+                Figure(IMG / 'pair_equity.png', [equity], title='Pair-trade equity (swap)', size=(12, 5), xticks=XTICKS)])
 
     # サマリ
     if trades:
@@ -287,6 +445,8 @@ def backtest_swap_pair(df: pd.DataFrame):
         summary.to_csv(IMG / 'pair_backtest_summary.csv', index=False)
     else:
         pd.DataFrame([{'trades':0,'wins':0,'win_rate':0.0,'final_equity':float(d['equity'].iloc[-1])}]).to_csv(IMG / 'pair_backtest_summary.csv', index=False)
+    _mark_outputs('pair', key, ['swap_spread_z_positions.png', 'pair_equity.png', 'pair_backtest_summary.csv']
+                  + (['pair_trades.csv'] if trades else []))
 
 
 def backtest_oneway_fgrd_high(
@@ -309,16 +469,18 @@ def backtest_oneway_fgrd_high(
       エントリー: z > ONEWAY_Z_ENTRY で FGRD売り + Bybit買い（pos = -1）
       エグジット: z < ONEWAY_Z_EXIT または 保持時間 > MAX_HOLD_SEC
     PnL: dPnL = pos * Δs（s = fgrd - bybit）− コスト
+    ファイル出力する場合、入力とパラメータが前回と同じなら img/ の出力をそのまま使う。
     """
-    d = df.copy()
-    d['s'] = d['swap_fgrd_last'] - d['swap_bybit_last']
+    if not return_summary_only:
+        key = _swap_key(df, {'oneway': [z_entry, z_exit, max_hold_sec, taker_fee_swap, slippage_usd, unit, sma_window,
+                                        std_window, persistence_n, cooldown_sec]})
+        if _outputs_current(output_prefix, key):
+            return
+    feat = features(df)
     # 窓幅（未指定時はデフォルト）
     swa = SMA_WINDOW if sma_window is None else sma_window
     stw = STD_WINDOW if std_window is None else std_window
-    d['sma'] = d['s'].rolling(swa, min_periods=max(5, int(swa*0.2))).mean()
-    d['std'] = d['s'].rolling(stw, min_periods=max(5, int(stw*0.2))).std(ddof=0)
-    d['z'] = (d['s'] - d['sma']) / d['std']
-    d['z'] = d['z'].replace([np.inf, -np.inf], np.nan).fillna(0.0)
+    z = feat.z('s', swa, stw)   # スイープで同じ窓を何度使っても計算は1回
 
     # パラメータ反映（未指定ならグローバル）
     z_entry = ONEWAY_Z_ENTRY if z_entry is None else z_entry
@@ -328,91 +490,43 @@ def backtest_oneway_fgrd_high(
     slippage_usd = SLIPPAGE_USD if slippage_usd is None else slippage_usd
     unit = UNIT if unit is None else unit
 
-    pos = 0   # 0 or -1
-    pnl = 0.0
-    equities = []
-    poss = []
-    trades = []
-    entry_idx = None
-    entry_s = None
-    entry_time = None
-    equity_at_entry = 0.0
-
-    def trade_cost(row):
-        price_f = float(row['swap_fgrd_last']) * unit
-        price_b = float(row['swap_bybit_last']) * unit
-        fee = taker_fee_swap * (abs(price_f) + abs(price_b))
-        slip = 2.0 * slippage_usd
-        return fee + slip
+    # 状態遷移は候補行のジャンプで求め、PnL は増分の累積和で出す（ループ版と同じ値）
+    n = len(z)
+    s = feat.spread('s')
+    ts = feat.ts_ns()
+    pairs = _oneway_events(z, ts, z_entry, z_exit, max_hold_sec, persistence_n, cooldown_sec)
+    pos = np.zeros(n, dtype=np.int64)
+    cost = np.zeros(n)
+    ev = np.array([i for pair in pairs for i in pair if i < n], dtype=np.int64)
+    cost[ev] = taker_fee_swap * (np.abs(feat.column('swap_fgrd_last')[ev] * unit)
+                                 + np.abs(feat.column('swap_bybit_last')[ev] * unit)) + 2.0 * slippage_usd
+    for e, x in pairs:
+        pos[e:x] = -1
+    # ds はループ版どおりグローバルの UNIT を掛ける
+    equity = _equity_path(pos, np.diff(s) * UNIT, cost[1:]) if n > 1 else np.zeros(0)
 
-    ts = pd.to_datetime(d['timestamp'])
-    last_exit_time = None
-    consec = 0
-    for i in range(1, len(d)):
-        row_prev = d.iloc[i-1]
-        row = d.iloc[i]
-        ds = float(row['s'] - row_prev['s']) * UNIT
-
-        pnl += pos * ds
-
-        z = float(row['z'])
-        now = ts.iloc[i]
-        new_pos = pos
-
-        if pos == 0:
-            consec = consec + 1 if z > z_entry else 0
-            cooldown_ok = True
-            if cooldown_sec and last_exit_time is not None:
-                cooldown_ok = (now - last_exit_time).total_seconds() >= cooldown_sec
-            if (consec >= persistence_n) and cooldown_ok:
-                c = trade_cost(row)
-                pnl -= c
-                new_pos = -1
-                entry_idx = i
-                entry_s = float(row['s'])
-                entry_time = now
-                equity_at_entry = pnl
-        else:
-            hold_sec = (now - entry_time).total_seconds() if entry_time is not None else 0.0
-            exit_signal = (z < z_exit) or (hold_sec > max_hold_sec)
-            if exit_signal:
-                c = trade_cost(row)
-                pnl -= c
-                trade_pnl = pnl - equity_at_entry
-                trades.append({
-                    'entry_idx': entry_idx,
-                    'exit_idx': i,
-                    'entry_s': entry_s,
-                    'exit_s': float(row['s']),
-                    'pnl_net': float(trade_pnl),
-                    'cost_total': float(c),
-                    'duration_sec': hold_sec,
-                    'direction': 'FGRD_sell/Bybit_buy'
-                })
-                new_pos = 0
-                entry_idx = None
-                entry_s = None
-                entry_time = None
-                equity_at_entry = pnl
-                last_exit_time = now
-
-        pos = new_pos
-        poss.append(pos)
-        equities.append(pnl)
-
-    d = d.iloc[1:].copy()
-    d['pos'] = poss
-    d['equity'] = equities
+    trades = []
+    for e, x in pairs:
+        if x < n:
+            trades.append({
+                'entry_idx': e,
+                'exit_idx': x,
+                'entry_s': float(s[e]),
+                'exit_s': float(s[x]),
+                'pnl_net': float(equity[x - 1] - equity[e - 1]),
+                'cost_total': float(cost[x]),
+                'duration_sec': _seconds(int(ts[x]) - int(ts[e])),
+                'direction': 'FGRD_sell/Bybit_buy'
+            })
+    poss = pos[1:]
+    equities = equity
+
+    d = pd.DataFrame({'timestamp': df['timestamp'].iloc[1:], 'pos': poss, 'equity': equities})
 
     # 出力
     if not return_summary_only:
-        plt.figure(figsize=(12,5))
-        plt.plot(d['timestamp'], d['equity'])
-        plt.title(f'Equity ({output_prefix})')
-        plt.xticks(rotation=90, fontsize=7)
-        plt.tight_layout()
-        plt.savefig(IMG / f'{output_prefix}_equity.png', dpi=150)
-        plt.close()
+        render(Figure(IMG / f'{output_prefix}_equity.png', [Panel().line(_times(df)[1:], equities)],
+                      title=f'Equity ({output_prefix})', size=(12, 5), xticks=XTICKS))
 
     if trades:
         tr = pd.DataFrame(trades)
@@ -448,15 +562,20 @@ def backtest_oneway_fgrd_high(
             return summary_df
         else:
             summary_df.to_csv(IMG / f'{output_prefix}_summary.csv', index=False)
+            _mark_outputs(output_prefix, key, [f'{output_prefix}_equity.png', f'{output_prefix}_trades.csv',
+                                               f'{output_prefix}_summary.csv'])
     else:
         summary_df = pd.DataFrame([{'trades':0,'wins':0,'win_rate':0.0,'final_equity':float(d['equity'].iloc[-1])}])
         if return_summary_only:
             return summary_df
         else:
             summary_df.to_csv(IMG / f'{output_prefix}_summary.csv', index=False)
+            _mark_outputs(output_prefix, key, [f'{output_prefix}_equity.png', f'{output_prefix}_summary.csv'])
 
 
 def sweep_oneway_params(df: pd.DataFrame):
+    store = default_store()
+    fp = _swap_fp(df)
     z_entries = [2.0, 2.5, 3.0]
     z_exits = [0.2, 0.3]
     max_holds = [60, 120, 300]
@@ -470,17 +589,24 @@ def sweep_oneway_params(df: pd.DataFrame):
                 for fee in fees:
                     for sl in slips:
                         for un in units:
-                            summ = backtest_oneway_fgrd_high(
-                                df,
-                                z_entry=ze,
-                                z_exit=zx,
-                                max_hold_sec=mh,
-                                taker_fee_swap=fee,
-                                slippage_usd=sl,
-                                unit=un,
-                                return_summary_only=True,
-                            )
-                            s = summ.iloc[0].to_dict()
+                            # 計算済みの組（同じデータ・パラメータ・コード）は結果ストアから読む
+                            key = _swap_key(df, {'oneway_summary': [ze, zx, mh, fee, sl, un]}, fp)
+                            hit = store.get(key)
+                            if hit is not None:
+                                s = dict(hit.meta['summary'])
+                            else:
+                                summ = backtest_oneway_fgrd_high(
+                                    df,
+                                    z_entry=ze,
+                                    z_exit=zx,
+                                    max_hold_sec=mh,
+                                    taker_fee_swap=fee,
+                                    slippage_usd=sl,
+                                    unit=un,
+                                    return_summary_only=True,
+                                )
+                                s = summ.iloc[0].to_dict()
+                                store.put(key, meta={'summary': s})
                             s.update({'z_entry':ze,'z_exit':zx,'max_hold':mh,'fee':fee,'slippage':sl,'unit':un})
                             results.append(s)
     res = pd.DataFrame(results)
@@ -502,52 +628,26 @@ def detect_premium_events(
     その後z<z_lowに戻る事象を検出。
     出力: premium_events.csv（start, end, duration_sec, max_z, peak_spread, area）
     """
-    d = df.copy()
-    d['s'] = d['swap_fgrd_last'] - d['swap_bybit_last']
-    d['sma'] = d['s'].rolling(sma_window, min_periods=max(5, int(sma_window*0.2))).mean()
-    d['std'] = d['s'].rolling(std_window, min_periods=max(5, int(std_window*0.2))).std(ddof=0)
-    d['z'] = ((d['s'] - d['sma']) / d['std']).replace([np.inf,-np.inf], np.nan).fillna(0.0)
-    ts = pd.to_datetime(d['timestamp'])
+    feat = features(df)
+    ts = pd.to_datetime(df['timestamp'])
 
+    z = feat.z('s', sma_window, std_window)
+    sv = feat.spread('s')
+    t_ns = feat.ts_ns()
     events = []
-    in_evt = False
-    start_idx = None
-    area = 0.0
-    max_z = -1e9
-    peak_s = None
-
-    for i in range(len(d)):
-        z = float(d['z'].iloc[i])
-        if not in_evt:
-            if z > z_high:
-                in_evt = True
-                start_idx = i
-                area = 0.0
-                max_z = z
-                peak_s = float(d['s'].iloc[i])
-        else:
-            # 積分近似
-            area += max(0.0, z - z_low)
-            if z > max_z:
-                max_z = z
-                peak_s = float(d['s'].iloc[i])
-            # 終了条件
-            if z < z_low:
-                dur = (ts.iloc[i] - ts.iloc[start_idx]).total_seconds()
-                if dur >= min_duration_sec:
-                    events.append({
-                        'start': ts.iloc[start_idx].isoformat(),
-                        'end': ts.iloc[i].isoformat(),
-                        'duration_sec': dur,
-                        'max_z': max_z,
-                        'peak_spread': peak_s,
-                        'area_over_low': area,
-                    })
-                in_evt = False
-                start_idx = None
-                area = 0.0
-                max_z = -1e9
-                peak_s = None
+    for i, j in _premium_runs(z, z_high, z_low):
+        dur = _seconds(int(t_ns[j]) - int(t_ns[i]))
+        if dur >= min_duration_sec:
+            k = i + int(np.argmax(z[i:j + 1]))   # 最大値が複数あれば最初の行（ループ版の z > max_z と同じ）
+            events.append({
+                'start': ts.iloc[i].isoformat(),
+                'end': ts.iloc[j].isoformat(),
+                'duration_sec': dur,
+                'max_z': float(z[k]),
+                'peak_spread': float(sv[k]),
+                # 積分近似（開始行の次から終了行まで、ループ版と同じ順に足す）
+                'area_over_low': float(np.cumsum(np.maximum(0.0, z[i + 1:j + 1] - z_low))[-1]),
+            })
 
     ev = pd.DataFrame(events)
     ev.to_csv(IMG / 'premium_events.csv', index=False)
@@ -569,52 +669,52 @@ def backtest_premium_events(
       - エグジット: z < z_low までホールド（event.end 近傍）
       - PnL = pos * (s_exit - s_entry) * unit − 2 * コスト（往復）
     """
-    d = df.copy()
-    d['s'] = d['swap_fgrd_last'] - d['swap_bybit_last']
-    # z再計算（exit条件のため）
-    d['sma'] = d['s'].rolling(SMA_WINDOW, min_periods=max(5, int(SMA_WINDOW*0.2))).mean()
-    d['std'] = d['s'].rolling(STD_WINDOW, min_periods=max(5, int(STD_WINDOW*0.2))).std(ddof=0)
-    d['z'] = ((d['s'] - d['sma']) / d['std']).replace([np.inf,-np.inf], np.nan).fillna(0.0)
-    ts = pd.to_datetime(d['timestamp'])
+    feat = features(df)
+    ts = pd.to_datetime(df['timestamp'])
+
+    # z（exit条件のため）は backtest_oneway_fgrd_high の既定窓と同じものを共有する
+    z = feat.z('s', SMA_WINDOW, STD_WINDOW)
+    sv = feat.spread('s')
+    f_last = feat.column('swap_fgrd_last')
+    b_last = feat.column('swap_bybit_last')
+    t_ns = feat.ts_ns()
+    n = len(z)
+    lows = np.flatnonzero(z < z_low)
+    ordered = _ordered(t_ns)
 
     def cost_at(i):
-        price_f = float(d['swap_fgrd_last'].iloc[i]) * unit
-        price_b = float(d['swap_bybit_last'].iloc[i]) * unit
+        price_f = float(f_last[i]) * unit
+        price_b = float(b_last[i]) * unit
         fee = taker_fee_swap * (abs(price_f) + abs(price_b))
         slip = 2.0 * slippage_usd
         return fee + slip
 
     trades = []
-    for _, ev in events.iterrows():
-        # 近いインデックスを探す
-        start_time = pd.to_datetime(ev['start'])
-        end_time = pd.to_datetime(ev['end'])
-        # エントリーindex: start_time に最も近い時刻の行
-        i_entry = int((ts - start_time).abs().argmin())
-        # エグジットindex: start_time以降で z < z_low となる最初の点、なければ end_time 近傍
-        after = d.iloc[i_entry:].copy()
-        cond = after['z'] < z_low
-        if cond.any():
-            i_exit = i_entry + int(np.argmax(cond.values))
-        else:
-            i_exit = int((ts - end_time).abs().argmin())
-        if i_exit <= i_entry:
-            continue
-        s_entry = float(d['s'].iloc[i_entry])
-        s_exit = float(d['s'].iloc[i_exit])
-        pnl_gross = (-1.0) * (s_exit - s_entry) * unit  # pos=-1
-        pnl_net = pnl_gross - (cost_at(i_entry) + cost_at(i_exit))
-        trades.append({
-            'start': ts.iloc[i_entry].isoformat(),
-            'end': ts.iloc[i_exit].isoformat(),
-            'entry_idx': i_entry,
-            'exit_idx': i_exit,
-            's_entry': s_entry,
-            's_exit': s_exit,
-            'pnl_gross': pnl_gross,
-            'pnl_net': pnl_net,
-            'duration_sec': float((ts.iloc[i_exit] - ts.iloc[i_entry]).total_seconds())
-        })
+    if len(events) and n:
+        for t_start, t_end in zip(_ns(events['start']), _ns(events['end'])):
+            # エントリーindex: start_time に最も近い時刻の行
+            i_entry = _nearest_row(t_ns, int(t_start), ordered)
+            # エグジットindex: start_time以降で z < z_low となる最初の点、なければ end_time 近傍
+            i_exit = _next_at(lows, i_entry, n)
+            if i_exit >= n:
+                i_exit = _nearest_row(t_ns, int(t_end), ordered)
+            if i_exit <= i_entry:
+                continue
+            s_entry = float(sv[i_entry])
+            s_exit = float(sv[i_exit])
+            pnl_gross = (-1.0) * (s_exit - s_entry) * unit  # pos=-1
+            pnl_net = pnl_gross - (cost_at(i_entry) + cost_at(i_exit))
+            trades.append({
+                'start': ts.iloc[i_entry].isoformat(),
+                'end': ts.iloc[i_exit].isoformat(),
+                'entry_idx': i_entry,
+                'exit_idx': i_exit,
+                's_entry': s_entry,
+                's_exit': s_exit,
+                'pnl_gross': pnl_gross,
+                'pnl_net': pnl_net,
+                'duration_sec': float(_seconds(int(t_ns[i_exit]) - int(t_ns[i_entry])))
+            })
 
     tr = pd.DataFrame(trades)
     if not tr.empty:
@@ -659,22 +759,17 @@ def plot_futures_spreads(df: pd.DataFrame):
       - spread_fgrd_bid_minus_bybit_ask = swap_fgrd_bid - swap_bybit_ask
       - spread_bybit_bid_minus_fgrd_ask = swap_bybit_bid - swap_fgrd_ask
     """
-    d = df.copy()
-    d['spread_fgrd_bid_minus_bybit_ask'] = d['swap_fgrd_bid'] - d['swap_bybit_ask']
-    d['spread_bybit_bid_minus_fgrd_ask'] = d['swap_bybit_bid'] - d['swap_fgrd_ask']
+    feat = features(df)
+    d = pd.DataFrame({'timestamp': df['timestamp'],
+                      'spread_fgrd_bid_minus_bybit_ask': feat.spread('swap_spread_fgrd_bybit'),
+                      'spread_bybit_bid_minus_fgrd_ask': feat.spread('swap_spread_bybit_fgrd')})
     # 保存用CSV
     d[['timestamp','spread_fgrd_bid_minus_bybit_ask','spread_bybit_bid_minus_fgrd_ask']].to_csv(IMG / 'futures_spreads.csv', index=False)
 
-    plt.figure(figsize=(12,6))
-    plt.plot(d['timestamp'], d['spread_fgrd_bid_minus_bybit_ask'], label='FGRD bid - Bybit ask')
-    plt.plot(d['timestamp'], d['spread_bybit_bid_minus_fgrd_ask'], label='Bybit bid - FGRD ask')
-    plt.axhline(0.0, color='gray', linestyle=':')
-    plt.xticks(rotation=90, fontsize=7)
-    plt.title('Futures spreads (BTCUSDT): cross-exchange')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(IMG / 'futures_spreads.png', dpi=150)
-    plt.close()
+    t = _times(df)
+    panel = (Panel(legend='best').line(t, feat.spread('swap_spread_fgrd_bybit'), 'FGRD bid - Bybit ask')
+             .line(t, feat.spread('swap_spread_bybit_fgrd'), 'Bybit bid - FGRD ask').hline(0.0, color='gray', linestyle=':'))
+    render(Figure(IMG / 'futures_spreads.png', [panel], title='Futures spreads (BTCUSDT): cross-exchange', xticks=XTICKS))
 
 
 if __name__ == '__main__':